@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+in-flight 추론 스케줄러 벤치마크 — 가짜 장치(FakeInferDevice)로 하드웨어 없이 측정
+
+사용법 (AI/Hailo8 에서)
+    python bench/bench_inflight.py                                  # in-flight 1,2,4,8 비교
+    python bench/bench_inflight.py --latency 0.030 --interval 0.008 --in-flight 1 4
+    python bench/bench_inflight.py --check                          # 순서/처리량 검사 (실패 시 exit 1)
+
+- latency  : 프레임 하나 send → recv 까지 (Hailo8 + PCIe 왕복에 해당)
+- interval : 장치가 결과를 내는 최소 간격 (= 1 / 장치 최대 처리량)
+- 생산자는 --produce-ms 마다 프레임 제출 (0 = 가능한 빨리) → 전처리가 병목이 아닌 상황
+- 결과: 처리량(fps), 장치 사용률, 평균/최대 지연, 결과 순서 일치 여부
+  in-flight 1 ≈ 1/latency fps, in-flight ≥ latency/interval 이면 1/interval fps 에 근접해야 함
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "model"))
+
+from infer_backend import FakeInferDevice, InFlightScheduler  # noqa: E402
+
+
+def run_case(max_in_flight, latency, interval, frames, produce_ms):
+    """frames 장을 제출하고 결과를 모두 받을 때까지의 처리량 / 지연 / 순서 확인"""
+    device = FakeInferDevice(latency=latency, interval=interval,
+                             make_outputs=lambda frame: {"idx": frame})
+    received = []
+    with InFlightScheduler(device, max_in_flight) as sched:
+
+        def consume():
+            while len(received) < frames:
+                got = sched.get(timeout=1.0)
+                if got is None:
+                    break
+                meta, outputs = got
+                received.append((meta, int(outputs["idx"][0])))
+
+        th = threading.Thread(target=consume, daemon=True)
+        t0 = time.perf_counter()
+        th.start()
+        for i in range(frames):
+            sched.submit(np.array([i], dtype=np.int64), meta=i)
+            if produce_ms > 0:
+                time.sleep(produce_ms / 1000.0)
+        th.join()
+        elapsed = time.perf_counter() - t0
+        st = sched.stats()
+
+    in_order = [m for m, _ in received] == list(range(frames))
+    paired = all(m == idx for m, idx in received)
+    return {"in_flight": max_in_flight, "fps": round(len(received) / elapsed, 1),
+            "busy": st["busy"], "max_seen": st["max_in_flight"],
+            "avg_latency_ms": st["avg_latency_ms"], "max_latency_ms": st["max_latency_ms"],
+            "received": len(received), "in_order": in_order and paired}
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="in-flight 추론 스케줄러 벤치마크 (가짜 장치)")
+    p.add_argument("--latency", type=float, default=0.030, help="send → 결과 (초)")
+    p.add_argument("--interval", type=float, default=0.008, help="결과 사이 최소 간격 (초)")
+    p.add_argument("--frames", type=int, default=200)
+    p.add_argument("--produce-ms", type=float, default=0.0, help="제출 간격 (ms, 0 = 최대 속도)")
+    p.add_argument("--in-flight", type=int, nargs="+", default=[1, 2, 4, 8])
+    p.add_argument("--check", action="store_true",
+                   help="순서 어긋남 또는 in-flight 최대값이 이론 처리량의 80%% 미만이면 exit 1")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    print(f"🧪 in-flight bench | latency={args.latency * 1000:.1f}ms interval={args.interval * 1000:.1f}ms "
+          f"frames={args.frames}")
+    print(f"   이론 처리량: in-flight 1 → {1 / args.latency:.1f}fps, 포화 → {1 / args.interval:.1f}fps")
+
+    results = []
+    for n in args.in_flight:
+        r = run_case(n, args.latency, args.interval, args.frames, args.produce_ms)
+        results.append(r)
+        print(f"in-flight {n:<3d} {r['fps']:7.1f}fps  장치 사용 {r['busy'] * 100:5.1f}%  "
+              f"지연 avg {r['avg_latency_ms']:6.1f}ms max {r['max_latency_ms']:6.1f}ms  "
+              f"동시 최대 {r['max_seen']}  순서 {'OK' if r['in_order'] else 'FAIL'}")
+
+    if args.check:
+        failed = [f"in-flight {r['in_flight']}: 결과 순서/짝 불일치" for r in results if not r["in_order"]]
+        best = max(results, key=lambda r: r["in_flight"])
+        ideal = min(best["in_flight"] / args.latency, 1 / args.interval)
+        if args.produce_ms <= 0 and best["fps"] < 0.8 * ideal:
+            failed.append(f"in-flight {best['in_flight']}: {best['fps']}fps < 이론 {ideal:.1f}fps 의 80%")
+        if failed:
+            print("❌ 검사 실패:")
+            for line in failed:
+                print("   -", line)
+            sys.exit(1)
+        print("✅ 순서 유지 / 처리량 정상")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hailo 후처리(DFL decode + NMS) 벤치마크 — 가속기 없이 CPU 쪽만 측정
+
+사용법 (AI/Hailo8 에서)
+    python bench/bench_postprocess.py                       # 합성 헤드, 전체 시나리오
+    python bench/bench_postprocess.py --heads heads.npz     # hailo_video.py --dump-heads 로 저장한 실제 출력
+    python bench/bench_postprocess.py --check               # baseline 대비 회귀 검사 (실패 시 exit 1)
+    python bench/bench_postprocess.py --save-baseline       # 현재 결과를 baseline 으로 저장
+    python bench/bench_postprocess.py --decode-mode both    # sparse(threshold-first) vs dense 비교
+
+- 640x640 입력, stride 8/16/32 헤드 (80x80 / 40x40 / 20x20), reg 채널 4*16, cls 채널 1
+- 시나리오: 빈 프레임 / 객체 몇 개 / 객체 많음 / 배경 노이즈(임계값 근처 후보 다수 → NMS 부하)
+- 결과: 프레임당 decode / NMS / 전체 ms (중앙값, p95) + 검출 수
+- baseline 은 측정한 기기 기준. 라즈베리파이 5 에서는 --save-baseline 으로 다시 만들어 사용
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "model"))
+
+from postprocess import (  # noqa: E402
+    DECODE_MODES, _squeeze_hw, decode_head_dfl, nms_numpy,
+    resolve_decoder_layers_from_cfg, postprocess_all_scales,
+)
+
+DEFAULT_CONFIG   = os.path.join(HERE, "..", "model", "yolov8n_nms_config.json")
+DEFAULT_BASELINE = os.path.join(HERE, "baseline_postprocess.json")
+
+IMG_SIZE   = 640
+NUM_BINS   = 16
+THRESHOLDS = (0.25, 0.5, 0.7)
+
+# 이름, 객체 수, 배경 cls logit 평균/표준편차
+SCENARIOS = (
+    ("empty", 0,  -9.0, 1.0),
+    ("few",   3,  -9.0, 1.0),
+    ("many",  30, -9.0, 1.0),
+    ("noisy", 5,  -2.5, 1.5),
+)
+
+
+# ────────────────────────────────
+# 합성 헤드 출력
+# ────────────────────────────────
+def make_synthetic_frame(decoders, num_objects, bg_mean, bg_std, rng):
+    """
+    config 의 reg/cls 레이어 이름으로 (1,H,W,C) float32 출력 dict 생성
+    - 배경: cls logit ~ N(bg_mean, bg_std), reg logit ~ N(0, 2)
+    - 객체: 임의 스케일의 중심 셀 주변 3x3 에 높은 cls logit + 한 bin 에 몰린 DFL 분포
+    """
+    heads = {}
+    grids = []
+    for d in decoders:
+        hs = ws = IMG_SIZE // d["stride"]
+        reg = rng.normal(0.0, 2.0, (1, hs, ws, 4 * NUM_BINS)).astype(np.float32)
+        cls = rng.normal(bg_mean, bg_std, (1, hs, ws, 1)).astype(np.float32)
+        heads[d["reg_layer"]] = reg
+        heads[d["cls_layer"]] = cls
+        grids.append((reg, cls, hs, ws))
+
+    for _ in range(num_objects):
+        reg, cls, hs, ws = grids[rng.integers(len(grids))]
+        cy, cx = int(rng.integers(1, hs - 1)), int(rng.integers(1, ws - 1))
+        ltrb = rng.integers(1, NUM_BINS - 1, size=4)
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                cls[0, cy + dy, cx + dx, 0] = rng.uniform(0.5, 4.0) - 0.8 * (abs(dy) + abs(dx))
+                cell = np.full((4, NUM_BINS), -4.0, dtype=np.float32)
+                cell[np.arange(4), ltrb] = 6.0
+                reg[0, cy + dy, cx + dx, :] = cell.reshape(-1)
+    return heads
+
+
+def load_recorded_frames(path):
+    """hailo_video.py --dump-heads 결과 (키: '<frame>|<vstream 이름>')"""
+    data = np.load(path)
+    frames = {}
+    for key in data.files:
+        idx, name = key.split("|", 1)
+        frames.setdefault(int(idx), {})[name] = data[key]
+    return [frames[i] for i in sorted(frames)]
+
+
+# ────────────────────────────────
+# 측정
+# ────────────────────────────────
+def _stats(samples):
+    a = np.asarray(samples) * 1000.0
+    return round(float(np.median(a)), 4), round(float(np.percentile(a, 95)), 4)
+
+
+def measure(frames, decoders, score_thr, iou_thr, max_det, repeat, mode="sparse"):
+    """프레임 목록을 repeat 번 돌며 decode / NMS / 전체(postprocess_all_scales) 시간 측정"""
+    t_dec, t_nms, t_all = [], [], []
+    n_dets = n_cand = 0
+    for _ in range(repeat):
+        for heads in frames:
+            t0 = time.perf_counter()
+            boxes, scores = [], []
+            for d in decoders:
+                b, s = decode_head_dfl(_squeeze_hw(heads.get(d["reg_layer"])),
+                                       _squeeze_hw(heads.get(d["cls_layer"])),
+                                       stride=d["stride"], num_bins=NUM_BINS, score_thr=score_thr,
+                                       mode=mode)
+                if b.shape[0]:
+                    boxes.append(b)
+                    scores.append(s)
+            t1 = time.perf_counter()
+            if boxes:
+                nms_numpy(np.concatenate(boxes), np.concatenate(scores), iou_th=iou_thr, max_dets=max_det)
+            t2 = time.perf_counter()
+            dets = postprocess_all_scales(heads, decoders, NUM_BINS, score_thr, iou_thr, max_det,
+                                          decode_mode=mode)
+            t3 = time.perf_counter()
+            t_dec.append(t1 - t0)
+            t_nms.append(t2 - t1)
+            t_all.append(t3 - t2)
+            n_dets = int(dets.shape[0])
+            n_cand = int(sum(b.shape[0] for b in boxes))
+    dec, dec95 = _stats(t_dec)
+    nms, nms95 = _stats(t_nms)
+    post, post95 = _stats(t_all)
+    return {"decode_ms": dec, "decode_p95_ms": dec95, "nms_ms": nms, "nms_p95_ms": nms95,
+            "post_ms": post, "post_p95_ms": post95, "candidates": n_cand, "dets": n_dets}
+
+
+def run_all(args, decoders):
+    results = {}
+    if args.heads:
+        frames = load_recorded_frames(args.heads)
+        names = sorted({n for f in frames for n in f})
+        decoders = resolve_decoder_layers_from_cfg(decoders, names)
+        cases = [("recorded", frames)]
+    else:
+        cases = []
+        for name, n_obj, bg_mean, bg_std in SCENARIOS:
+            rng = np.random.default_rng(args.seed)
+            cases.append((name, [make_synthetic_frame(decoders, n_obj, bg_mean, bg_std, rng)
+                                 for _ in range(args.frames)]))
+
+    modes = DECODE_MODES if args.decode_mode == "both" else (args.decode_mode,)
+    for name, frames in cases:
+        for thr in args.thresholds:
+            for mode in modes:
+                # 기본 모드(sparse) 키는 mode 접미사 없이 → baseline 키 호환
+                key = f"{name}@{thr}" if mode == "sparse" else f"{name}@{thr}/{mode}"
+                results[key] = measure(frames, decoders, thr, args.iou_thr, args.max_det,
+                                       args.repeat, mode=mode)
+                r = results[key]
+                print(f"{key:<20} decode {r['decode_ms']:8.3f}ms  nms {r['nms_ms']:8.3f}ms  "
+                      f"post {r['post_ms']:8.3f}ms (p95 {r['post_p95_ms']:8.3f})  "
+                      f"cand {r['candidates']:5d}  dets {r['dets']:3d}")
+            dense = results.get(f"{name}@{thr}/dense")
+            if dense is not None:
+                sparse = results[f"{name}@{thr}"]
+                print(f"{'':<20} → sparse 가 {dense['decode_ms'] / max(sparse['decode_ms'], 1e-6):.1f}x 빠름 (decode)")
+    return results
+
+
+# ────────────────────────────────
+# baseline / 회귀 검사
+# ────────────────────────────────
+def _platform_tag():
+    return f"{platform.machine()}-{platform.system()}-py{platform.python_version()}-np{np.__version__}"
+
+
+def check_regression(results, baseline):
+    """
+    post_ms 가 baseline * (1 + tolerance) + slack_ms 를 넘거나 검출 수가 달라지면 실패
+    검출 수 비교는 최적화가 결과를 바꾸지 않았는지 확인하는 용도
+    """
+    tol   = float(baseline.get("tolerance", 0.3))
+    slack = float(baseline.get("slack_ms", 0.2))
+    if baseline.get("platform") != _platform_tag():
+        print(f"⚠️ baseline 기기({baseline.get('platform')})와 현재({_platform_tag()})가 다름 — 시간 비교는 참고용")
+    failed = []
+    for key, base in baseline.get("results", {}).items():
+        cur = results.get(key)
+        if cur is None:
+            continue
+        limit = base["post_ms"] * (1.0 + tol) + slack
+        if cur["post_ms"] > limit:
+            failed.append(f"{key}: post {cur['post_ms']:.3f}ms > 한도 {limit:.3f}ms")
+        if cur["dets"] != base["dets"]:
+            failed.append(f"{key}: dets {cur['dets']} != baseline {base['dets']}")
+    return failed
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Hailo 후처리 벤치마크")
+    p.add_argument("--config-path", default=DEFAULT_CONFIG, help="yolov8n_nms_config.json")
+    p.add_argument("--heads", default=None, help="hailo_video.py --dump-heads 로 저장한 .npz")
+    p.add_argument("--frames", type=int, default=10, help="시나리오당 합성 프레임 수")
+    p.add_argument("--repeat", type=int, default=5, help="프레임 목록 반복 횟수")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--decode-mode", choices=DECODE_MODES + ("both",), default="sparse")
+    p.add_argument("--thresholds", type=float, nargs="+", default=list(THRESHOLDS))
+    p.add_argument("--iou-thr", type=float, default=0.5)
+    p.add_argument("--max-det", type=int, default=100)
+    p.add_argument("--baseline", default=DEFAULT_BASELINE)
+    p.add_argument("--save-baseline", action="store_true")
+    p.add_argument("--check", action="store_true", help="baseline 대비 회귀 시 exit 1")
+    p.add_argument("--json", default=None, help="결과 JSON 저장 경로")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    with open(args.config_path, "r") as f:
+        decoders = json.load(f)["bbox_decoders"]
+
+    print(f"🧪 postprocess bench | {_platform_tag()} | frames={args.frames} repeat={args.repeat}")
+    results = run_all(args, decoders)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"platform": _platform_tag(), "tolerance": 0.3, "slack_ms": 0.2,
+                       "results": results}, f, indent=2)
+        print(f"💾 baseline 저장 → {args.baseline}")
+
+    if args.check:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        failed = check_regression(results, baseline)
+        if failed:
+            print("❌ 회귀 감지:")
+            for line in failed:
+                print("   -", line)
+            sys.exit(1)
+        print("✅ baseline 대비 회귀 없음")
+
+
+if __name__ == "__main__":
+    main()
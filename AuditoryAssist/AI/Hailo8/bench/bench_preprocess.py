@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hailo 입력 전처리 벤치마크 — 기존 preprocess_for_hailo vs 버퍼 재사용 Preprocessor
+
+사용법 (AI/Hailo8 에서)
+    python bench/bench_preprocess.py                         # 640x480 / 1280x720 / 640x640 / 480x640
+    python bench/bench_preprocess.py --sizes 1920x1080 --frames 100
+    python bench/bench_preprocess.py --check                 # 결과 불일치 또는 Preprocessor 할당 발생 시 exit 1
+
+- 결과: 프레임당 시간 (중앙값), 할당 peak / 새 프레임 버퍼 수 (tracemalloc), 기존 구현과 픽셀 일치 여부
+- 할당은 워밍업(해상도별 버퍼 생성) 이후 구간만 측정
+  numpy / OpenCV 가 만든 배열은 tracemalloc 에 잡힘 → Hailo 입력까지 새 배열이 생기면 바이트로 드러남
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "model"))
+
+from preprocess import Preprocessor, preprocess_for_hailo  # noqa: E402
+
+DEFAULT_SIZES = ("640x480", "1280x720", "640x640", "480x640")
+
+
+def _frames(w, h, n, seed):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, (h, w, 3), dtype=np.uint8) for _ in range(n)]
+
+
+def _to_input(img):
+    """Hailo 입력 형태 (C 연속 uint8) 로 맞춤. Preprocessor 결과는 이미 그 형태라 복사 없음
+    (hailo_video.py infer 스테이지는 변환 없이 그대로 send)"""
+    return np.ascontiguousarray(img, dtype=np.uint8)
+
+
+def measure(fn, frames, net, repeat):
+    """
+    fn(frame, net, net) → (img, ...). 워밍업 1회 후 프레임당
+    - ms     : 처리 시간 중앙값
+    - peak   : tracemalloc peak (처리 중 잠깐 살았다 사라지는 임시 배열 포함)
+    - blocks : 호출 뒤에도 남아 있는 새 프레임 크기 배열 수 (반환 배열을 매번 새로 만드는지)
+    """
+    _to_input(fn(frames[0], net, net)[0])
+
+    times, peaks, blocks = [], [], []
+    for _ in range(repeat):
+        for f in frames:
+            t0 = time.perf_counter()
+            _to_input(fn(f, net, net)[0])
+            times.append(time.perf_counter() - t0)
+
+            # 큰 블록 수는 peak 로는 안 보이므로 1 프레임씩 스냅샷 비교 (반환 배열은 살아 있음)
+            tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+            base = tracemalloc.get_traced_memory()[0]
+            out = _to_input(fn(f, net, net)[0])
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+            after = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            # 할당 위치(traceback)별로 64KB 이상 늘어난 곳 = 이번 호출에서 새로 만든 프레임 크기 배열
+            # (배열 헤더와 데이터가 같은 위치로 묶임). 이미 해제된 임시 배열은 peak 로 확인
+            new = sum(1 for s in after.compare_to(before, "traceback") if s.size_diff >= 65536)
+            blocks.append(new)
+            del out
+
+    return {"ms": round(float(np.median(times)) * 1000.0, 3),
+            "peak_kb": round(float(np.median(peaks)) / 1024.0, 1),
+            "live_blocks": round(float(np.mean(blocks)), 2)}
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Hailo 입력 전처리 벤치마크")
+    p.add_argument("--sizes", nargs="+", default=list(DEFAULT_SIZES), help="원본 해상도 WxH")
+    p.add_argument("--net", type=int, default=640)
+    p.add_argument("--frames", type=int, default=20)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--check", action="store_true")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    print(f"🧪 preprocess bench | net={args.net} frames={args.frames} repeat={args.repeat}")
+    failed = []
+    for size in args.sizes:
+        w, h = map(int, size.lower().split("x"))
+        frames = _frames(w, h, args.frames, args.seed)
+        pre = Preprocessor(args.net, args.net)
+
+        # 기존 구현과 결과 비교 (이미지 + scale/left/top)
+        same = True
+        for f in frames[:3]:
+            a = preprocess_for_hailo(f, args.net, args.net)
+            b = pre(f)
+            same &= bool(np.array_equal(a[0], b[0])) and a[1:] == b[1:]
+            same &= bool(b[0].flags["C_CONTIGUOUS"]) and _to_input(b[0]) is b[0]
+            pre.release(b[0])
+
+        def buffered(f, nh, nw):
+            # 장치가 바로 읽었다고 보고 즉시 반환 (hailo_video.py 는 결과 수신 시 반환)
+            out = pre(f)
+            pre.release(out[0])
+            return out
+
+        rows = {
+            "legacy": measure(preprocess_for_hailo, frames, args.net, args.repeat),
+            "buffered": measure(buffered, frames, args.net, args.repeat),
+        }
+        for name, r in rows.items():
+            print(f"{size:<10} {name:<9} {r['ms']:7.3f}ms  할당 peak {r['peak_kb']:8.1f}KB/frame  "
+                  f"새 프레임 버퍼 {r['live_blocks']:4.2f}/frame  일치 {'OK' if same else 'FAIL'}")
+
+        if args.check:
+            if not same:
+                failed.append(f"{size}: 기존 구현과 결과 다름 / 입력 버퍼가 C 연속이 아님")
+            if rows["buffered"]["peak_kb"] > 4 or rows["buffered"]["live_blocks"] > 0 or pre.grown:
+                failed.append(f"{size}: Preprocessor 프레임당 할당 {rows['buffered']['peak_kb']}KB")
+
+    if args.check:
+        if failed:
+            print("❌ 검사 실패:")
+            for line in failed:
+                print("   -", line)
+            sys.exit(1)
+        print("✅ 결과 일치 / 프레임당 버퍼 할당 없음")
+
+
+if __name__ == "__main__":
+    main()
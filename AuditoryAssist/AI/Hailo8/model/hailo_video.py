@@ -15,10 +15,20 @@ import signal
 import numpy as np
 import paho.mqtt.client as mqtt
 import cv2
-from flask import Flask, Response  # 🔥 MJPEG 스트리밍용
+from flask import Flask, Response, request  # 🔥 MJPEG 스트리밍용
+
+# AI/common (MJPEG 스트리머, YOLOv8n/model/pt_video.py 와 공용)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "common"))
+
+from postprocess import resolve_decoder_layers_from_cfg, postprocess_all_scales
+from preprocess import Preprocessor
+from pipeline import Pipeline
+from tracing import Tracer, NULL_TRACER
+from mjpeg_stream import MJPEGStreamer, MJPEG_MIMETYPE
+from infer_backend import open_backend, load_hef_profile
 
 from hailo_platform import (
-    VDevice, HEF, InferVStreams,
+    VDevice, HEF,
     InputVStreamParams, OutputVStreamParams,
     HailoStreamInterface, ConfigureParams,
 )
@@ -42,36 +52,36 @@ def _setup_signal_handlers():
 # MJPEG 스트리밍
 # ────────────────────────────────
 app = Flask(__name__)
-latest_jpeg = None  # 가장 최근 프레임을 JPEG로 저장해둔다 (바이트)
+# 새 프레임마다 한 번만 인코딩 → 접속한 클라이언트가 공유 (클라이언트 없으면 인코딩 안 함)
+streamer = MJPEGStreamer(quality=95, max_fps=30, stop_event=stop_event)
 
-def mjpeg_generator():
+@app.route("/trace")
+def trace_snapshot():
     """
-    최신 프레임을 multipart/x-mixed-replace 형태로 계속 내보내는 제너레이터
+    http://<host>:<port>/trace → 단계별 p50/p95/p99 + 카운터 (JSON)
     """
-    global latest_jpeg
-    boundary = b"--frame\r\n"
-    while not stop_event.is_set():
-        if latest_jpeg is not None:
-            yield (
-                boundary +
-                b"Content-Type: image/jpeg\r\n\r\n" +
-                latest_jpeg +
-                b"\r\n"
-            )
-        else:
-            time.sleep(0.05)
+    return Response(json.dumps(tracer.snapshot(), ensure_ascii=False),
+                    mimetype="application/json")
 
 @app.route("/video")
 def video_feed():
     """
     브라우저에서 http://<host>:<port>/video 로 접속하면
-    M-JPEG 스트림을 볼 수 있음
+    M-JPEG 스트림을 볼 수 있음 (/video?fps=5 → 클라이언트별 최대 FPS)
     """
     return Response(
-        mjpeg_generator(),
-        mimetype="multipart/x-mixed-replace; boundary=frame"
+        streamer.client_stream(max_fps=request.args.get("fps", type=float), name=request.remote_addr,
+                               sock=request.environ.get("werkzeug.socket")),
+        mimetype=MJPEG_MIMETYPE
     )
 
+@app.route("/video/stats")
+def video_stats():
+    """
+    접속 클라이언트 수, 전송 bytes/sec, 인코딩 fps (JSON)
+    """
+    return Response(json.dumps(streamer.stats(), ensure_ascii=False), mimetype="application/json")
+
 def start_mjpeg_server(host="0.0.0.0", port=5055):
     """
     Flask 앱을 백그라운드 스레드로 띄워서 /video 스트림 제공
@@ -107,6 +117,15 @@ MQTT_CONFIG = {
 last_sent = {"fire": 0, "smoke": 0}
 COOLDOWN = 20  # 초 단위로 알림 쿨다운
 
+# 성능 추적 보고 (--stats-every 주기 + 요청 토픽에 아무 메시지나 보내면 즉시)
+TRACE_TOPIC = "ai/trace/hailo"
+TRACE_REQUEST_TOPIC = "ai/trace/request"
+TRACE_LABELS = {
+    "capture": "캡처", "preprocess": "전처리", "hailo": "Hailo", "post": "후처리",
+    "draw": "표시/전송", "latency": "지연", "frame": "프레임간격",
+}
+tracer = NULL_TRACER  # main 에서 --no-trace 가 아니면 Tracer 로 교체
+
 
 # ────────────────────────────────
 # MQTT 유틸
@@ -201,7 +220,8 @@ def send_detection_mqtt(client, cls_name):
 
     now = time.time()
     if now - last_sent.get(cls_name, 0) < COOLDOWN:
-        print(f"⏳ {cls_name} MQTT 쿨다운 중, 전송 생략")
+        # 쿨다운 중 생략은 매 프레임 발생 → print 대신 카운터
+        tracer.count(f"cooldown_{cls_name}")
         return client
 
     cfg = MQTT_CONFIG.get(cls_name)
@@ -218,6 +238,24 @@ def send_detection_mqtt(client, cls_name):
     return client
 
 
+def publish_trace(client):
+    """추적 스냅샷을 TRACE_TOPIC 으로 publish"""
+    if client is None or not tracer.enabled:
+        return
+    try:
+        client.publish(TRACE_TOPIC, json.dumps(tracer.snapshot(), ensure_ascii=False), qos=0)
+    except Exception as e:
+        print("⚠️ 추적 MQTT 전송 실패:", e)
+
+
+def enable_trace_requests(client):
+    """TRACE_REQUEST_TOPIC 수신 시 바로 스냅샷 전송 (요청 시 보고)"""
+    if client is None or not tracer.enabled:
+        return
+    client.message_callback_add(TRACE_REQUEST_TOPIC, lambda c, u, msg: publish_trace(c))
+    client.subscribe(TRACE_REQUEST_TOPIC, qos=0)
+
+
 # ────────────────────────────────
 # 카메라 열기
 # ────────────────────────────────
@@ -273,50 +311,8 @@ def open_capture(args):
 
 
 # ────────────────────────────────
-# 전처리 (모델 입력 만들기) + 복원 매핑 계산
+# 복원 매핑 (모델 좌표 → 원본 좌표, 전처리는 preprocess.py)
 # ────────────────────────────────
-def preprocess_for_hailo(frame_bgr, net_h=640, net_w=640):
-    """
-    net_h x net_w RGB uint8 준비:
-    - BGR -> RGB
-    - 짧은 변을 맞춰 리사이즈
-    - 중앙 크롭
-    - uint8 유지
-    """
-    h0, w0 = frame_bgr.shape[:2]
-
-    # BGR -> RGB
-    rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
-
-    # 스케일 결정 (짧은 변을 net에 맞춘다)
-    if h0 < w0:
-        scale = net_h / float(h0)
-        new_h, new_w = net_h, int(round(w0 * scale))
-    else:
-        scale = net_w / float(w0)
-        new_w, new_h = net_w, int(round(h0 * scale))
-
-    resized = cv2.resize(rgb, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
-
-    # 중앙 크롭
-    left = max(0, (new_w - net_w) // 2)
-    top = max(0, (new_h - net_h) // 2)
-    right = left + net_w
-    bottom = top + net_h
-    crop = resized[top:bottom, left:right, :]
-
-    # 크롭된 게 부족하면 패딩
-    if crop.shape[0] != net_h or crop.shape[1] != net_w:
-        canvas = np.zeros((net_h, net_w, 3), dtype=np.uint8)
-        y_off = (net_h - crop.shape[0]) // 2
-        x_off = (net_w - crop.shape[1]) // 2
-        canvas[y_off:y_off+crop.shape[0], x_off:x_off+crop.shape[1], :] = crop
-        crop = canvas
-
-    crop = np.ascontiguousarray(crop.astype(np.uint8))
-    return crop, scale, left, top
-
-
 def map_box_back_to_original(x1, y1, x2, y2, scale, left, top, orig_w, orig_h):
     """
     모델 좌표(640x640 crop 기준) 박스를 원본 frame 좌표로 되돌린다.
@@ -335,217 +331,15 @@ def map_box_back_to_original(x1, y1, x2, y2, scale, left, top, orig_w, orig_h):
     return int(x1o), int(y1o), int(x2o), int(y2o)
 
 
-# ────────────────────────────────
-# 후처리: DFL decode + NMS
-# ────────────────────────────────
-def _sigmoid(x):
-    return 1.0 / (1.0 + np.exp(-x))
-
-def _softmax(x, axis=-1):
-    x = x - np.max(x, axis=axis, keepdims=True)
-    e = np.exp(x)
-    return e / np.sum(e, axis=axis, keepdims=True)
-
-def _squeeze_hw(arr):
-    """
-    InferVStreams 결과 (1,H,W,C) → (H,W,C) 로 batch 차원 제거
-    """
-    if arr is None:
-        return None
-    a = np.asarray(arr)
-    while a.ndim > 3 and a.shape[0] == 1:
-        a = a[0]
-    return a
-
-def decode_head_dfl(reg_map, cls_map, stride, num_bins=16, score_thr=0.5):
-    """
-    DFL 기반 회귀 결과를 bbox로 복원
-    """
-    if reg_map is None or cls_map is None:
-        return (np.zeros((0, 4), dtype=np.float32),
-                np.zeros((0,), dtype=np.float32))
-
-    Hs, Ws, C = reg_map.shape
-    expected_c = 4 * num_bins
-    if C != expected_c:
-        print(f"⚠️ 예기치 않은 reg_map 채널수 {C}, 기대 {expected_c}")
-        return (np.zeros((0, 4), dtype=np.float32),
-                np.zeros((0,), dtype=np.float32))
-
-    # class score (sigmoid)
-    cls_score = _sigmoid(cls_map[..., 0])  # (Hs,Ws)
-
-    # DFL 분포 -> 기대값
-    reg4 = reg_map.reshape(Hs, Ws, 4, num_bins)
-    prob = _softmax(reg4, axis=3)  # (Hs,Ws,4,num_bins)
-    bins = np.arange(num_bins, dtype=np.float32)
-    dist = np.sum(prob * bins[None, None, None, :], axis=3)  # (Hs,Ws,4)
-
-    l = dist[..., 0]
-    t = dist[..., 1]
-    r = dist[..., 2]
-    b = dist[..., 3]
-
-    # grid 좌표 (셀 센터 → stride 반영)
-    gy, gx = np.meshgrid(
-        np.arange(Hs, dtype=np.float32),
-        np.arange(Ws, dtype=np.float32),
-        indexing='ij'
-    )
-    cx = (gx + 0.5) * stride
-    cy = (gy + 0.5) * stride
-
-    # box 복원 xyxy
-    x1 = cx - l * stride
-    y1 = cy - t * stride
-    x2 = cx + r * stride
-    y2 = cy + b * stride
-
-    # flatten
-    x1 = x1.reshape(-1)
-    y1 = y1.reshape(-1)
-    x2 = x2.reshape(-1)
-    y2 = y2.reshape(-1)
-    sc = cls_score.reshape(-1)
-
-    # confidence 필터
-    keep = sc >= float(score_thr)
-    if not np.any(keep):
-        return (np.zeros((0, 4), dtype=np.float32),
-                np.zeros((0,), dtype=np.float32))
-
-    boxes = np.stack([x1[keep], y1[keep], x2[keep], y2[keep]], axis=1).astype(np.float32)
-    scores = sc[keep].astype(np.float32)
-    return boxes, scores
-
-def nms_numpy(boxes, scores, iou_th=0.5, max_dets=100):
-    """
-    간단한 greedy NMS.
-    """
-    if boxes.shape[0] == 0:
-        return []
-
-    x1 = boxes[:, 0]
-    y1 = boxes[:, 1]
-    x2 = boxes[:, 2]
-    y2 = boxes[:, 3]
-
-    areas = (x2 - x1) * (y2 - y1)
-    order = np.argsort(-scores)  # high -> low
-
-    keep = []
-    while order.size > 0:
-        i = order[0]
-        keep.append(i)
-        if len(keep) >= max_dets:
-            break
-
-        xx1 = np.maximum(x1[i], x1[order[1:]])
-        yy1 = np.maximum(y1[i], y1[order[1:]])
-        xx2 = np.minimum(x2[i], x2[order[1:]])
-        yy2 = np.minimum(y2[i], y2[order[1:]])
-
-        w = np.maximum(0.0, xx2 - xx1)
-        h = np.maximum(0.0, yy2 - yy1)
-        inter = w * h
-        iou = inter / (areas[i] + areas[order[1:]] - inter + 1e-6)
-
-        inds = np.where(iou <= iou_th)[0]
-        order = order[inds + 1]
-
-    return keep
-
-def resolve_decoder_layers_from_cfg(decoders_cfg, out_vstream_names):
-    """
-    cfg에 적힌 헤드 레이어 이름(prefix 다를 수 있음)을
-    실제 HEF 출력 vstream 이름으로 suffix 기준 매핑
-    """
-    suffix_map = {}
-    for full in out_vstream_names:
-        suf = full.split("/")[-1]
-        suffix_map[suf] = full
-
-    resolved = []
-    for d in decoders_cfg:
-        stride = d["stride"]
-        reg_suffix = d["reg_layer"].split("/")[-1]
-        cls_suffix = d["cls_layer"].split("/")[-1]
-
-        reg_full = suffix_map.get(reg_suffix, d["reg_layer"])
-        cls_full = suffix_map.get(cls_suffix, d["cls_layer"])
-
-        resolved.append({
-            "stride": stride,
-            "reg_layer": reg_full,
-            "cls_layer": cls_full
-        })
-    return resolved
-
-def postprocess_all_scales(results_dict,
-                           decoders_resolved,
-                           num_bins,
-                           score_thr,
-                           iou_th,
-                           max_det):
-    """
-    여러 스케일 헤드들에서 나온 bbox 후보들을 합치고 NMS 적용
-    return dets (N,6): [x1,y1,x2,y2,score,cls_id]
-    """
-    all_boxes = []
-    all_scores = []
-
-    for d in decoders_resolved:
-        stride = d["stride"]
-        reg_name = d["reg_layer"]
-        cls_name = d["cls_layer"]
-
-        reg_map = _squeeze_hw(results_dict.get(reg_name))
-        cls_map = _squeeze_hw(results_dict.get(cls_name))
-
-        boxes, scores = decode_head_dfl(
-            reg_map,
-            cls_map,
-            stride=stride,
-            num_bins=num_bins,
-            score_thr=score_thr
-        )
-
-        if boxes.shape[0] > 0:
-            all_boxes.append(boxes)
-            all_scores.append(scores)
-
-    if not all_boxes:
-        return np.zeros((0, 6), dtype=np.float32)
-
-    all_boxes = np.concatenate(all_boxes, axis=0)
-    all_scores = np.concatenate(all_scores, axis=0)
-
-    keep_idx = nms_numpy(all_boxes, all_scores, iou_th=iou_th, max_dets=max_det)
-    if not keep_idx:
-        return np.zeros((0, 6), dtype=np.float32)
-
-    final_boxes = all_boxes[keep_idx]
-    final_scores = all_scores[keep_idx]
-
-    # 단일 클래스 가정 → cls_id = 0
-    cls_col = np.zeros((final_boxes.shape[0], 1), dtype=np.float32)
-
-    dets = np.concatenate(
-        [
-            final_boxes.astype(np.float32),
-            final_scores.reshape(-1, 1).astype(np.float32),
-            cls_col
-        ],
-        axis=1
-    )
-    return dets
-
-
 # ────────────────────────────────
 # 메인 루프
 # ────────────────────────────────
 def main(args):
-    global latest_jpeg
+    global tracer
+
+    # 단계별 소요시간 추적 (끄면 NullTracer → 기록 코드 자체를 건너뜀)
+    if not args.no_trace:
+        tracer = Tracer(window=args.trace_window, labels=TRACE_LABELS)
 
     # 라벨 로딩 (labels.json → {"labels": ["fire","smoke", ...]})
     labels = None
@@ -570,8 +364,12 @@ def main(args):
     iou_thr = args.iou_thr if args.iou_thr is not None else cfg_iou_thr
     max_det = args.max_det if args.max_det is not None else cfg_max_det
 
+    streamer.max_fps = args.stream_fps
+    streamer.quality = args.jpg_quality
+
     # MQTT 스타트
     mqtt_client = try_connect()
+    enable_trace_requests(mqtt_client)
     temp_thread = threading.Thread(target=cpu_temp_publisher, daemon=True)
     temp_thread.start()
 
@@ -583,6 +381,15 @@ def main(args):
             hef,
             interface=HailoStreamInterface.PCIe
         )
+
+        # 배치 크기: --batch-size > HEF 옆 profile.json (step/compile.py) > 1
+        batch_size = args.batch_size or int(load_hef_profile(args.hef_path).get("batch_size", 1))
+        if batch_size > 1:
+            for params in cfg_params.values():
+                params.batch_size = batch_size
+        # 배치를 채우려면 in-flight 가 배치 크기 이상이어야 함
+        max_in_flight = max(args.in_flight, batch_size)
+        print(f"🚀 추론 모드={args.infer_mode}, batch_size={batch_size}, in-flight 최대={max_in_flight}")
         ng_list = device.configure(hef, cfg_params)
         network_group = ng_list[0] if isinstance(ng_list, (list, tuple)) else ng_list
 
@@ -617,7 +424,8 @@ def main(args):
         ng_params = network_group.create_params()
 
         with network_group.activate(ng_params):
-            with InferVStreams(network_group, in_params, out_params) as infer_pipeline:
+            with open_backend(args.infer_mode, network_group, in_params, out_params,
+                              in_info.name, max_in_flight) as backend:
                 in_name = in_info.name
                 print(f"🔎 사용 중인 입력 vstream 이름: {in_name}")
                 print("🔎 디코더 after resolve:")
@@ -642,17 +450,29 @@ def main(args):
                     print("📸 실시간 추론 시작 (헤드리스 모드)")
 
                 printed_probe = False
-
-                while not stop_event.is_set():
-                    loop_start = time.time()
-
-                    # 1) 프레임 캡처
+                printed_input = False
+
+                # 헤드 출력 덤프 (bench/bench_postprocess.py --heads 입력용)
+                dumped = {}
+                dump_count = 0
+                last_post_end = time.time()
+
+                # ── 파이프라인 스테이지 ──────────────────────────
+                # capture → preprocess → infer(send) ⇢ collect(recv) → post(후처리/그리기/MQTT/인코딩)
+                # 스테이지 사이는 최신 프레임 1장만 유지 → Hailo 추론 중에 다음 프레임 전처리,
+                # 이전 프레임 NMS/JPEG 인코딩이 동시에 진행됨
+                # infer 는 결과를 기다리지 않고 보내기만 함 → 장치 안에 최대 max_in_flight 프레임
+
+                # 1) 프레임 캡처
+                def capture_stage(_):
+                    nonlocal printed_probe
                     t0 = time.time()
                     ret, frame_bgr = cap.read()
                     t1 = time.time()
                     if not ret or frame_bgr is None:
                         print("❗ 프레임 읽기 실패")
-                        break
+                        _request_shutdown("frame read failed")
+                        return None
 
                     if not printed_probe:
                         try:
@@ -661,47 +481,88 @@ def main(args):
                             print(f"[PROBE] ret={ret}, frame=None")
                         printed_probe = True
 
-                    orig_h, orig_w = frame_bgr.shape[:2]
-
-                    # 2) 전처리 → RGB uint8 (net_h x net_w)
-                    t2_prep_start = time.time()
-                    img_rgb_crop, scale, left, top = preprocess_for_hailo(
-                        frame_bgr,
-                        net_h=net_h,
-                        net_w=net_w
-                    )
-                    t2 = time.time()
-
-                    # 3) Hailo 추론
-                    t3_infer_start = time.time()
+                    return {"frame": frame_bgr, "t0": t0, "t1": t1}
 
-                    # Hailo는 (배치, H, W, C) = (1,640,640,3) uint8, NHWC를 기대
-                    hailo_input = np.expand_dims(img_rgb_crop, axis=0).astype(np.uint8, copy=False)
-                    hailo_input = np.ascontiguousarray(hailo_input)
+                # 2) 전처리 → RGB uint8 (net_h x net_w), 해상도별로 미리 잡아 둔 버퍼에 기록
+                # 버퍼는 결과 수신(collect) 또는 슬롯에서 버려질 때 반환 → send 가 입력을 복사하지 않고
+                # 장치가 나중에 읽어도 그 사이에 덮어쓰지 않음
+                # 버퍼 수 = 장치 안 max_in_flight + 전처리 중 1 + 슬롯 1 + infer 스테이지 1
+                preprocessor = Preprocessor(net_h=net_h, net_w=net_w, pool=max_in_flight + 3)
 
-                    # 디버그
-                    print("[DEBUG] hailo_input shape:", hailo_input.shape)
-                    print("[DEBUG] hailo_input dtype:", hailo_input.dtype)
-                    print("[DEBUG] hailo_input nbytes:", hailo_input.nbytes)
-                    print("[DEBUG] hailo_input C_CONTIGUOUS?:", hailo_input.flags['C_CONTIGUOUS'])
+                def release_input(item):
+                    img = item.pop("img", None)
+                    if img is not None:
+                        preprocessor.release(img)
 
-                    # 실제 추론
-                    results = infer_pipeline.infer({in_name: hailo_input})
+                def preprocess_stage(item):
+                    t2_prep_start = time.time()
+                    img_rgb_crop, scale, left, top = preprocessor(item["frame"])
+                    item.update(img=img_rgb_crop, scale=scale, left=left, top=top,
+                                t2_prep_start=t2_prep_start, t2=time.time())
+                    return item
+
+                # 3) Hailo 추론 요청 (in-flight 자리가 날 때까지만 대기)
+                def infer_stage(item):
+                    nonlocal printed_input
+                    item["t3_infer_start"] = time.time()
+
+                    # 프레임 1장 (H, W, C) uint8 NHWC. blocking 모드는 백엔드에서 배치 차원 추가 (view)
+                    # Preprocessor 버퍼는 이미 C 연속 uint8 → 변환 없이 그대로 전달
+                    hailo_input = item["img"]
+
+                    # 디버그 (첫 프레임만)
+                    if not printed_input:
+                        print(f"[DEBUG] hailo_input shape={hailo_input.shape}, dtype={hailo_input.dtype}, "
+                              f"nbytes={hailo_input.nbytes}, C_CONTIGUOUS={hailo_input.flags['C_CONTIGUOUS']}")
+                        printed_input = True
+
+                    while not backend.submit(hailo_input, item, timeout=0.1):
+                        if stop_event.is_set():
+                            release_input(item)
+                            return None
+                    return None
+
+                # 3-1) Hailo 추론 결과 수신 (보낸 순서대로)
+                def collect_stage(_):
+                    nonlocal dump_count
+                    got = backend.get(timeout=0.1)
+                    if got is None:
+                        return None
+                    item, results = got
                     t3 = time.time()
+                    release_input(item)     # 결과가 나왔으면 장치는 입력을 다 읽음
+
+                    if args.dump_heads and dump_count < args.dump_frames:
+                        for name, arr in results.items():
+                            dumped[f"{dump_count}|{name}"] = np.array(arr, copy=True)
+                        dump_count += 1
+                        if dump_count == args.dump_frames:
+                            np.savez_compressed(args.dump_heads, **dumped)
+                            dumped.clear()
+                            print(f"💾 헤드 출력 {dump_count}프레임 저장 → {args.dump_heads}")
+
+                    item.update(results=results, t3=t3)
+                    return item
+
+                # 4) 후처리 (DFL decode + NMS) + 5) 박스 그리기 & MQTT & 인코딩
+                def post_stage(item):
+                    nonlocal mqtt_client, last_post_end
+                    frame_bgr = item["frame"]
+                    orig_h, orig_w = frame_bgr.shape[:2]
+                    scale, left, top = item["scale"], item["left"], item["top"]
 
-                    # 4) 후처리 (DFL decode + NMS)
                     t4_post_start = time.time()
                     det = postprocess_all_scales(
-                        results_dict=results,
+                        results_dict=item["results"],
                         decoders_resolved=decoders_resolved,
                         num_bins=cfg_num_bins,
                         score_thr=score_thr,
                         iou_th=iou_thr,
-                        max_det=max_det
+                        max_det=max_det,
+                        decode_mode=args.decode_mode
                     )
                     t4 = time.time()
 
-                    # 5) 박스 그리기 & MQTT
                     t5_draw_start = time.time()
                     if det is not None and det.size > 0:
                         # det: [x1,y1,x2,y2,score,cls_id] 모델 좌표(640x640 crop)
@@ -725,12 +586,15 @@ def main(args):
                             else:
                                 label_str = f"id:{int(cls_id)}"
 
-                            # 디버그 출력
-                            print(
-                                f"[BOX] {label_str} conf={conf:.2f} "
-                                f"box=({x1_draw},{y1_draw})-({x2_draw},{y2_draw}) "
-                                f"frame_size={orig_w}x{orig_h}"
-                            )
+                            # 디버그 출력 (--debug-boxes), 평소에는 라벨별 검출 수만 집계
+                            if args.debug_boxes:
+                                print(
+                                    f"[BOX] {label_str} conf={conf:.2f} "
+                                    f"box=({x1_draw},{y1_draw})-({x2_draw},{y2_draw}) "
+                                    f"frame_size={orig_w}x{orig_h}"
+                                )
+                            if tracer.enabled:
+                                tracer.count(f"det_{label_str}")
 
                             cv2.rectangle(
                                 frame_bgr,
@@ -759,9 +623,11 @@ def main(args):
                             if low_label in ("fire", "smoke"):
                                 mqtt_client = send_detection_mqtt(mqtt_client, low_label)
 
-                    # FPS 표시
+                    # FPS 표시 (파이프라인 출력 간격 기준)
                     loop_end_now = time.time()
-                    fps_display = 1.0 / max(1e-6, (loop_end_now - loop_start))
+                    frame_interval = loop_end_now - last_post_end
+                    fps_display = 1.0 / max(1e-6, frame_interval)
+                    last_post_end = loop_end_now
                     cv2.putText(
                         frame_bgr,
                         f"FPS: {fps_display:.2f}",
@@ -772,10 +638,8 @@ def main(args):
                         2
                     )
 
-                    # 🔥 MJPEG용 최신 프레임 업데이트
-                    ok, jpeg_buf = cv2.imencode(".jpg", frame_bgr)
-                    if ok:
-                        latest_jpeg = jpeg_buf.tobytes()
+                    # 🔥 MJPEG용 최신 프레임 전달 (보는 클라이언트가 있을 때만 인코딩)
+                    streamer.publish(frame_bgr)
 
                     # 로컬 미리보기 창 (원하면만)
                     if args.window:
@@ -785,17 +649,38 @@ def main(args):
 
                     t5 = time.time()
 
-                    # 6) 타이밍 디버그
-                    print(
-                        "⏱ 성능측정 | "
-                        f"캡처 {(t1 - t0)*1000:.1f}ms | "
-                        f"전처리 {(t2 - t2_prep_start)*1000:.1f}ms | "
-                        f"Hailo {(t3 - t3_infer_start)*1000:.1f}ms | "
-                        f"후처리 {(t4 - t4_post_start)*1000:.1f}ms | "
-                        f"표시/전송 {(t5 - t5_draw_start)*1000:.1f}ms | "
-                        f"전체 {(t5 - t0)*1000:.1f}ms | "
-                        f"FPS {fps_display:.2f}"
-                    )
+                    # 6) 타이밍 (각 단계 소요시간 + 캡처→표시 지연) → 롤링 p50/p95/p99
+                    if tracer.enabled:
+                        tracer.record("capture", item["t1"] - item["t0"])
+                        tracer.record("preprocess", item["t2"] - item["t2_prep_start"])
+                        tracer.record("hailo", item["t3"] - item["t3_infer_start"])
+                        tracer.record("post", t4 - t4_post_start)
+                        tracer.record("draw", t5 - t5_draw_start)
+                        tracer.record("latency", t5 - item["t0"])
+                        tracer.record("frame", frame_interval)
+                    return None
+
+                pipeline = Pipeline(stop_event)
+                pipeline.add_stage("capture", capture_stage)
+                pipeline.add_stage("preprocess", preprocess_stage)
+                pipeline.add_stage("infer", infer_stage, on_drop=release_input)
+                pipeline.add_stage("collect", collect_stage, source=True)
+                pipeline.add_stage("post", post_stage)
+
+                def report(line):
+                    st = backend.stats()
+                    busy = f"{st['busy'] * 100:.0f}%" if st["busy"] is not None else "-"
+                    pre = preprocessor.stats()
+                    print(f"{line} || 🚀 in-flight 최대 {st['max_in_flight']}/{max_in_flight} "
+                          f"장치 사용 {busy} 완료 {st['completed']} | 입력 버퍼 {pre['buffers']}개 (추가 {pre['grown']})")
+                    if tracer.enabled:
+                        print(tracer.format())
+                        publish_trace(mqtt_client)
+                    print(streamer.format_stats())
+
+                # 스테이지별 처리량/가동률 + 슬롯 점유율 + in-flight / 장치 사용률
+                # + 단계별 p50/p95/p99 (출력 + TRACE_TOPIC publish)
+                pipeline.run(report_every=args.stats_every, report=report)
 
                 # 정리
                 cap.release()
@@ -849,10 +734,45 @@ def parse_args():
     p.add_argument("--max-det", type=int, default=None,
                    help="최종 NMS 후 남길 최대 박스 수 (기본은 json max_proposals_per_class)")
 
+    p.add_argument("--decode-mode", choices=["sparse", "dense"], default="sparse",
+                   help="sparse: 점수 임계값 통과 셀만 DFL 디코드 (기본), dense: 전체 셀 디코드")
+
+    # 추론 백엔드
+    p.add_argument("--infer-mode", choices=["stream", "blocking"], default="stream",
+                   help="stream: send/recv 분리로 여러 프레임 동시 추론 (기본), blocking: 기존 InferVStreams.infer")
+    p.add_argument("--in-flight", type=int, default=4,
+                   help="stream 모드에서 장치 안에 동시에 넣어 둘 최대 프레임 수")
+    p.add_argument("--batch-size", type=int, default=None,
+                   help="HEF 배치 크기 (기본: HEF 옆 .profile.json, 없으면 1 — step/build_profile.py)")
+
+    # MJPEG 스트림
+    p.add_argument("--stream-fps", type=float, default=30.0,
+                   help="/video 클라이언트별 최대 FPS (클라이언트는 ?fps= 로 더 낮출 수 있음)")
+    p.add_argument("--jpg-quality", type=int, default=95,
+                   help="MJPEG JPEG 품질 (1~100, 기본 95)")
+
     # ▶︎ 헤드리스/윈도우 모드 스위치
     p.add_argument("--window", action="store_true",
                    help="로컬 미리보기 창을 띄움(기본: 헤드리스)")
 
+    # 파이프라인 통계 출력 주기
+    p.add_argument("--stats-every", type=float, default=5.0,
+                   help="스테이지별 fps/가동률/슬롯 점유율 + 성능측정 보고 주기(초), 0이면 끔")
+
+    # 성능 추적 (단계별 p50/p95/p99, /trace HTTP, ai/trace/hailo MQTT)
+    p.add_argument("--no-trace", action="store_true",
+                   help="단계별 소요시간 추적 끔")
+    p.add_argument("--trace-window", type=int, default=300,
+                   help="단계별로 보관할 최근 샘플 수")
+    p.add_argument("--debug-boxes", action="store_true",
+                   help="검출 박스마다 [BOX] 로그 출력 (기본: 라벨별 검출 수만 집계)")
+
+    # 후처리 벤치마크용 헤드 출력 기록
+    p.add_argument("--dump-heads", type=str, default=None,
+                   help="처음 N 프레임의 출력 vstream 을 .npz 로 저장 (bench_postprocess.py --heads)")
+    p.add_argument("--dump-frames", type=int, default=30,
+                   help="--dump-heads 로 저장할 프레임 수")
+
     return p.parse_args()
 
 
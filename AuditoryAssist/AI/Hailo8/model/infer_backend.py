@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hailo 추론 백엔드
+- InFlightScheduler : send 와 recv 를 분리해 여러 프레임을 장치 안에 동시에 넣어 둠
+                      (앞 프레임 결과를 기다리는 동안에도 다음 프레임이 장치로 들어감)
+    submit(frame, meta) → in-flight 가 max_in_flight 면 대기
+    get(timeout)        → (meta, outputs) 를 보낸 순서대로 반환
+- 장치 인터페이스는 send(frame_hwc) / recv() -> {출력 vstream 이름: ndarray} 두 개뿐
+    HailoVStreamDevice : InputVStreams / OutputVStreams 기반 (실제 장치)
+    FakeInferDevice    : 지연/처리간격을 지정하는 가짜 장치 (스케줄러 검증, bench_inflight.py)
+- BlockingBackend : 기존 InferVStreams.infer (in-flight 1) 와 같은 인터페이스
+출력 형식은 두 경로 모두 {vstream 이름: (H,W,C) 또는 (1,H,W,C)} → postprocess 그대로 사용
+"""
+
+import collections
+import contextlib
+import json
+import os
+import queue
+import threading
+import time
+
+
+# ────────────────────────────────
+# 장치
+# ────────────────────────────────
+class HailoVStreamDevice:
+    """입력 1개 / 출력 N개 vstream 을 send/recv 로 직접 다룸 (hailo_platform 은 열 때 import)"""
+
+    def __init__(self, network_group, in_params, out_params, in_name=None):
+        self.network_group = network_group
+        self.in_params = in_params
+        self.out_params = out_params
+        self.in_name = in_name
+        self._in_ctx = None
+        self._out_ctx = None
+        self._in = None
+        self._outs = []
+
+    def __enter__(self):
+        from hailo_platform import InputVStreams, OutputVStreams
+        self._in_ctx = InputVStreams(self.network_group, self.in_params)
+        self._out_ctx = OutputVStreams(self.network_group, self.out_params)
+        in_vstreams = self._in_ctx.__enter__()
+        out_vstreams = self._out_ctx.__enter__()
+        self._in = in_vstreams.get(self.in_name) if self.in_name else in_vstreams.get()
+        self._outs = list(out_vstreams)
+        return self
+
+    def __exit__(self, *exc):
+        for ctx in (self._in_ctx, self._out_ctx):
+            if ctx is not None:
+                ctx.__exit__(*exc)
+        return False
+
+    def send(self, frame):
+        self._in.send(frame)
+
+    def recv(self):
+        return {vs.name: vs.recv() for vs in self._outs}
+
+
+class FakeInferDevice:
+    """
+    가짜 추론 장치 (하드웨어 없이 in-flight 스케줄링 검증용)
+    - latency  : send → 결과 준비까지 시간
+    - interval : 연속 결과 사이 최소 간격 (= 1 / 장치 처리량)
+    결과 i 준비 시각 = max(send_i + latency, 결과 i-1 준비 + interval)
+    → in-flight 1 이면 1/latency fps, 충분히 겹치면 1/interval fps 에 수렴
+    output_shapes : {이름: (H,W,C)} → 0 으로 채운 float32 출력
+    queue_size    : 장치 안에 들어갈 수 있는 프레임 수 (HailoRT vstream 큐처럼 가득 차면 send 가 대기)
+    """
+
+    def __init__(self, latency=0.03, interval=0.01, output_shapes=None, make_outputs=None, queue_size=None):
+        self.latency = float(latency)
+        self.interval = float(interval)
+        self.output_shapes = output_shapes or {"out": (1, 1, 1)}
+        self.make_outputs = make_outputs
+        self.queue_size = queue_size
+        self._cond = threading.Condition()
+        self._ready = collections.deque()     # (ready_time, frame)
+        self._last_ready = 0.0
+        self.sent = 0
+        self.max_queued = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def send(self, frame):
+        with self._cond:
+            while self.queue_size and len(self._ready) >= self.queue_size:
+                self._cond.wait()
+            now = time.monotonic()
+            ready = max(now + self.latency, self._last_ready + self.interval)
+            self._last_ready = ready
+            self._ready.append((ready, frame))
+            self.sent += 1
+            self.max_queued = max(self.max_queued, len(self._ready))
+            self._cond.notify_all()
+
+    def recv(self):
+        with self._cond:
+            while not self._ready:
+                self._cond.wait()
+            ready, frame = self._ready.popleft()
+            self._cond.notify_all()
+        delay = ready - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        if self.make_outputs is not None:
+            return self.make_outputs(frame)
+        import numpy as np
+        return {name: np.zeros(shape, dtype=np.float32) for name, shape in self.output_shapes.items()}
+
+
+# ────────────────────────────────
+# 스케줄러
+# ────────────────────────────────
+class InFlightScheduler:
+    """
+    최대 max_in_flight 프레임을 장치에 넣어 두고 결과를 보낸 순서대로 돌려줌
+    - submit 은 호출 스레드에서 device.send (보통 추론 스테이지 스레드)
+      send 는 _cond 밖에서 (장치 큐가 차서 send 가 막혀도 recv 스레드는 _cond 를 잡고 결과를 꺼낼 수 있음)
+      send 와 pending 적재는 _send_lock 으로 묶어 순번(seq) = send 순서 = pending 순서
+    - recv 는 전용 스레드가 in-flight 가 있을 때만 호출 → 결과 큐에 적재
+    """
+
+    def __init__(self, device, max_in_flight=4):
+        self.device = device
+        self.max_in_flight = max(1, int(max_in_flight))
+        self._slots = threading.Semaphore(self.max_in_flight)
+        self._cond = threading.Condition()
+        self._send_lock = threading.Lock()
+        self._pending = collections.deque()     # (seq, meta, send_time) 보낸 순서
+        self._next_seq = 0
+        self._next_recv = 0
+        self._results = queue.Queue()
+        self._closed = False
+        self._thread = None
+        self.error = None
+        # 통계
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self._lat_sum = 0.0
+        self._lat_max = 0.0
+        self._busy_since = None     # in-flight > 0 인 구간 = 장치 사용 중
+        self._busy_time = 0.0
+        self._window_start = time.monotonic()
+        self._max_seen = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._recv_loop, name="infer-recv", daemon=True)
+            self._thread.start()
+
+    def close(self, timeout=2.0):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def submit(self, frame, meta=None, timeout=None):
+        """in-flight 자리가 날 때까지 대기 후 send. timeout 안에 자리가 없으면 False"""
+        if not self._slots.acquire(timeout=timeout):
+            return False
+        if self.error is not None:
+            self._slots.release()
+            raise self.error
+        with self._send_lock:
+            # 결과와 meta 짝이 어긋나지 않도록 send 순서 = pending 순서
+            # (recv 스레드는 pending 에 있는 만큼만 recv → 아직 적재 전인 이 프레임 결과를 먼저 꺼내지 않음)
+            now = time.monotonic()
+            try:
+                self.device.send(frame)
+            except Exception:
+                self._slots.release()
+                raise
+            seq = self._next_seq
+            self._next_seq += 1
+            with self._cond:
+                self._pending.append((seq, meta, now))
+                n = len(self._pending)
+                if n == 1:
+                    self._busy_since = now
+                self._max_seen = max(self._max_seen, n)
+                self.submitted += 1
+                self._cond.notify()
+        return True
+
+    def get(self, timeout=None):
+        """(meta, outputs) 또는 timeout 이면 None"""
+        try:
+            return self._results.get(timeout=timeout)
+        except queue.Empty:
+            if self.error is not None:
+                raise self.error
+            return None
+
+    def _recv_loop(self):
+        try:
+            while True:
+                with self._cond:
+                    while not self._pending and not self._closed:
+                        self._cond.wait()
+                    if self._closed and not self._pending:
+                        return
+                outputs = self.device.recv()
+                now = time.monotonic()
+                with self._cond:
+                    seq, meta, sent_at = self._pending.popleft()
+                    if seq != self._next_recv:
+                        raise RuntimeError(f"추론 결과 순서 어긋남: seq {seq} != {self._next_recv}")
+                    self._next_recv += 1
+                    if not self._pending and self._busy_since is not None:
+                        self._busy_time += now - self._busy_since
+                        self._busy_since = None
+                with self._lock:
+                    self.completed += 1
+                    lat = now - sent_at
+                    self._lat_sum += lat
+                    self._lat_max = max(self._lat_max, lat)
+                self._results.put((meta, outputs))
+                self._slots.release()
+        except Exception as e:
+            self.error = e
+            print("❌ 추론 recv 스레드 오류:", e)
+
+    def in_flight(self):
+        with self._cond:
+            return len(self._pending)
+
+    def stats(self, reset=True):
+        now = time.monotonic()
+        with self._cond:
+            busy = self._busy_time + ((now - self._busy_since) if self._busy_since else 0.0)
+            elapsed = max(1e-6, now - self._window_start)
+            in_flight, max_seen = len(self._pending), self._max_seen
+            if reset:
+                self._busy_time = 0.0
+                self._window_start = now
+                self._max_seen = in_flight
+                if self._busy_since is not None:
+                    self._busy_since = now
+        with self._lock:
+            done = self.completed
+            st = {"in_flight": in_flight, "max_in_flight": max_seen, "submitted": self.submitted,
+                  "completed": done, "busy": round(busy / elapsed, 3),
+                  "avg_latency_ms": round(self._lat_sum / done * 1000.0, 2) if done else 0.0,
+                  "max_latency_ms": round(self._lat_max * 1000.0, 2)}
+            if reset:
+                self._lat_max = 0.0
+        return st
+
+
+class BlockingBackend:
+    """기존 InferVStreams.infer 경로 (배치 1, in-flight 1). InFlightScheduler 와 같은 submit/get"""
+
+    def __init__(self, network_group, in_params, out_params, in_name):
+        self.network_group = network_group
+        self.in_params = in_params
+        self.out_params = out_params
+        self.in_name = in_name
+        self._ctx = None
+        self._pipeline = None
+        self._results = queue.Queue()
+        self.submitted = 0
+
+    def __enter__(self):
+        from hailo_platform import InferVStreams
+        self._ctx = InferVStreams(self.network_group, self.in_params, self.out_params)
+        self._pipeline = self._ctx.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._ctx.__exit__(*exc)
+
+    def submit(self, frame, meta=None, timeout=None):
+        # Hailo는 (배치, H, W, C) = (1,640,640,3) uint8, NHWC를 기대
+        batch = frame[None, ...] if frame.ndim == 3 else frame
+        self._results.put((meta, self._pipeline.infer({self.in_name: batch})))
+        self.submitted += 1
+        return True
+
+    def get(self, timeout=None):
+        try:
+            return self._results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def stats(self, reset=True):
+        return {"in_flight": 0, "max_in_flight": 1, "submitted": self.submitted,
+                "completed": self.submitted, "busy": None, "avg_latency_ms": None}
+
+
+# ────────────────────────────────
+# 열기 / 빌드 프로파일
+# ────────────────────────────────
+@contextlib.contextmanager
+def open_backend(mode, network_group, in_params, out_params, in_name, max_in_flight=4):
+    """mode: "stream" (send/recv 분리, 여러 프레임 in-flight) | "blocking" (기존 infer)"""
+    if mode == "blocking":
+        with BlockingBackend(network_group, in_params, out_params, in_name) as backend:
+            yield backend
+    else:
+        with HailoVStreamDevice(network_group, in_params, out_params, in_name) as device:
+            with InFlightScheduler(device, max_in_flight) as backend:
+                yield backend
+
+
+def load_hef_profile(hef_path):
+    """step/compile.py 가 남긴 <hef>.profile.json (없으면 빈 dict)"""
+    path = hef_path + ".profile.json"
+    if not os.path.isfile(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
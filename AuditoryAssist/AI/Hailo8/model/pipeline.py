@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+스테이지 파이프라인 (캡처 / 전처리 / 추론 / 후처리·인코딩 을 스레드별로 겹쳐 실행)
+- 스테이지 사이는 LatestSlot (크기 1, 새 항목이 오면 덮어씀 → latest-frame-wins)
+  느린 스테이지 앞에서 프레임이 쌓이지 않고, 항상 가장 최신 프레임을 처리
+  덮어써 버린 항목은 on_drop 으로 넘겨 자원 정리 (예: 전처리 입력 버퍼 반환)
+- 마지막 스테이지는 호출 스레드(메인)에서 실행 → cv2.imshow 등 메인 스레드 전용 작업 가능
+- 스테이지별 처리량(fps) / 평균 처리시간 / 가동률, 슬롯별 덮어쓴 수 / 점유율 집계
+"""
+
+import threading
+import time
+
+
+# ────────────────────────────────
+# 슬롯
+# ────────────────────────────────
+class LatestSlot:
+    """크기 1 슬롯. put 은 절대 막히지 않고 기존 항목을 버림 (버린 항목은 on_drop(item), 슬롯 잠금 밖에서)"""
+
+    def __init__(self, name, on_drop=None):
+        self.name = name
+        self.on_drop = on_drop
+        self._cond = threading.Condition()
+        self._item = None
+        self._full = False
+        self._closed = False
+        self.puts = 0
+        self.overwritten = 0
+        # 점유율 = 슬롯이 차 있던 시간 비율
+        self._full_since = None
+        self._full_time = 0.0
+        self._window_start = time.monotonic()
+
+    def put(self, item):
+        dropped = None
+        with self._cond:
+            if self._full:
+                self.overwritten += 1
+                dropped = self._item
+            else:
+                self._full_since = time.monotonic()
+            self._item = item
+            self._full = True
+            self.puts += 1
+            self._cond.notify()
+        if dropped is not None and self.on_drop is not None:
+            self.on_drop(dropped)
+
+    def get(self, timeout=None):
+        """항목이 들어올 때까지 대기. timeout/close 면 None"""
+        with self._cond:
+            if not self._full and not self._closed:
+                self._cond.wait(timeout)
+            if not self._full:
+                return None
+            item, self._item = self._item, None
+            self._full = False
+            self._full_time += time.monotonic() - self._full_since
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self, reset=True):
+        with self._cond:
+            now = time.monotonic()
+            full = self._full_time + ((now - self._full_since) if self._full else 0.0)
+            elapsed = max(1e-6, now - self._window_start)
+            st = {"puts": self.puts, "overwritten": self.overwritten,
+                  "occupancy": round(full / elapsed, 3)}
+            if reset:
+                self._full_time = 0.0
+                self._window_start = now
+                if self._full:
+                    self._full_since = now
+            return st
+
+
+# ────────────────────────────────
+# 스테이지
+# ────────────────────────────────
+class Stage:
+    """
+    fn(item) -> 다음 스테이지로 넘길 항목 (None 이면 버림)
+    inbox 가 없으면 소스 스테이지 (fn(None) 을 반복 호출, 예: cap.read)
+    """
+
+    def __init__(self, name, fn, inbox=None, outbox=None):
+        self.name = name
+        self.fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+        self.error = None
+        self._lock = threading.Lock()
+        self._count = 0
+        self._busy = 0.0
+        self._window_start = time.monotonic()
+        self.total = 0
+
+    def step(self, timeout=0.1):
+        """항목 1개 처리. 처리했으면 True"""
+        if self.inbox is not None:
+            item = self.inbox.get(timeout)
+            if item is None:
+                return False
+        else:
+            item = None
+        t0 = time.perf_counter()
+        out = self.fn(item)
+        dt = time.perf_counter() - t0
+        with self._lock:
+            self._count += 1
+            self._busy += dt
+            self.total += 1
+        if out is not None and self.outbox is not None:
+            self.outbox.put(out)
+        return True
+
+    def run(self, stop_event):
+        try:
+            while not stop_event.is_set():
+                self.step()
+        except Exception as e:
+            self.error = e
+            print(f"❌ 파이프라인 '{self.name}' 단계 오류:", e)
+            stop_event.set()
+
+    def stats(self, reset=True):
+        with self._lock:
+            now = time.monotonic()
+            elapsed = max(1e-6, now - self._window_start)
+            st = {"fps": round(self._count / elapsed, 2),
+                  "avg_ms": round(self._busy / self._count * 1000.0, 2) if self._count else 0.0,
+                  "util": round(self._busy / elapsed, 3),
+                  "total": self.total}
+            if reset:
+                self._count = 0
+                self._busy = 0.0
+                self._window_start = now
+            return st
+
+
+# ────────────────────────────────
+# 파이프라인
+# ────────────────────────────────
+class Pipeline:
+
+    def __init__(self, stop_event):
+        self.stop_event = stop_event
+        self.stages = []
+        self.slots = []
+
+    def add_stage(self, name, fn, source=False, on_drop=None):
+        """
+        앞 스테이지와 새 스테이지 사이에 LatestSlot 을 자동으로 연결
+        source=True 면 연결하지 않음 (앞 스테이지와 다른 경로로 항목을 받는 경우, 예: 추론 결과 수신)
+        on_drop : 그 슬롯에서 덮어써 버린 항목 정리 함수
+        """
+        inbox = None
+        if self.stages and not source:
+            inbox = LatestSlot(f"{self.stages[-1].name}→{name}", on_drop=on_drop)
+            self.stages[-1].outbox = inbox
+            self.slots.append(inbox)
+        stage = Stage(name, fn, inbox=inbox)
+        self.stages.append(stage)
+        return stage
+
+    def run(self, report_every=5.0, report=print):
+        """
+        마지막 스테이지를 제외한 스테이지를 스레드로 띄우고, 마지막 스테이지는 현재 스레드에서 실행
+        report_every 초마다 report(format_stats()) (0/None 이면 출력 안 함)
+        stop_event 가 세트되면 모든 스테이지를 정리하고 반환. 스테이지 예외는 다시 raise
+        """
+        threads = []
+        for st in self.stages[:-1]:
+            th = threading.Thread(target=st.run, args=(self.stop_event,),
+                                  name=f"stage-{st.name}", daemon=True)
+            th.start()
+            threads.append(th)
+
+        try:
+            self._run_last(self.stages[-1], report_every, report)
+        finally:
+            self.stop_event.set()
+            for slot in self.slots:
+                slot.close()
+            for th in threads:
+                th.join(timeout=2)
+
+        for st in self.stages:
+            if st.error is not None:
+                raise st.error
+
+    def _run_last(self, last, report_every, report):
+        next_report = time.monotonic() + report_every if report_every else None
+        try:
+            while not self.stop_event.is_set():
+                last.step()
+                if next_report is not None and time.monotonic() >= next_report:
+                    report(self.format_stats())
+                    next_report = time.monotonic() + report_every
+        except Exception as e:
+            last.error = e
+            print(f"❌ 파이프라인 '{last.name}' 단계 오류:", e)
+
+    def stats(self, reset=True):
+        return {
+            "stages": {st.name: st.stats(reset) for st in self.stages},
+            "slots": {sl.name: sl.stats(reset) for sl in self.slots},
+        }
+
+    def format_stats(self):
+        st = self.stats()
+        parts = [f"{name} {s['fps']:.1f}fps {s['avg_ms']:.1f}ms ({s['util'] * 100:.0f}%)"
+                 for name, s in st["stages"].items()]
+        slots = [f"{name} 점유 {s['occupancy'] * 100:.0f}% 덮어씀 {s['overwritten']}"
+                 for name, s in st["slots"].items()]
+        return "📊 파이프라인 | " + " | ".join(parts) + " || " + " | ".join(slots)
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+YOLOv8 DFL 헤드 후처리 (NumPy 전용)
+- hailo_platform 없이 import 가능 → 벤치마크(bench/bench_postprocess.py)에서 그대로 사용
+- hailo_video.py 는 여기 함수를 import 해서 사용
+"""
+
+import numpy as np
+
+
+# ────────────────────────────────
+# 후처리: DFL decode + NMS
+# ────────────────────────────────
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+def _softmax(x, axis=-1):
+    x = x - np.max(x, axis=axis, keepdims=True)
+    e = np.exp(x)
+    return e / np.sum(e, axis=axis, keepdims=True)
+
+def _squeeze_hw(arr):
+    """
+    InferVStreams 결과 (1,H,W,C) → (H,W,C) 로 batch 차원 제거
+    """
+    if arr is None:
+        return None
+    a = np.asarray(arr)
+    while a.ndim > 3 and a.shape[0] == 1:
+        a = a[0]
+    return a
+
+DECODE_MODES = ("sparse", "dense")
+
+# (H, W, stride) → 셀 센터 (cx, cy) flatten. 헤드 크기는 고정이라 프레임마다 meshgrid 할 필요 없음
+_grid_cache = {}
+
+def _grid_centers(Hs, Ws, stride):
+    key = (Hs, Ws, stride)
+    g = _grid_cache.get(key)
+    if g is None:
+        gy, gx = np.meshgrid(
+            np.arange(Hs, dtype=np.float32),
+            np.arange(Ws, dtype=np.float32),
+            indexing='ij'
+        )
+        g = ((gx + 0.5) * stride).reshape(-1), ((gy + 0.5) * stride).reshape(-1)
+        _grid_cache[key] = g
+    return g
+
+def _logit(p):
+    """sigmoid 의 역함수. p<=0 → -inf, p>=1 → +inf"""
+    if p <= 0.0:
+        return -np.inf
+    if p >= 1.0:
+        return np.inf
+    return float(np.log(p / (1.0 - p)))
+
+def decode_head_dfl(reg_map, cls_map, stride, num_bins=16, score_thr=0.5, mode="sparse"):
+    """
+    DFL 기반 회귀 결과를 bbox로 복원
+    mode="sparse" : cls logit 을 logit(score_thr) 와 먼저 비교해 살아남은 셀만 sigmoid/softmax
+                    (빈 프레임이면 비교 1번으로 끝)
+    mode="dense"  : 기존 방식 — 전체 셀 sigmoid + softmax 후 필터 (비교/검증용)
+    두 모드의 결과(박스, 점수, 순서)는 동일
+    """
+    if mode == "dense":
+        return _decode_head_dfl_dense(reg_map, cls_map, stride, num_bins, score_thr)
+
+    if reg_map is None or cls_map is None:
+        return (np.zeros((0, 4), dtype=np.float32),
+                np.zeros((0,), dtype=np.float32))
+
+    Hs, Ws, C = reg_map.shape
+    expected_c = 4 * num_bins
+    if C != expected_c:
+        print(f"⚠️ 예기치 않은 reg_map 채널수 {C}, 기대 {expected_c}")
+        return (np.zeros((0, 4), dtype=np.float32),
+                np.zeros((0,), dtype=np.float32))
+
+    # 1) logit 공간에서 후보 셀 선택 (경계 오차는 아래 sigmoid 재확인으로 보정)
+    logits = cls_map[..., 0].reshape(-1)
+    idx = np.flatnonzero(logits >= _logit(float(score_thr)) - 1e-4)
+    if idx.size == 0:
+        return (np.zeros((0, 4), dtype=np.float32),
+                np.zeros((0,), dtype=np.float32))
+    sc = _sigmoid(logits[idx])
+    ok = sc >= float(score_thr)
+    idx, sc = idx[ok], sc[ok]
+    if idx.size == 0:
+        return (np.zeros((0, 4), dtype=np.float32),
+                np.zeros((0,), dtype=np.float32))
+
+    # 2) 후보 셀만 DFL softmax → 기대값
+    reg4 = reg_map.reshape(Hs * Ws, 4, num_bins)[idx]
+    prob = _softmax(reg4, axis=2)  # (K,4,num_bins)
+    bins = np.arange(num_bins, dtype=np.float32)
+    dist = np.sum(prob * bins[None, None, :], axis=2)  # (K,4)
+
+    # 3) 캐시된 grid 로 box 복원 xyxy
+    gcx, gcy = _grid_centers(Hs, Ws, stride)
+    cx = gcx[idx]
+    cy = gcy[idx]
+    boxes = np.stack([
+        cx - dist[:, 0] * stride,
+        cy - dist[:, 1] * stride,
+        cx + dist[:, 2] * stride,
+        cy + dist[:, 3] * stride,
+    ], axis=1).astype(np.float32)
+    return boxes, sc.astype(np.float32)
+
+def _decode_head_dfl_dense(reg_map, cls_map, stride, num_bins=16, score_thr=0.5):
+    if reg_map is None or cls_map is None:
+        return (np.zeros((0, 4), dtype=np.float32),
+                np.zeros((0,), dtype=np.float32))
+
+    Hs, Ws, C = reg_map.shape
+    expected_c = 4 * num_bins
+    if C != expected_c:
+        print(f"⚠️ 예기치 않은 reg_map 채널수 {C}, 기대 {expected_c}")
+        return (np.zeros((0, 4), dtype=np.float32),
+                np.zeros((0,), dtype=np.float32))
+
+    # class score (sigmoid)
+    cls_score = _sigmoid(cls_map[..., 0])  # (Hs,Ws)
+
+    # DFL 분포 -> 기대값
+    reg4 = reg_map.reshape(Hs, Ws, 4, num_bins)
+    prob = _softmax(reg4, axis=3)  # (Hs,Ws,4,num_bins)
+    bins = np.arange(num_bins, dtype=np.float32)
+    dist = np.sum(prob * bins[None, None, None, :], axis=3)  # (Hs,Ws,4)
+
+    l = dist[..., 0]
+    t = dist[..., 1]
+    r = dist[..., 2]
+    b = dist[..., 3]
+
+    # grid 좌표 (셀 센터 → stride 반영)
+    gy, gx = np.meshgrid(
+        np.arange(Hs, dtype=np.float32),
+        np.arange(Ws, dtype=np.float32),
+        indexing='ij'
+    )
+    cx = (gx + 0.5) * stride
+    cy = (gy + 0.5) * stride
+
+    # box 복원 xyxy
+    x1 = cx - l * stride
+    y1 = cy - t * stride
+    x2 = cx + r * stride
+    y2 = cy + b * stride
+
+    # flatten
+    x1 = x1.reshape(-1)
+    y1 = y1.reshape(-1)
+    x2 = x2.reshape(-1)
+    y2 = y2.reshape(-1)
+    sc = cls_score.reshape(-1)
+
+    # confidence 필터
+    keep = sc >= float(score_thr)
+    if not np.any(keep):
+        return (np.zeros((0, 4), dtype=np.float32),
+                np.zeros((0,), dtype=np.float32))
+
+    boxes = np.stack([x1[keep], y1[keep], x2[keep], y2[keep]], axis=1).astype(np.float32)
+    scores = sc[keep].astype(np.float32)
+    return boxes, scores
+
+def nms_numpy(boxes, scores, iou_th=0.5, max_dets=100):
+    """
+    간단한 greedy NMS.
+    """
+    if boxes.shape[0] == 0:
+        return []
+
+    x1 = boxes[:, 0]
+    y1 = boxes[:, 1]
+    x2 = boxes[:, 2]
+    y2 = boxes[:, 3]
+
+    areas = (x2 - x1) * (y2 - y1)
+    order = np.argsort(-scores)  # high -> low
+
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        if len(keep) >= max_dets:
+            break
+
+        xx1 = np.maximum(x1[i], x1[order[1:]])
+        yy1 = np.maximum(y1[i], y1[order[1:]])
+        xx2 = np.minimum(x2[i], x2[order[1:]])
+        yy2 = np.minimum(y2[i], y2[order[1:]])
+
+        w = np.maximum(0.0, xx2 - xx1)
+        h = np.maximum(0.0, yy2 - yy1)
+        inter = w * h
+        iou = inter / (areas[i] + areas[order[1:]] - inter + 1e-6)
+
+        inds = np.where(iou <= iou_th)[0]
+        order = order[inds + 1]
+
+    return keep
+
+def resolve_decoder_layers_from_cfg(decoders_cfg, out_vstream_names):
+    """
+    cfg에 적힌 헤드 레이어 이름(prefix 다를 수 있음)을
+    실제 HEF 출력 vstream 이름으로 suffix 기준 매핑
+    """
+    suffix_map = {}
+    for full in out_vstream_names:
+        suf = full.split("/")[-1]
+        suffix_map[suf] = full
+
+    resolved = []
+    for d in decoders_cfg:
+        stride = d["stride"]
+        reg_suffix = d["reg_layer"].split("/")[-1]
+        cls_suffix = d["cls_layer"].split("/")[-1]
+
+        reg_full = suffix_map.get(reg_suffix, d["reg_layer"])
+        cls_full = suffix_map.get(cls_suffix, d["cls_layer"])
+
+        resolved.append({
+            "stride": stride,
+            "reg_layer": reg_full,
+            "cls_layer": cls_full
+        })
+    return resolved
+
+def postprocess_all_scales(results_dict,
+                           decoders_resolved,
+                           num_bins,
+                           score_thr,
+                           iou_th,
+                           max_det,
+                           decode_mode="sparse"):
+    """
+    여러 스케일 헤드들에서 나온 bbox 후보들을 합치고 NMS 적용
+    return dets (N,6): [x1,y1,x2,y2,score,cls_id]
+    """
+    all_boxes = []
+    all_scores = []
+
+    for d in decoders_resolved:
+        stride = d["stride"]
+        reg_name = d["reg_layer"]
+        cls_name = d["cls_layer"]
+
+        reg_map = _squeeze_hw(results_dict.get(reg_name))
+        cls_map = _squeeze_hw(results_dict.get(cls_name))
+
+        boxes, scores = decode_head_dfl(
+            reg_map,
+            cls_map,
+            stride=stride,
+            num_bins=num_bins,
+            score_thr=score_thr,
+            mode=decode_mode
+        )
+
+        if boxes.shape[0] > 0:
+            all_boxes.append(boxes)
+            all_scores.append(scores)
+
+    if not all_boxes:
+        return np.zeros((0, 6), dtype=np.float32)
+
+    all_boxes = np.concatenate(all_boxes, axis=0)
+    all_scores = np.concatenate(all_scores, axis=0)
+
+    keep_idx = nms_numpy(all_boxes, all_scores, iou_th=iou_th, max_dets=max_det)
+    if not keep_idx:
+        return np.zeros((0, 6), dtype=np.float32)
+
+    final_boxes = all_boxes[keep_idx]
+    final_scores = all_scores[keep_idx]
+
+    # 단일 클래스 가정 → cls_id = 0
+    cls_col = np.zeros((final_boxes.shape[0], 1), dtype=np.float32)
+
+    dets = np.concatenate(
+        [
+            final_boxes.astype(np.float32),
+            final_scores.reshape(-1, 1).astype(np.float32),
+            cls_col
+        ],
+        axis=1
+    )
+    return dets
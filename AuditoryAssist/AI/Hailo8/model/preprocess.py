@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hailo 입력 전처리 (BGR 프레임 → net_h x net_w RGB uint8, 짧은 변 맞춤 리사이즈 + 중앙 크롭)
+- Preprocessor : 해상도별로 미리 잡아 둔 버퍼에 바로 씀 (프레임당 새 배열 할당 없음)
+    1) cv2.resize(BGR, dst=리사이즈 버퍼)
+    2) cv2.cvtColor(크롭 영역, BGR2RGB, dst=입력 버퍼)  ← 크롭 복사와 색 변환을 한 번에
+    입력 버퍼는 C 연속 uint8 (H,W,3) → Hailo send 에 복사 없이 그대로 전달
+    원본이 이미 net 크기면 cvtColor 한 번으로 끝
+    입력 버퍼는 free-list 로 관리: 호출마다 빈 버퍼를 꺼내고, 장치가 다 읽은 뒤 release() 로 반환
+- preprocess_for_hailo : 기존 구현 (매 프레임 cvtColor/resize/astype/ascontiguousarray 할당)
+  결과 비교·할당 측정 기준 (bench/bench_preprocess.py)
+리사이즈는 채널별 선형 보간이라 색 변환 순서를 바꿔도 결과는 기존 구현과 같음
+"""
+
+import threading
+
+import cv2
+import numpy as np
+
+
+def _geometry(h0, w0, net_h, net_w):
+    """짧은 변을 net 에 맞춘 리사이즈 크기와 중앙 크롭 위치"""
+    if h0 < w0:
+        scale = net_h / float(h0)
+        new_h, new_w = net_h, int(round(w0 * scale))
+    else:
+        scale = net_w / float(w0)
+        new_w, new_h = net_w, int(round(h0 * scale))
+    left = max(0, (new_w - net_w) // 2)
+    top = max(0, (new_h - net_h) // 2)
+    return scale, new_h, new_w, left, top
+
+
+# ────────────────────────────────
+# 버퍼 재사용 전처리
+# ────────────────────────────────
+class _Plan:
+    """원본 해상도 1개에 대한 크기 계산 결과 + 버퍼"""
+
+    def __init__(self, h0, w0, net_h, net_w, pool):
+        self.scale, self.new_h, self.new_w, self.left, self.top = _geometry(h0, w0, net_h, net_w)
+        self.identity = (self.new_h, self.new_w) == (h0, w0)
+        # 리사이즈 결과 (BGR). 원본이 net 크기 그대로면 필요 없음
+        self.resized = None if self.identity else np.empty((self.new_h, self.new_w, 3), np.uint8)
+
+        # 크롭 영역 (리사이즈 결과 기준) → 입력 버퍼 안 위치 (부족하면 가운데 두고 나머지는 0)
+        ch = min(net_h, self.new_h - self.top)
+        cw = min(net_w, self.new_w - self.left)
+        self.src = (slice(self.top, self.top + ch), slice(self.left, self.left + cw))
+        y_off, x_off = (net_h - ch) // 2, (net_w - cw) // 2
+        self.dst = (slice(y_off, y_off + ch), slice(x_off, x_off + cw))
+        self.full = (ch, cw) == (net_h, net_w)
+
+        # 빈 입력 버퍼 목록 (꺼낸 버퍼는 release 될 때까지 다시 쓰지 않음)
+        self.net_shape = (net_h, net_w, 3)
+        self.free = [self.new_buffer() for _ in range(pool)]
+
+    def new_buffer(self):
+        # 패딩 영역은 여기서 0 으로 두고 이후에는 안쪽만 채움
+        return np.zeros(self.net_shape, np.uint8)
+
+
+class Preprocessor:
+    """
+    net_h x net_w RGB uint8 입력을 미리 잡아 둔 버퍼에 만들어 반환
+    반환한 버퍼는 release(buf) 전까지 다른 프레임에 쓰이지 않음
+    → 장치가 입력을 다 읽은 뒤 (결과 수신) 또는 프레임을 버릴 때 (슬롯 덮어쓰기) release
+    pool : 해상도별로 미리 만들 버퍼 수 = 동시에 살아 있는 프레임 수
+           (hailo_video.py: 전처리 중 1 + 슬롯 1 + 추론 스테이지 1 + 장치 안 max_in_flight)
+           빈 버퍼가 없으면 새로 만들고 grown 으로 셈 (덮어쓰지도, 기다리지도 않음)
+    """
+
+    def __init__(self, net_h=640, net_w=640, pool=4):
+        self.net_h = int(net_h)
+        self.net_w = int(net_w)
+        self.pool = max(1, int(pool))
+        self._plans = {}
+        self._owner = {}     # id(버퍼) → (plan, 버퍼)  release 시 돌려놓을 곳 (버퍼 참조를 쥐어 id 재사용 방지)
+        self._lock = threading.Lock()   # 전처리 스레드(꺼냄) ↔ 수신/슬롯(반환)
+        self.grown = 0
+
+    def _plan(self, h0, w0):
+        plan = self._plans.get((h0, w0))
+        if plan is None:
+            plan = _Plan(h0, w0, self.net_h, self.net_w, self.pool)
+            with self._lock:
+                self._plans[(h0, w0)] = plan
+                for buf in plan.free:
+                    self._owner[id(buf)] = (plan, buf)
+        return plan
+
+    def _acquire(self, plan):
+        with self._lock:
+            if plan.free:
+                return plan.free.pop()
+            buf = plan.new_buffer()
+            self._owner[id(buf)] = (plan, buf)
+            self.grown += 1
+            return buf
+
+    def release(self, buf):
+        """__call__ 이 돌려준 버퍼 반환 (장치가 다 읽었거나 프레임을 버린 뒤)"""
+        with self._lock:
+            plan, owned = self._owner.get(id(buf), (None, None))
+            # 모르는 배열 / 이미 반환된 버퍼 (두 번 반환하면 두 프레임이 같은 버퍼를 받음) 는 무시
+            if owned is buf and not any(b is buf for b in plan.free):
+                plan.free.append(buf)
+
+    def stats(self):
+        with self._lock:
+            return {"free": sum(len(p.free) for p in self._plans.values()),
+                    "buffers": len(self._owner), "grown": self.grown}
+
+    def __call__(self, frame_bgr):
+        """→ (입력 버퍼 (net_h,net_w,3) RGB uint8 C 연속, scale, left, top). 버퍼는 release 로 반환"""
+        h0, w0 = frame_bgr.shape[:2]
+        plan = self._plan(h0, w0)
+        out = self._acquire(plan)
+
+        if plan.identity:
+            src = frame_bgr
+        else:
+            cv2.resize(frame_bgr, (plan.new_w, plan.new_h), dst=plan.resized,
+                       interpolation=cv2.INTER_LINEAR)
+            src = plan.resized
+
+        if plan.full:
+            cv2.cvtColor(src[plan.src], cv2.COLOR_BGR2RGB, dst=out)
+        else:
+            # 패딩 영역은 버퍼 생성 시 0 → 안쪽만 채움
+            cv2.cvtColor(src[plan.src], cv2.COLOR_BGR2RGB, dst=out[plan.dst])
+        return out, plan.scale, plan.left, plan.top
+
+
+# ────────────────────────────────
+# 기존 구현 (기준)
+# ────────────────────────────────
+def preprocess_for_hailo(frame_bgr, net_h=640, net_w=640):
+    """
+    net_h x net_w RGB uint8 준비:
+    - BGR -> RGB
+    - 짧은 변을 맞춰 리사이즈
+    - 중앙 크롭
+    - uint8 유지
+    """
+    h0, w0 = frame_bgr.shape[:2]
+
+    # BGR -> RGB
+    rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+
+    # 스케일 결정 (짧은 변을 net에 맞춘다)
+    scale, new_h, new_w, left, top = _geometry(h0, w0, net_h, net_w)
+
+    resized = cv2.resize(rgb, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+
+    # 중앙 크롭
+    right = left + net_w
+    bottom = top + net_h
+    crop = resized[top:bottom, left:right, :]
+
+    # 크롭된 게 부족하면 패딩
+    if crop.shape[0] != net_h or crop.shape[1] != net_w:
+        canvas = np.zeros((net_h, net_w, 3), dtype=np.uint8)
+        y_off = (net_h - crop.shape[0]) // 2
+        x_off = (net_w - crop.shape[1]) // 2
+        canvas[y_off:y_off+crop.shape[0], x_off:x_off+crop.shape[1], :] = crop
+        crop = canvas
+
+    crop = np.ascontiguousarray(crop.astype(np.uint8))
+    return crop, scale, left, top
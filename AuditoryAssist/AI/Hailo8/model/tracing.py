@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+단계별 소요시간 추적 (프레임마다 print 대신 모아서 주기적으로 / 요청 시 보고)
+- Tracer
+    record(stage, seconds) : 단계 소요시간 1개 기록 → 단계별 최근 window 개 샘플 (롤링)
+    count(name, n=1)       : 카운터 (검출 수, 쿨다운으로 건너뛴 MQTT 전송 등)
+    snapshot()             : {"stages": {단계: count/mean/p50/p95/p99/max ms}, "counters": {...}}
+    format()               : 한 줄 요약 (⏱ 성능측정 | 캡처 p50/p95/p99 ...)
+- NullTracer : 추적을 끈 경우. 모든 메서드가 아무것도 안 함, enabled=False
+  핫 루프에서는 `if tracer.enabled:` 로 감싸 시간 계산·dict 조회까지 건너뜀
+기록은 후처리 스테이지(한 스레드)에서, snapshot 은 HTTP/MQTT 스레드에서 → lock 으로 보호
+"""
+
+import threading
+import time
+from array import array
+
+DEFAULT_WINDOW = 300    # 단계별 보관 샘플 수 (30fps 기준 약 10초)
+
+
+# ────────────────────────────────
+# 롤링 히스토그램
+# ────────────────────────────────
+class RollingHistogram:
+    """최근 window 개 샘플(초)의 분위수. 기록은 O(1), 분위수는 보고할 때만 정렬"""
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = int(window)
+        self._buf = array("d", bytes(8 * self.window))
+        self._n = 0
+        self._i = 0
+        self.total = 0
+
+    def add(self, value):
+        self._buf[self._i] = value
+        self._i = (self._i + 1) % self.window
+        if self._n < self.window:
+            self._n += 1
+        self.total += 1
+
+    def summary(self):
+        if not self._n:
+            return {"count": 0, "total": self.total}
+        s = sorted(self._buf[:self._n])
+        n = len(s)
+
+        def pct(p):
+            return round(s[min(n - 1, int(n * p / 100.0))] * 1000.0, 2)
+
+        return {"count": n, "total": self.total,
+                "mean_ms": round(sum(s) / n * 1000.0, 2),
+                "p50_ms": pct(50), "p95_ms": pct(95), "p99_ms": pct(99),
+                "max_ms": round(s[-1] * 1000.0, 2)}
+
+
+# ────────────────────────────────
+# 추적기
+# ────────────────────────────────
+class Tracer:
+    enabled = True
+
+    def __init__(self, window=DEFAULT_WINDOW, labels=None):
+        """labels: {단계 이름: 출력용 이름} (format 순서도 이 순서)"""
+        self.window = int(window)
+        self.labels = dict(labels or {})
+        self._lock = threading.Lock()
+        self._hist = {}
+        self._counters = {}
+        self._started = time.time()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            h = self._hist.get(stage)
+            if h is None:
+                h = self._hist[stage] = RollingHistogram(self.window)
+            h.add(seconds)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def snapshot(self):
+        with self._lock:
+            stages = {name: h.summary() for name, h in self._hist.items()}
+            counters = dict(self._counters)
+        return {"timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "uptime_sec": round(time.time() - self._started, 1),
+                "window": self.window, "stages": stages, "counters": counters}
+
+    def format(self, snap=None):
+        snap = snap or self.snapshot()
+        stages = snap["stages"]
+        order = [s for s in self.labels if s in stages] + [s for s in stages if s not in self.labels]
+        parts = []
+        for name in order:
+            st = stages[name]
+            if st["count"]:
+                parts.append(f"{self.labels.get(name, name)} "
+                             f"{st['p50_ms']:.1f}/{st['p95_ms']:.1f}/{st['p99_ms']:.1f}")
+        line = f"⏱ 성능측정 (최근 {self.window}, p50/p95/p99 ms) | " + " | ".join(parts)
+        if snap["counters"]:
+            line += " || " + " ".join(f"{k}={v}" for k, v in sorted(snap["counters"].items()))
+        return line
+
+
+class NullTracer:
+    """추적 끔: 호출해도 아무 일 없음"""
+    enabled = False
+    window = 0
+
+    def record(self, stage, seconds):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+    def snapshot(self):
+        return {"enabled": False}
+
+    def format(self, snap=None):
+        return "⏱ 성능측정 꺼짐"
+
+
+NULL_TRACER = NullTracer()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+빌드 프로파일 — optimize.py / compile.py / hailo_video.py 가 같은 배치 크기를 쓰도록 한 곳에서 정의
+
+    HAILO_PROFILE=throughput python optimize.py
+    HAILO_PROFILE=throughput python compile.py      # → fire.hef + fire.hef.profile.json
+
+- latency    : 배치 1. 프레임 하나씩 바로 처리 (기존 동작)
+- throughput : 배치 4. 런타임에서 여러 프레임을 동시에 넣어(in-flight) 가속기 가동률을 올림
+compile.py 가 HEF 옆에 <hef>.profile.json 을 남기고, hailo_video.py 는 --batch-size 를 안 주면 이 값을 읽음
+"""
+
+import json
+import os
+
+PROFILES = {
+    "latency": {
+        "batch_size": 1,
+        "compiler_cmd": "performance_param(compiler_optimization_level=max)",
+    },
+    "throughput": {
+        "batch_size": 4,
+        "compiler_cmd": "performance_param(compiler_optimization_level=max)",
+    },
+}
+
+DEFAULT_PROFILE = "latency"
+
+
+def current_profile():
+    """HAILO_PROFILE 환경변수 (없으면 latency) → (이름, 설정 dict)"""
+    name = os.environ.get("HAILO_PROFILE", DEFAULT_PROFILE)
+    if name not in PROFILES:
+        raise SystemExit(f"[!] 알 수 없는 HAILO_PROFILE={name} (가능: {', '.join(PROFILES)})")
+    return name, PROFILES[name]
+
+
+def optimize_script(profile):
+    """optimize 단계 모델 스크립트 (배치 크기 = 한 번에 추론할 프레임 수)"""
+    return f"network_group_param(frames_per_infer={int(profile['batch_size'])})"
+
+
+def write_hef_profile(hef_path, name, profile):
+    """HEF 옆에 <hef>.profile.json 저장 → hailo_video.py 가 배치 크기를 맞춤"""
+    path = hef_path + ".profile.json"
+    with open(path, "w") as f:
+        json.dump({"profile": name, "batch_size": int(profile["batch_size"])}, f, indent=2)
+    return path
@@ -5,6 +5,8 @@ import os
 import sys
 from hailo_sdk_client import ClientRunner
 
+from build_profile import current_profile, write_hef_profile
+
 # -------------------------------------------------
 # 경로/설정
 # -------------------------------------------------
@@ -20,8 +22,8 @@ QUANT_HAR_PATH   = os.path.join(MODEL_DIR, f"{MODEL_NAME}_quantized_model.har")
 FINAL_HAR_PATH   = os.path.join(MODEL_DIR, f"{MODEL_NAME}_final.har")
 HEF_OUT_PATH     = os.path.join(MODEL_DIR, f"{MODEL_NAME}.hef")
 
-# (옵션) 컴파일러 힌트. SDK마다 없을 수도 있음 → 실패해도 무시
-COMPILER_TUNING_CMD = "performance_param(compiler_optimization_level=max)"
+# 배치 크기 / 컴파일러 힌트는 build_profile.py (HAILO_PROFILE) 에서
+#   → optimize.py 와 같은 프로파일로 실행해야 배치 크기가 맞음
 
 
 def main():
@@ -29,6 +31,11 @@ def main():
     print("    QUANT_HAR_PATH :", QUANT_HAR_PATH)
     print("    HEF_OUT_PATH   :", HEF_OUT_PATH)
 
+    profile_name, profile = current_profile()
+    # (옵션) 컴파일러 힌트. SDK마다 없을 수도 있음 → 실패해도 무시
+    COMPILER_TUNING_CMD = profile["compiler_cmd"]
+    print(f"    PROFILE        : {profile_name} (batch_size={profile['batch_size']})")
+
     # 0) 안전 체크
     if not os.path.isfile(QUANT_HAR_PATH):
         print(f"[!] 양자화된 HAR 파일이 없음: {QUANT_HAR_PATH}")
@@ -75,6 +82,10 @@ def main():
             # 여기서 끝내긴 하지만, 이 케이스는 보통 안 뜬다.
             # 대부분은 위에서 bytes 받아서 저장되거나, save_hef가 동작함.
 
+    # 4-1) 프로파일 기록 → hailo_video.py 가 같은 배치 크기로 실행
+    if os.path.isfile(HEF_OUT_PATH):
+        print("[✓] 프로파일 기록:", write_hef_profile(HEF_OUT_PATH, profile_name, profile))
+
     # 5) 최종 HAR 백업 (선택)
     try:
         runner.save_har(FINAL_HAR_PATH)
@@ -8,6 +8,8 @@ import numpy as np
 from PIL import Image
 from hailo_sdk_client import ClientRunner
 
+from build_profile import current_profile, optimize_script
+
 MODEL_NAME = "fire"
 
 BASE_DIR   = "/home/dlgyals/Downloads/hailo/Hailo8"
@@ -102,6 +104,9 @@ def main():
     print("    QUANT_HAR_PATH  :", QUANT_HAR_PATH)
     print("    IMAGES_PATH     :", IMAGES_PATH)
 
+    profile_name, profile = current_profile()
+    print(f"    PROFILE         : {profile_name} (batch_size={profile['batch_size']})")
+
     if not os.path.isfile(PARSED_HAR_PATH):
         print(f"[!] HAR 파일이 없음: {PARSED_HAR_PATH}")
         sys.exit(1)
@@ -125,7 +130,8 @@ def main():
     )
 
 
-    script_cmd = "network_group_param(frames_per_infer=1)"
+    # 배치 크기는 build_profile.py 프로파일에서 (compile.py / hailo_video.py 와 같은 값)
+    script_cmd = optimize_script(profile)
 
     try:
         # WARNING: 이건 내부 속성이라 SDK 버전에 따라 이름이 다를 수 있음
@@ -137,7 +143,7 @@ def main():
         runner.load_model_script(script_cmd)
         print("[*] 모델 스크립트 주입 성공:", script_cmd)
     except Exception as e:
-        print("[!!] network_group_param(frames_per_infer=1) 주입 실패:", e)
+        print(f"[!!] {script_cmd} 주입 실패:", e)
         print("     -> SDK에서 이 키워드를 다르게 부를 수도 있음 (예: infer_batch_size 등).")
         print("     -> 만약 여기서 계속 실패하면, SDK 버전별 model script 레퍼런스에서")
         print("        network_group_param / frames_per_infer / batch_size / infer_batch_size")
@@ -0,0 +1,7 @@
+# tests/conftest.py
+# model/ 모듈은 평면 import → bench/ 스크립트와 같은 방식으로 sys.path 에 추가
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "model"))
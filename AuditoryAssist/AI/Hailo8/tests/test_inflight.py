@@ -0,0 +1,82 @@
+# tests/test_inflight.py
+import threading
+import time
+
+import numpy as np
+
+from infer_backend import FakeInferDevice, InFlightScheduler
+
+
+def _idx_device(**kw):
+    return FakeInferDevice(make_outputs=lambda frame: {"idx": frame}, **kw)
+
+
+def _run(sched, frames, submitters=1):
+    """frames 장을 submitters 스레드로 제출하고 결과를 받은 순서대로 반환"""
+    received = []
+
+    def consume():
+        while len(received) < frames:
+            got = sched.get(timeout=2.0)
+            if got is None:
+                return
+            meta, outputs = got
+            received.append((meta, int(outputs["idx"][0])))
+
+    counter = iter(range(frames))
+    lock = threading.Lock()
+
+    def produce():
+        while True:
+            with lock:
+                i = next(counter, None)
+                if i is None:
+                    return
+                # 제출 순번과 프레임 내용을 같게 (여러 제출 스레드여도 짝 확인 가능)
+                sched.submit(np.array([i], dtype=np.int64), meta=i)
+
+    th = threading.Thread(target=consume)
+    th.start()
+    producers = [threading.Thread(target=produce) for _ in range(submitters)]
+    for p in producers:
+        p.start()
+    for p in producers:
+        p.join(10)
+    th.join(10)
+    return received
+
+
+def test_results_in_submit_order():
+    with InFlightScheduler(_idx_device(latency=0.01, interval=0.001), max_in_flight=4) as sched:
+        received = _run(sched, 100)
+    assert [m for m, _ in received] == list(range(100))
+    assert all(m == idx for m, idx in received)
+
+
+def test_in_flight_never_exceeds_cap():
+    device = _idx_device(latency=0.01, interval=0.0)
+    with InFlightScheduler(device, max_in_flight=3) as sched:
+        received = _run(sched, 60, submitters=4)
+        st = sched.stats()
+    assert len(received) == 60
+    assert st["max_in_flight"] <= 3
+    assert device.max_queued <= 3
+
+
+def test_submit_times_out_when_full():
+    with InFlightScheduler(_idx_device(latency=0.5, interval=0.0), max_in_flight=2) as sched:
+        assert sched.submit(np.array([0]), meta=0)
+        assert sched.submit(np.array([1]), meta=1)
+        t0 = time.monotonic()
+        assert not sched.submit(np.array([2]), meta=2, timeout=0.05)
+        assert time.monotonic() - t0 < 0.4
+        assert sched.in_flight() == 2
+
+
+def test_device_queue_smaller_than_in_flight_does_not_deadlock():
+    # HailoRT vstream 큐(1)가 in-flight(4) 보다 작아 send 가 막히는 경우
+    device = _idx_device(latency=0.005, interval=0.001, queue_size=1)
+    with InFlightScheduler(device, max_in_flight=4) as sched:
+        received = _run(sched, 50)
+    assert [m for m, _ in received] == list(range(50))
+    assert device.max_queued == 1
@@ -0,0 +1,96 @@
+# tests/test_preprocess_pool.py
+import threading
+import time
+
+import numpy as np
+
+from infer_backend import FakeInferDevice, InFlightScheduler
+from pipeline import Pipeline
+from preprocess import Preprocessor
+
+NET = 8
+
+
+def _frame(i):
+    # 원본 = net 크기 → 전처리는 색 변환만, 값은 채널과 무관하게 그대로 (프레임 번호 기록)
+    f = np.empty((NET, NET, 3), np.uint8)
+    f[...] = i % 251
+    f[0, 0, :] = (i // 251) % 251
+    return f
+
+
+def _tag(img):
+    return int(img[0, 0, 0]) * 251 + int(img[1, 1, 0])
+
+
+def test_release_returns_buffer_and_ignores_double_release():
+    pre = Preprocessor(NET, NET, pool=2)
+    a = pre(_frame(1))[0]
+    b = pre(_frame(2))[0]
+    assert a is not b
+    pre.release(a)
+    pre.release(a)                  # 두 번 반환해도 free 에는 한 번만
+    pre.release(np.zeros((NET, NET, 3), np.uint8))   # 모르는 배열은 무시
+    assert pre.stats() == {"free": 1, "buffers": 2, "grown": 0}
+    assert pre(_frame(3))[0] is a
+    c = pre(_frame(4))[0]           # 빈 버퍼 없음 → 덮어쓰지 않고 새로 만듦
+    assert c is not a and c is not b and pre.grown == 1
+
+
+def test_flooded_preprocess_never_overwrites_in_flight_input():
+    # 캡처가 장치보다 훨씬 빠르고, 장치 큐(1)가 차서 infer 스테이지가 submit 에서 막혀 있는 동안
+    # 전처리가 계속 돌아도 장치가 (send 뒤 늦게) 읽는 입력은 보낸 프레임 그대로여야 함
+    max_in_flight = 2
+    device = FakeInferDevice(latency=0.02, interval=0.01, queue_size=1,
+                             make_outputs=lambda img: {"tag": _tag(img)})
+    pre = Preprocessor(NET, NET, pool=max_in_flight + 3)
+    stop_event = threading.Event()
+    mismatches, received = [], []
+    counter = iter(range(10 ** 9))
+
+    def release_input(item):
+        img = item.pop("img", None)
+        if img is not None:
+            pre.release(img)
+
+    def capture(_):
+        time.sleep(0.0005)
+        i = next(counter)
+        return {"i": i, "frame": _frame(i)}
+
+    def preprocess(item):
+        item["img"] = pre(item["frame"])[0]
+        return item
+
+    def infer(item):
+        while not backend.submit(item["img"], item, timeout=0.05):
+            if stop_event.is_set():
+                release_input(item)
+                return None
+        return None
+
+    def collect(_):
+        got = backend.get(timeout=0.05)
+        if got is None:
+            return None
+        item, results = got
+        release_input(item)
+        if results["tag"] != item["i"]:
+            mismatches.append((item["i"], results["tag"]))
+        received.append(item["i"])
+        return None
+
+    with InFlightScheduler(device, max_in_flight=max_in_flight) as backend:
+        pipeline = Pipeline(stop_event)
+        pipeline.add_stage("capture", capture)
+        pipeline.add_stage("preprocess", preprocess)
+        pipeline.add_stage("infer", infer, on_drop=release_input)
+        pipeline.add_stage("collect", collect, source=True)
+        threading.Timer(1.0, stop_event.set).start()
+        pipeline.run(report_every=0)
+        dropped = pipeline.slots[1].stats()["overwritten"]
+
+    assert len(received) > 20
+    assert dropped > len(received)          # 전처리가 장치보다 훨씬 많이 돌았음
+    assert mismatches == []
+    assert pre.grown == 0
@@ -23,55 +23,43 @@ import torch
 from ultralytics import YOLO
 
 # ─────────────────────────────────────────────────────────────────────────────
-#  MJPEG 서버 (Flask) - 비디오(/video)만 송출
+#  MJPEG 서버 (Flask) - 비디오(/video) + 스트림 통계(/video/stats)
 # ─────────────────────────────────────────────────────────────────────────────
-from flask import Flask, Response
-app = Flask(__name__)
-_latest_jpeg = None
-_frame_lock = threading.Lock()
+from flask import Flask, Response, request
 
-def _encode_jpeg(frame, quality=80):
-    ok, buf = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), int(quality)])
-    return buf.tobytes() if ok else None
+# AI/common (MJPEG 스트리머, Hailo8/model/hailo_video.py 와 공용)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "common"))
+from mjpeg_stream import MJPEGStreamer, MJPEG_MIMETYPE
+app = Flask(__name__)
+# 새 프레임마다 한 번만 인코딩 → 접속한 클라이언트가 공유 (클라이언트 없으면 인코딩 안 함)
+streamer = MJPEGStreamer(quality=80, max_fps=30)
 
 def update_stream_frame(frame, quality=80):
     """
-    매 프레임마다 호출해서 /video 스트림에 뿌릴 최신 JPEG를 갱신
+    매 프레임마다 호출해서 /video 스트림에 뿌릴 최신 프레임을 갱신
+    (보는 클라이언트가 없거나 아직 보낼 시각이 아니면 인코딩 생략)
     """
-    global _latest_jpeg
-    jpg = _encode_jpeg(frame, quality=quality)
-    if jpg is None:
-        return
-    with _frame_lock:
-        _latest_jpeg = jpg
+    streamer.quality = int(quality)
+    streamer.publish(frame)
 
 @app.route("/video")
 def video_mjpeg():
     """
-    multipart/x-mixed-replace 로 계속 JPEG를 흘려보내는 MJPEG 엔드포인트
+    multipart/x-mixed-replace 로 새 JPEG 가 나올 때마다 흘려보내는 MJPEG 엔드포인트
+    /video?fps=5 → 클라이언트별 최대 FPS
+    """
+    return Response(
+        streamer.client_stream(max_fps=request.args.get("fps", type=float), name=request.remote_addr,
+                               sock=request.environ.get("werkzeug.socket")),
+        mimetype=MJPEG_MIMETYPE
+    )
+
+@app.route("/video/stats")
+def video_stats():
+    """
+    접속 클라이언트 수, 전송 bytes/sec, 인코딩 fps (JSON)
     """
-    def gen():
-        boundary = b"--frame\r\n"
-        while True:
-            with _frame_lock:
-                jpg = _latest_jpeg
-            if jpg is None:
-                time.sleep(0.02)
-                continue
-
-            # frame boundary
-            yield boundary
-            # headers
-            yield b"Content-Type: image/jpeg\r\n"
-            yield b"Content-Length: " + str(len(jpg)).encode() + b"\r\n\r\n"
-            # data
-            yield jpg
-            yield b"\r\n"
-
-            # 약 33 FPS 정도
-            time.sleep(0.03)
-
-    return Response(gen(), mimetype="multipart/x-mixed-replace; boundary=frame")
+    return Response(json.dumps(streamer.stats(), ensure_ascii=False), mimetype="application/json")
 
 def start_mjpeg_server(host="0.0.0.0", port=5055):
     """
@@ -302,6 +290,7 @@ def main(args):
     threading.Thread(target=cpu_temp_publisher, daemon=True).start()
 
     # MJPEG 서버 시작 (/video)
+    streamer.max_fps = args.stream_fps
     start_mjpeg_server(host="0.0.0.0", port=args.http_port)
 
     # ── YOLO 모델 로드
@@ -500,6 +489,12 @@ def parse_args():
         default=80,
         help="스트림 JPEG 품질(1-100)"
     )
+    p.add_argument(
+        "--stream-fps",
+        type=float,
+        default=30.0,
+        help="/video 클라이언트별 최대 FPS (클라이언트는 ?fps= 로 더 낮출 수 있음)"
+    )
 
     return p.parse_args()
 
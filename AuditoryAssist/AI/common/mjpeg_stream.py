@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MJPEG 스트리밍 (Flask /video 용, Hailo8/model/hailo_video.py 와 YOLOv8n/model/pt_video.py 공용)
+- 두 스크립트는 AI/common 을 sys.path 에 넣고 import (bench/ 스크립트의 model 경로 추가와 같은 방식)
+- publish(frame_bgr) : 새 프레임마다 호출. JPEG 인코딩은 프레임당 한 번만 하고 모든 클라이언트가 공유
+    접속한 클라이언트가 없으면 인코딩하지 않음
+    모든 클라이언트가 아직 다음 프레임을 받을 시각이 아니면(최대 FPS) 인코딩하지 않음
+- client_stream(max_fps) : 클라이언트 1명용 제너레이터 (Response 에 그대로 전달)
+    새 프레임이 들어올 때만 Condition 으로 깨어남 (같은 프레임을 다시 보내지 않음)
+    클라이언트별 최대 FPS, 밀린 프레임은 쌓지 않고 항상 최신 프레임만 전송
+    프레임 하나 보내는 데 slow_timeout 초 이상 걸리면 느린 클라이언트로 보고 연결 종료
+    (sock 을 주면 소켓 send 타임아웃으로 설정 → 아예 멈춘 클라이언트도 끊김)
+    (느린 클라이언트에게도 밀린 프레임은 쌓이지 않음 → 다른 클라이언트/추론 루프에 영향 없음)
+- stats() : 접속 수, 전송 bytes/sec, 인코딩 fps, 클라이언트별 전송/건너뛴 프레임 수
+
+    streamer = MJPEGStreamer(quality=80, max_fps=30, stop_event=stop_event)
+
+    @app.route("/video")
+    def video_feed():
+        return Response(streamer.client_stream(request.args.get("fps", type=float), request.remote_addr,
+                                               request.environ.get("werkzeug.socket")),
+                        mimetype=MJPEG_MIMETYPE)
+"""
+
+import itertools
+import threading
+import time
+
+import cv2
+
+MJPEG_MIMETYPE = "multipart/x-mixed-replace; boundary=frame"
+RATE_WINDOW = 5.0   # bytes/sec, 인코딩 fps 계산 구간 (초)
+
+
+class _Client:
+    __slots__ = ("id", "name", "interval", "next_due", "last_seq", "sent", "skipped", "bytes", "since")
+
+    def __init__(self, cid, name, interval, last_seq):
+        self.id = cid
+        self.name = name
+        self.interval = interval
+        self.next_due = 0.0
+        self.last_seq = last_seq
+        self.sent = 0
+        self.skipped = 0
+        self.bytes = 0
+        self.since = time.time()
+
+
+class MJPEGStreamer:
+
+    def __init__(self, quality=80, max_fps=30.0, slow_timeout=2.0, stop_event=None):
+        self.quality = int(quality)
+        self.max_fps = float(max_fps)
+        self.slow_timeout = float(slow_timeout)
+        self.stop_event = stop_event
+        self._cond = threading.Condition()
+        self._ids = itertools.count(1)
+        self._clients = {}
+        self._seq = 0
+        self._part = None
+        self._closed = False
+        # 통계
+        self.frames_encoded = 0
+        self.frames_idle = 0        # 클라이언트 없음 / 받을 클라이언트 없음 → 인코딩 생략
+        self.clients_dropped = 0
+        self.bytes_total = 0
+        self._window_bytes = 0
+        self._window_frames = 0
+        self._window_start = time.monotonic()
+        self._rates = (0, 0.0)      # 직전 구간 (bytes/sec, 인코딩 fps)
+
+    # ── 생산자 ─────────────────────────────
+    def publish(self, frame_bgr):
+        """새 프레임 전달. 실제로 인코딩했으면 True"""
+        now = time.monotonic()
+        with self._cond:
+            if not self._clients or now < min(c.next_due for c in self._clients.values()):
+                self.frames_idle += 1
+                return False
+        ok, buf = cv2.imencode(".jpg", frame_bgr, [int(cv2.IMWRITE_JPEG_QUALITY), self.quality])
+        if not ok:
+            return False
+        jpg = buf.tobytes()
+        # 헤더까지 붙인 part 를 한 번 만들어 모든 클라이언트가 그대로 씀
+        part = (b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: "
+                + str(len(jpg)).encode() + b"\r\n\r\n" + jpg + b"\r\n")
+        with self._cond:
+            self._seq += 1
+            self._part = part
+            self.frames_encoded += 1
+            self._window_frames += 1
+            self._cond.notify_all()
+        return True
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _stopped(self):
+        return self._closed or (self.stop_event is not None and self.stop_event.is_set())
+
+    # ── 클라이언트 ─────────────────────────
+    def client_count(self):
+        with self._cond:
+            return len(self._clients)
+
+    def client_stream(self, max_fps=None, name="", sock=None):
+        """
+        클라이언트 1명에게 multipart JPEG 를 보내는 제너레이터
+        max_fps: 클라이언트 요청 FPS (서버 max_fps 를 넘을 수 없음, None/0 이면 서버 값)
+        sock   : 클라이언트 소켓 (werkzeug 개발 서버는 environ["werkzeug.socket"])
+        """
+        if sock is not None:
+            try:
+                sock.settimeout(self.slow_timeout)
+            except OSError:
+                pass
+        fps = min(float(max_fps), self.max_fps) if max_fps else self.max_fps
+        interval = 1.0 / fps if fps > 0 else 0.0
+        with self._cond:
+            # 접속 전에 만든 (오래된) 프레임은 보내지 않고 다음 새 프레임부터
+            client = _Client(next(self._ids), name, interval, self._seq)
+            self._clients[client.id] = client
+        print(f"📺 MJPEG 클라이언트 접속: #{client.id} {name} (최대 {fps:.0f}fps)")
+        try:
+            while True:
+                with self._cond:
+                    while self._seq == client.last_seq and not self._stopped():
+                        self._cond.wait(0.5)
+                    if self._stopped():
+                        return
+                    seq, part = self._seq, self._part
+                if client.last_seq:
+                    client.skipped += seq - client.last_seq - 1
+                client.last_seq = seq
+
+                t0 = time.monotonic()
+                try:
+                    yield part     # 소켓에 다 쓸 때까지 여기서 멈춤
+                except GeneratorExit:
+                    # 쓰는 중 소켓 타임아웃으로 서버가 연결을 닫은 경우
+                    if time.monotonic() - t0 >= self.slow_timeout:
+                        with self._cond:
+                            self.clients_dropped += 1
+                        print(f"🐢 MJPEG 클라이언트 #{client.id} 전송 타임아웃 → 연결 종료")
+                    raise
+                sent_in = time.monotonic() - t0
+
+                with self._cond:
+                    client.sent += 1
+                    client.bytes += len(part)
+                    self.bytes_total += len(part)
+                    self._window_bytes += len(part)
+                    client.next_due = t0 + client.interval
+                if sent_in > self.slow_timeout:
+                    with self._cond:
+                        self.clients_dropped += 1
+                    print(f"🐢 MJPEG 클라이언트 #{client.id} 전송 지연 {sent_in:.1f}s → 연결 종료")
+                    return
+
+                # 최대 FPS: 다음 전송 시각까지 대기 (그 사이 새 프레임은 최신 것만 남음)
+                delay = client.next_due - time.monotonic()
+                if delay > 0:
+                    if self.stop_event is not None:
+                        self.stop_event.wait(delay)
+                    else:
+                        time.sleep(delay)
+        finally:
+            with self._cond:
+                self._clients.pop(client.id, None)
+            print(f"📺 MJPEG 클라이언트 종료: #{client.id} (전송 {client.sent}, 건너뜀 {client.skipped})")
+
+    # ── 통계 ──────────────────────────────
+    def stats(self):
+        """bytes/sec, 인코딩 fps 는 최근 RATE_WINDOW 초 (짧으면 직전 구간) 기준"""
+        with self._cond:
+            now = time.monotonic()
+            elapsed = now - self._window_start
+            if elapsed >= 1.0:
+                self._rates = (int(self._window_bytes / elapsed), round(self._window_frames / elapsed, 2))
+            if elapsed >= RATE_WINDOW:
+                self._window_bytes = 0
+                self._window_frames = 0
+                self._window_start = now
+            bps, fps = self._rates
+            return {"clients": len(self._clients), "bytes_per_sec": bps, "encode_fps": fps,
+                    "frames_encoded": self.frames_encoded, "frames_idle": self.frames_idle,
+                    "clients_dropped": self.clients_dropped, "bytes_total": self.bytes_total,
+                    "per_client": [{"id": c.id, "name": c.name,
+                                    "max_fps": round(1.0 / c.interval, 1) if c.interval else None,
+                                    "sent": c.sent, "skipped": c.skipped, "bytes": c.bytes,
+                                    "connected_sec": round(time.time() - c.since, 1)}
+                                   for c in self._clients.values()]}
+
+    def format_stats(self):
+        st = self.stats()
+        return (f"📺 MJPEG | 클라이언트 {st['clients']} | 인코딩 {st['encode_fps']:.1f}fps | "
+                f"{st['bytes_per_sec'] / 1024:.0f}KB/s | 느려서 종료 {st['clients_dropped']}")
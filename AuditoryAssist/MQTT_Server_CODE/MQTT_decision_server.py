@@ -1,13 +1,32 @@
 # MQTT_decision_server.py
-import json, time, socket, datetime
-from collections import defaultdict, deque
+import os, time, socket, datetime, atexit, logging
 import paho.mqtt.client as mqtt
-
-from handler_registry import HANDLER_NAME_MAP
+from paho.mqtt.subscribeoptions import SubscribeOptions
+
+import codec
+from handler_registry import HANDLER_NAME_MAP, TOPIC_HANDLER_MAP, register_topic, state_lock
+from dispatcher import HandlerDispatcher
+from topic_router import TopicRouter
+from log_store import LogStore
+from log_pipeline import LogPipeline
+from fusion_rules import FusionRules
+from config_watch import ConfigWatcher, load_sensor_config, diff_sensor_config
+from fanout import fan_out
+from publish_meter import PublishMeter
+from ingress import IngressFilter
+from timeseries import TimeSeriesStore
+from metrics import Counter, Gauge, Histogram, start_http_server
+from scheduler import scheduler
+from logging_setup import setup_logging, get_logger, add_sink, shutdown_logging, logging_stats
+setup_logging()   # 핸들러 모듈 로드 로그부터 같은 파이프라인으로
 import handlers
 _ = handlers.__name__  # ensure handlers loaded
 
-from firebase.firebase_utils import save_fcm_token
+from firebase.firebase_utils import save_fcm_token, push_stats, close_token_stores
+
+logger = get_logger("server")
+srvlog = get_logger("srvlog")       # log_publish 기록 (콘솔 레벨과 무관하게 sink 까지 전달)
+srvlog.setLevel(logging.DEBUG)
 
 # ── Broker / Topics ──────────────────────────────────────────────────────
 BROKER_IP   = "192.168.0.24"
@@ -20,29 +39,83 @@ STATUS_SERVER   = "interfaceui/status/server"
 REG_REQUEST     = "interfaceui/registry/request"
 HELLO_SERVER    = "interfaceui/registry/hello/server"
 PUSH_REGISTER   = "interfaceui/push/register"
+SERIES_REQUEST  = "interfaceui/sensors/request"
+SERIES_PREFIX   = "interfaceui/sensors/history"   # interfaceui/sensors/history/<sensor_id>
 
 # logs
 LOG_STREAM_PREFIX  = "interfaceui/logs"
 LOG_HISTORY_REQ    = "interfaceui/logs/request"
 LOG_HISTORY_PREFIX = "interfaceui/logs/history"
+SERVER_LOG_TOPIC   = f"{LOG_STREAM_PREFIX}/server/server"   # 이 토픽은 서버만 publish
+# 로그는 interfaceui/logs/# 하나로 구독 (디바이스 type 을 미리 정해 두지 않음, 히스토리 요청 포함)
+# MQTT v5 No Local 구독 → 서버 자신이 보낸 것(server 로그, 히스토리 응답)은 브로커가 되돌려 보내지 않음
+LOG_SUBSCRIBE      = f"{LOG_STREAM_PREFIX}/#"
+LOG_SUBSCRIBE_OPTS = SubscribeOptions(qos=1, noLocal=True)
+# 다른 클라이언트가 서버 토픽으로 보낸 것 (No Local 대상 아님) 은 on_message 첫 줄에서 파싱 없이 버림
+OWN_LOG_PREFIXES   = (f"{LOG_STREAM_PREFIX}/server/", f"{LOG_HISTORY_PREFIX}/")
+MQTT_PROTOCOL      = mqtt.MQTTv5   # No Local 구독 옵션은 v5 에만 있음
 
 # Devices
 VIBRATOR_TOPIC_PREFIX = "vibrator"   # vibrator/Vibrator_1
 BEACON_TOPIC_PREFIX   = "beacon"     # ✅ beacon/Beacon_1  (신규)
 
-VERBOSE_PUBLISH_LOG = False
+VERBOSE_PUBLISH_LOG  = False
+PUBLISH_SAMPLE_EVERY = 10     # verbose 일 때 N 건 중 1건만 payload 기록
+
+HELLO_INTERVAL_SEC     = 60
+HEARTBEAT_INTERVAL_SEC = 60
+ALERT_DURATION_MS      = 10000
+ALERT_STOP_MARGIN_SEC  = 2.0   # 장치가 스스로 멈추지 못했을 때를 대비한 stop 재전송 여유
+
+# 로그 저장소 (재시작해도 히스토리 유지). DECISION_LOG_DB 로 경로 변경 (bench/tests 는 임시 경로)
+LOG_DB_PATH          = os.environ.get("DECISION_LOG_DB", "server_logs.sqlite3")
+LOG_RETENTION_SEC    = 7 * 24 * 3600
+LOG_MAX_ROWS_PER_KEY = 20000
+
+# 서버 로그 MQTT 송출: LOG_PUBLISH_INTERVAL 마다 모아서 토픽별로 최대 LOG_BATCH_MAX 건을 JSON 배열 1프레임으로
+# (그 사이 1건뿐이면 예전처럼 JSON 객체 그대로 → 앱은 프레임이 '[' 로 시작하면 배열로 파싱)
+LOG_PUBLISH_INTERVAL = 0.2
+LOG_BATCH_MAX        = 50
+
+# 센서 입구 필터: 상태 변화 없는 반복 보고는 핸들러 dispatch 전에 버림
+INGRESS_DEDUP_WINDOW_SEC   = 30.0    # 같은 위험 status 반복 무시 구간
+INGRESS_STEADY_REFRESH_SEC = 300.0   # "정상" 유지 중이면 이 주기로 1건만 통과
+INGRESS_RATE_PER_SEC       = 1.0     # 센서별 토큰 버킷
+INGRESS_BURST              = 5
+
+# 센서 값 시계열 (timeseries.py, 센서당 고정 ≈120KB)
+SERIES_MAX_SENSORS = 64
+SERIES_MAX_POINTS  = 1440   # 요청 1건 응답 상한
+
+# 메트릭 HTTP 엔드포인트 (text exposition format, 로컬 전용)
+METRICS_ADDR = "127.0.0.1"
+METRICS_PORT = 9108
+
+# 핸들러 워커 풀 (네트워크 스레드는 파싱/적재만 담당)
+DISPATCH_WORKERS    = 4
+DISPATCH_QUEUE_SIZE = 256
 
 # ── Load sensor mapping ──────────────────────────────────────────────────
-with open("MQTT_config.json", "r", encoding="utf-8") as f:
-    config = json.load(f)
+# 실행 중에도 CONFIG_RELOAD_SEC 마다 mtime 을 확인해 바뀐 토픽만 재구독
+CONFIG_PATH            = "MQTT_config.json"
+CONFIG_RELOAD_SEC      = 2.0
+CONFIG_UNSUB_GRACE_SEC = 2.0   # 구독 해제한 토픽의 전송 중 메시지를 옛 설정으로 처리하는 유예
+
+config = load_sensor_config(CONFIG_PATH, HANDLER_NAME_MAP)
 MQTT_TOPICS = list(config.keys())
+config_watcher = ConfigWatcher(CONFIG_PATH, HANDLER_NAME_MAP)
+
+def _participants(sensor_config):
+    return [cfg["sensor_id"] for cfg in sensor_config.values()
+            if cfg.get("participates_in_alltrue", True) and cfg.get("sensor_id")]
 
 # ALL-TRUE participants
-MQTT_event_status = {
-    cfg["sensor_id"]: False
-    for cfg in config.values()
-    if cfg.get("participates_in_alltrue", True)
-}
+MQTT_event_status = {sid: False for sid in _participants(config)}
+
+# 융합 규칙 (MQTT_config.json 옆의 fusion_rules.json, 없으면 기존 ALL-TRUE 규칙)
+FUSION_RULES_PATH   = "fusion_rules.json"
+FUSION_RELOAD_SEC   = 2.0
+fusion = FusionRules(FUSION_RULES_PATH, participants=list(MQTT_event_status))
 
 # ── Runtime context ──────────────────────────────────────────────────────
 def _get_local_ip():
@@ -59,12 +132,44 @@ userdata = {
     "devices": ["Neopixel_1", "Neopixel_2"],
     "vib_devices": ["Vibrator_1"],
     "beacon_devices": ["Beacon_1"],     # ✅ 경광등 장치 목록
+    # True: 모든 램프/진동기가 그룹 토픽(neopixel/ALL, vibrator/broadcast)을 구독할 때
+    #       브로드캐스트를 장치 수와 무관하게 publish 1건으로 보냄
+    "use_group_topics": False,
     "default_command": "fire_confirmed",
     "sensor_status": MQTT_event_status,
     "just_triggered": False,
     "server_ip": _get_local_ip(),
 }
 
+ingress = IngressFilter(dedup_window_sec=INGRESS_DEDUP_WINDOW_SEC,
+                        steady_refresh_sec=INGRESS_STEADY_REFRESH_SEC,
+                        rate_per_sec=INGRESS_RATE_PER_SEC, burst=INGRESS_BURST)
+
+series = TimeSeriesStore(max_sensors=SERIES_MAX_SENSORS)
+
+# sensor_status / just_triggered 는 여러 워커가 공유 → 상태 변경 구간만 직렬화 (handlers 와 같은 lock)
+_state_lock = state_lock
+
+dispatcher = HandlerDispatcher(workers=DISPATCH_WORKERS, queue_size=DISPATCH_QUEUE_SIZE)
+
+# ── Metrics ──────────────────────────────────────────────────────────────
+M_MESSAGES      = Counter("decision_messages_total", "수신 MQTT 메시지 수 (라우팅 결과별)", ["route"])
+M_ON_MESSAGE    = Histogram("decision_on_message_seconds", "on_message 처리 시간 (파싱 + 라우팅 + 적재)",
+                            buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05))
+M_LOG_RECORDS   = Counter("decision_log_records_total", "log_publish 기록 수", ["level"])
+M_HISTORY       = Histogram("decision_history_query_seconds", "히스토리 요청 처리 시간")
+M_HISTORY_ITEMS = Counter("decision_history_items_total", "히스토리 응답 항목 수")
+M_SERIES        = Counter("decision_series_points_total", "시계열에 기록한 센서 값 수")
+M_INGRESS       = Counter("decision_ingress_collapsed_total", "입구 필터에서 버린 센서 메시지 수", ["reason"])
+M_CONNECTS      = Counter("decision_mqtt_connects_total", "브로커 연결(재연결 포함) 횟수")
+M_LOOP_ERRORS   = Counter("decision_mqtt_loop_errors_total", "MQTT 루프 예외(재연결 대기) 횟수")
+
+_m_sensor   = M_MESSAGES.labels("sensor")
+_m_builtin  = M_MESSAGES.labels("builtin")
+_m_unrouted = M_MESSAGES.labels("unrouted")
+_m_echo     = M_MESSAGES.labels("echo")
+_m_error    = M_MESSAGES.labels("error")
+
 # ── Time helpers ─────────────────────────────────────────────────────────
 def _now_ts_ms() -> int:
     return int(time.time() * 1000)
@@ -73,8 +178,8 @@ def _now_iso() -> str:
     return datetime.datetime.now().astimezone().isoformat(timespec="seconds")
 
 # ── Status / Hello ───────────────────────────────────────────────────────
-def _status_payload(online: bool) -> str:
-    return json.dumps({
+def _status_payload(online: bool) -> bytes:
+    return codec.dumps({
         "id": "server", "name": "중앙 관리 서버",
         "type": "server", "status": "online" if online else "offline",
         "ts": int(time.time()),
@@ -82,8 +187,8 @@ def _status_payload(online: bool) -> str:
         "iso": _now_iso(),
     })
 
-def _hello_payload() -> str:
-    return json.dumps({
+def _hello_payload() -> bytes:
+    return codec.dumps({
         "id": "server", "name": "중앙 관리 서버", "type": "server",
         "ip": userdata.get("server_ip", ""),
         "ts": int(time.time()),
@@ -92,36 +197,66 @@ def _hello_payload() -> str:
     })
 
 def publish_server_status(client, online: bool):
-    print(f"📣 STATUS publish → {STATUS_SERVER} : online={online}")
+    logger.info("📣 STATUS publish → %s : online=%s", STATUS_SERVER, online)
     client.publish(STATUS_SERVER, _status_payload(online), qos=1, retain=True)
 
 def publish_server_hello(client):
     payload = _hello_payload()
-    print(f"📣 HELLO publish → {HELLO_SERVER} : {payload}")
+    logger.info("📣 HELLO publish → %s : %s", HELLO_SERVER, payload.decode())
     client.publish(HELLO_SERVER, payload, qos=1, retain=True)
 
 # ── Log stream ───────────────────────────────────────────────────────────
-_RING_MAX = 2000
-ring = defaultdict(lambda: deque(maxlen=_RING_MAX))
+log_store = LogStore(LOG_DB_PATH, max_age_sec=LOG_RETENTION_SEC,
+                     max_rows_per_key=LOG_MAX_ROWS_PER_KEY)
+log_pipeline = LogPipeline(batch_max=LOG_BATCH_MAX)
 
-def _log_key(typ: str, id_: str) -> str:
-    return f"{typ}|{id_}"
+class _SrvLogSink(logging.Handler):
+    """srvlog 레코드 → SQLite 저장 + MQTT 송출 큐 (log_publish 호출 스레드에서 실행, 둘 다 메모리 적재만)"""
 
-def log_publish(client, *, typ: str, id_: str, level: str, msg: str, **extra):
+    def emit(self, record):
+        rec = getattr(record, "rec", None)
+        if rec is None:
+            return
+        data = codec.dumps(rec)     # 저장/송출 공용 1회 직렬화
+        log_store.append(rec["type"], rec["id"], rec, data)
+        log_pipeline.enqueue(record.topic, rec, stream=record.stream, data=data)
+
+add_sink(_SrvLogSink())
+# atexit 은 역순 실행 → 콘솔 로깅 큐를 먼저 비우고 DB 를 닫는다
+atexit.register(log_store.close)
+atexit.register(shutdown_logging)
+atexit.register(close_token_stores)   # FCM 토큰 WAL → 스냅샷 합치기
+
+_LEVELS = {"debug": logging.DEBUG, "info": logging.INFO, "warn": logging.WARNING,
+           "warning": logging.WARNING, "error": logging.ERROR}
+
+def log_publish(client, *, typ: str, id_: str, level: str, msg: str, stream=True, **extra):
+    """
+    서버 로그 1건 → 로깅 파이프라인 (콘솔 + SQLite 저장 + MQTT 송출 큐 공용)
+    stream=False 면 히스토리에만 남기고 MQTT 로는 내보내지 않음
+    """
     rec = {
         "id": id_, "type": typ, "level": level, "msg": msg,
         "ts": int(time.time()), "ts_ms": _now_ts_ms(), "iso": _now_iso(),
     }
     if extra: rec.update(extra)
     topic = f"{LOG_STREAM_PREFIX}/{typ}/{id_}"
-    client.publish(topic, json.dumps(rec), qos=0, retain=False)
-    ring[_log_key(typ, id_)].append(rec)
-    try:
-        extra_view = {k: v for k, v in rec.items()
-                      if k not in ("type","id","level","msg","ts","ts_ms","iso")}
-        print(f"[srvlog][{level}] {msg} → {topic} {json.dumps(extra_view)}")
-    except Exception:
-        pass
+    srvlog.log(_LEVELS.get(level, logging.INFO), "[srvlog] %s → %s", msg, topic,
+               extra={"rec": rec, "topic": topic, "stream": stream, "fields": extra})
+    M_LOG_RECORDS.labels(level).inc()
+
+# ── Publish 계측 ─────────────────────────────────────────────────────────
+def _trace_publish(client, topic, payload, qos, retain):
+    preview = payload.decode() if isinstance(payload, (bytes, bytearray)) else str(payload)
+    log_publish(client, typ="server", id_="server", level="debug",
+                msg="publish", topic=topic, qos=qos, retain=retain,
+                payload=(preview[:200] if preview else ""))
+
+# 로그/히스토리(interfaceui/logs/...)와 status/hello 는 샘플링 제외
+publish_meter = PublishMeter(verbose=VERBOSE_PUBLISH_LOG, sample_every=PUBLISH_SAMPLE_EVERY,
+                             exclude_prefixes=(LOG_STREAM_PREFIX,),
+                             exclude_topics=(STATUS_SERVER, HELLO_SERVER),
+                             on_sample=_trace_publish)
 
 # ── Vibrator publishers ──────────────────────────────────────────────────
 def publish_vibrate_fire_alert(client, context, *, duration_ms=10000, on_ms=400, off_ms=200, intensity=0.85):
@@ -137,20 +272,19 @@ def publish_vibrate_fire_alert(client, context, *, duration_ms=10000, on_ms=400,
         "sensor_id": "all_true",
         "issuer": "decision_server",
     }
-    for dev in vib_list:
-        topic = f"{VIBRATOR_TOPIC_PREFIX}/{dev}"
-        client.publish(topic, json.dumps(payload), qos=1, retain=False)
-        log_publish(client, typ="server", id_="server", level="info",
-                    msg="vibrator command sent", target=dev, payload=payload)
+    topics = fan_out(client, VIBRATOR_TOPIC_PREFIX, vib_list, payload,
+                     use_group=context.get("use_group_topics", False))
+    log_publish(client, typ="server", id_="server", level="info",
+                msg="vibrator command sent", targets=vib_list, topics=topics, payload=payload)
+
+_VIBRATE_STOP = codec.dumps({"command": "vibrate_stop", "issuer": "decision_server"})   # 고정 payload
 
 def publish_vibrate_stop(client, context):
     vib_list = context.get("vib_devices") or ["Vibrator_1"]
-    payload = {"command": "vibrate_stop", "issuer": "decision_server"}
-    for dev in vib_list:
-        topic = f"{VIBRATOR_TOPIC_PREFIX}/{dev}"
-        client.publish(topic, json.dumps(payload), qos=1, retain=False)
-        log_publish(client, typ="server", id_="server", level="debug",
-                    msg="vibrator stop sent", target=dev)
+    topics = fan_out(client, VIBRATOR_TOPIC_PREFIX, vib_list, _VIBRATE_STOP,
+                     use_group=context.get("use_group_topics", False))
+    log_publish(client, typ="server", id_="server", level="debug",
+                msg="vibrator stop sent", targets=vib_list, topics=topics)
 
 # ── Beacon publishers (신규) ─────────────────────────────────────────────
 def publish_beacon_fire_alert(client, context, *, duration_ms=10000, on_ms=250, off_ms=250):
@@ -165,71 +299,99 @@ def publish_beacon_fire_alert(client, context, *, duration_ms=10000, on_ms=250,
         "sensor_id": "all_true",
         "issuer": "decision_server",
     }
-    for dev in beacons:
-        topic = f"{BEACON_TOPIC_PREFIX}/{dev}"
-        client.publish(topic, json.dumps(payload), qos=1, retain=False)
-        log_publish(client, typ="server", id_="server", level="info",
-                    msg="beacon command sent", target=dev, payload=payload)
+    topics = fan_out(client, BEACON_TOPIC_PREFIX, beacons, payload)
+    log_publish(client, typ="server", id_="server", level="info",
+                msg="beacon command sent", targets=beacons, topics=topics, payload=payload)
+
+_BEACON_STOP = codec.dumps({"command": "beacon_stop", "issuer": "decision_server"})
 
 def publish_beacon_stop(client, context):
     beacons = context.get("beacon_devices") or ["Beacon_1"]
-    payload = {"command": "beacon_stop", "issuer": "decision_server"}
-    for dev in beacons:
-        topic = f"{BEACON_TOPIC_PREFIX}/{dev}"
-        client.publish(topic, json.dumps(payload), qos=1, retain=False)
-        log_publish(client, typ="server", id_="server", level="debug",
-                    msg="beacon stop sent", target=dev)
+    topics = fan_out(client, BEACON_TOPIC_PREFIX, beacons, _BEACON_STOP)
+    log_publish(client, typ="server", id_="server", level="debug",
+                msg="beacon stop sent", targets=beacons, topics=topics)
 
 # ── ALL-TRUE broadcaster ─────────────────────────────────────────────────
-def all_True_publisher(client, context):
-    print(f"🧪 sensor_status: {context['sensor_status']}")
-    if context["sensor_status"] and all(context["sensor_status"].values()):
-        print("🚨 ALL-TRUE detected")
-        log_publish(client, typ="server", id_="server", level="info",
-                    msg="ALL-TRUE detected → red_blink 10s + vibrator 10s + beacon 10s",
-                    sensor_status=dict(context["sensor_status"]))
-        # 1) 네오픽셀: red_blink 10s
-        cmd = {"command": context["default_command"], "sensor_id": "all_true", "alert": True, "issuer": "decision_server"}
-        for dev in (context.get("devices") or ["Neopixel_1"]):
-            client.publish(f"neopixel/{dev}", json.dumps(cmd), qos=1, retain=False)
-            log_publish(client, typ="server", id_="server", level="debug",
-                        msg="command sent to device", target=dev, command=context["default_command"])
-        # 2) 진동 디바이스 10s
-        publish_vibrate_fire_alert(client, context, duration_ms=10000, on_ms=400, off_ms=200, intensity=0.85)
-        # 3) ✅ 경광등 10s 점멸
-        publish_beacon_fire_alert(client, context, duration_ms=10000, on_ms=250, off_ms=250)
-
-        # reset snapshot
-        for k in context["sensor_status"]:
-            context["sensor_status"][k] = False
-        context["just_triggered"] = False
-        log_publish(client, typ="server", id_="server", level="debug",
-                    msg="ALL-TRUE flags reset", sensor_status=dict(context["sensor_status"]))
+def evaluate_fusion(client, context, sensor_id):
+    """
+    방금 처리된 센서 이벤트 1건만 규칙 엔진에 반영 (관련 규칙만 갱신)
+    핸들러가 sensor_status 에 True 를 남겼으면 감지, 남기지 않았거나 False 면(정상 보고) 해제
+    ALL-TRUE 참여 센서만 호출 (_run_sensor_handler)
+    판정과 발화 시 상태 리셋만 _state_lock 안에서, 장치 명령 publish 는 lock 밖에서
+    """
+    with _state_lock:
+        on = context["sensor_status"].get(sensor_id, False)
+        fired = fusion.engine.observe(sensor_id, on)
+        snapshot = dict(context["sensor_status"])
+        if fired:
+            _reset_fusion_state(context)
+    logger.debug("🧪 sensor_status: %s", snapshot)
+    if fired:
+        all_True_publisher(client, context, rule=fired[0].name, sensor_status=snapshot)
+
+def _reset_fusion_state(context):
+    """ALL-TRUE 발화 후 플래그/규칙 상태 초기화 (_state_lock 안에서 호출)"""
+    for k in context["sensor_status"]:
+        context["sensor_status"][k] = False
+    context["just_triggered"] = False
+    fusion.engine.reset()
+
+def all_True_publisher(client, context, rule="all_true", sensor_status=None):
+    """sensor_status: 발화 시점 스냅샷 (evaluate_fusion 이 리셋 전에 떠 둔 것)"""
+    if sensor_status is None:
+        with _state_lock:
+            sensor_status = dict(context["sensor_status"])
+            _reset_fusion_state(context)
+    logger.warning("🚨 ALL-TRUE detected (rule=%s)", rule)
+    log_publish(client, typ="server", id_="server", level="info",
+                msg="ALL-TRUE detected → red_blink 10s + vibrator 10s + beacon 10s",
+                rule=rule, sensor_status=sensor_status)
+    # 1) 네오픽셀: red_blink 10s
+    cmd = {"command": context["default_command"], "sensor_id": "all_true", "alert": True, "issuer": "decision_server"}
+    devices = context.get("devices") or ["Neopixel_1"]
+    topics = fan_out(client, "neopixel", devices, cmd,
+                     use_group=context.get("use_group_topics", False))
+    log_publish(client, typ="server", id_="server", level="debug",
+                msg="command sent to device", targets=devices, topics=topics,
+                command=context["default_command"])
+    # 2) 진동 디바이스 10s
+    publish_vibrate_fire_alert(client, context, duration_ms=ALERT_DURATION_MS, on_ms=400, off_ms=200, intensity=0.85)
+    # 3) ✅ 경광등 10s 점멸
+    publish_beacon_fire_alert(client, context, duration_ms=ALERT_DURATION_MS, on_ms=250, off_ms=250)
+    # 4) 알림 종료 시점에 stop 한 번 더 (재발화 시 같은 key 로 연장)
+    stop_after = ALERT_DURATION_MS / 1000.0 + ALERT_STOP_MARGIN_SEC
+    scheduler.call_later(stop_after, publish_vibrate_stop, client, context, key="vibrator_stop")
+    scheduler.call_later(stop_after, publish_beacon_stop, client, context, key="beacon_stop")
+
+    # 플래그는 이미 리셋됨 (_reset_fusion_state) → 다음 위험 보고는 다시 받아야 함
+    ingress.forget()
+    log_publish(client, typ="server", id_="server", level="debug",
+                msg="ALL-TRUE flags reset", sensor_status={k: False for k in sensor_status})
 
 # ── App → Neopixel forwarding ────────────────────────────────────────────
 def forward_mood_to_neopixel(client, raw: dict, context):
     try:
         if raw.get("command") != "set_mood":
-            print("❌ not set_mood:", raw); return
+            logger.warning("❌ not set_mood: %s", raw); return
         hex_color = str(raw.get("color", "#FFFFFF")).strip().upper()
         if not (hex_color.startswith("#") and len(hex_color) == 7):
-            print("❌ bad color:", hex_color); return
+            logger.warning("❌ bad color: %s", hex_color); return
         brightness = int(raw.get("brightness", 255))
         if not (0 <= brightness <= 255):
-            print("❌ bad brightness:", brightness); return
+            logger.warning("❌ bad brightness: %s", brightness); return
 
         target = raw.get("target")
         targets = [target] if target else (context.get("devices") or ["Neopixel_1"])
         payload = {"command": "set_mood", "color": hex_color, "brightness": brightness, "issuer": "decision_server"}
-        for dev in targets:
-            topic = f"neopixel/{dev}"
-            client.publish(topic, json.dumps(payload), qos=1, retain=False)
-            print(f"📤 set_mood → {topic} : {payload}")
-            log_publish(client, typ="server", id_="server",
-                        level="info", msg="forward set_mood",
-                        target=dev, color=hex_color, brightness=brightness)
+        # 특정 target 지정 시에는 그룹 토픽을 쓰지 않음
+        topics = fan_out(client, "neopixel", targets, payload,
+                         use_group=not target and context.get("use_group_topics", False))
+        logger.info("📤 set_mood → %s : %s", topics, payload)
+        log_publish(client, typ="server", id_="server",
+                    level="info", msg="forward set_mood",
+                    targets=targets, topics=topics, color=hex_color, brightness=brightness)
     except Exception as e:
-        print("❌ forward error:", e)
+        logger.error("❌ forward error: %s", e)
         log_publish(client, typ="server", id_="server",
                     level="error", msg="mood forward error", error=str(e))
 
@@ -239,192 +401,390 @@ def handle_history_request(client, payload: dict):
     req_type = str(payload.get("type") or ("server" if req_id == "server" else "subscriber"))
     limit    = int(payload.get("limit", 200))
     limit    = 50 if limit < 1 else (1000 if limit > 1000 else limit)
+    # 다음 페이지는 응답의 next ({"before_ts", "before_id"}) 를 그대로 다시 보냄
     before   = payload.get("before_ts")
+    before_id = payload.get("before_id")
 
-    buf = list(ring.get(_log_key(req_type, req_id), []))
-    if before:
-        buf = [r for r in buf if r.get("ts", 0) < int(before)]
-    items = buf[-limit:]
+    t0 = time.perf_counter()
+    items, nxt = log_store.query_page(req_type, req_id, limit, before_ts=before,
+                                      before_id=before_id, raw=True)
 
+    # 저장된 JSON 문자열을 파싱 없이 items 배열로 이어 붙임
     resp_topic = f"{LOG_HISTORY_PREFIX}/{req_type}/{req_id}"
-    print(f"📤 history resp → {resp_topic} ({len(items)} items)")
-    client.publish(resp_topic, json.dumps({"id": req_id, "type": req_type, "items": items}), qos=0, retain=False)
+    logger.info("📤 history resp → %s (%d items)", resp_topic, len(items))
+    head = codec.dumps({"id": req_id, "type": req_type, "next": nxt})[:-1]
+    client.publish(resp_topic, head + b',"items":' + codec.join_array(items) + b"}", qos=0, retain=False)
+    M_HISTORY.observe(time.perf_counter() - t0)
+    M_HISTORY_ITEMS.inc(len(items))
 
     log_publish(client, typ="server", id_="server", level="debug",
                 msg="history served", target=req_id, target_type=req_type,
-                count=len(items), before_ts=before, limit=limit)
+                count=len(items), before_ts=before, before_id=before_id, limit=limit)
 
-# ── Callbacks ────────────────────────────────────────────────────────────
-def on_message(client, context, msg):
+# ── Sensor series handler ────────────────────────────────────────────────
+def handle_series_request(client, payload: dict):
+    """{"sensor_id", "res": "1s|1m|1h", "since", "until", "limit"} → interfaceui/sensors/history/<sensor_id>"""
+    sid   = str(payload.get("sensor_id") or "")
+    res   = str(payload.get("res") or "1m")
+
+    resp = {"sensor_id": sid, "res": res, "points": [], "last": None}
     try:
-        topic = msg.topic
-        raw = msg.payload.decode(errors="ignore") if msg.payload else ""
-        payload = json.loads(raw) if raw and raw[0] in "{[" else {"text": raw}
-
-        if not topic.startswith(f"{LOG_STREAM_PREFIX}/") and not topic.startswith(f"{LOG_HISTORY_PREFIX}/"):
-            preview = raw if isinstance(raw, str) else str(payload)
-            log_publish(client, typ="server", id_="server", level="debug",
-                        msg="recv", topic=topic, payload=(preview[:200] if preview else ""))
-
-        if topic.startswith(f"{LOG_STREAM_PREFIX}/"):
-            parts = topic.split("/", 4)
-            if len(parts) >= 4:
-                typ, id_ = parts[2], parts[3]
-                rec = payload if isinstance(payload, dict) else {"msg": payload}
-                rec.setdefault("id", id_); rec.setdefault("type", typ)
-                rec.setdefault("level", "info")
-                rec.setdefault("ts", int(time.time()))
-                rec.setdefault("ts_ms", _now_ts_ms())
-                rec.setdefault("iso", _now_iso())
-                ring[_log_key(typ, id_)].append(rec)
-            return
+        # 숫자가 아닌 limit/since/until (문자열, 리스트 …) 은 예외 대신 error 응답
+        limit = int(payload.get("limit", 120))
+        limit = 1 if limit < 1 else (SERIES_MAX_POINTS if limit > SERIES_MAX_POINTS else limit)
+        since, until = payload.get("since"), payload.get("until")
+        since = None if since is None else float(since)
+        until = None if until is None else float(until)
+        found = series.query(sid, res, since=since, until=until, limit=limit)
+    except (TypeError, ValueError) as e:
+        resp["error"] = str(e)
+        found = None
+    if found is not None:
+        resp.update(found)
+
+    resp_topic = f"{SERIES_PREFIX}/{sid}"
+    logger.info("📤 series resp → %s (%s, %d points)", resp_topic, res, len(resp["points"]))
+    client.publish(resp_topic, codec.dumps(resp), qos=0, retain=False)
+
+def _record_value(sensor_id, payload):
+    v = payload.get("value")     # 숫자 값만 (화재 센서 등은 문자열 value)
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        if series.add(sensor_id, v):
+            M_SERIES.inc()
+
+# ── Dispatch jobs (워커 스레드에서 실행) ─────────────────────────────────
+def _run_sensor_handler(handler, cfg, payload, client, context):
+    # 전역 lock 은 잡지 않음: 핸들러의 상태 기록(set_sensor_status)과 융합 판정만 _state_lock,
+    # flash publish / FCM 적재 / 로그는 lock 밖 → 한 센서의 I/O 가 다른 워커를 막지 않음
+    handler(payload, client, context)
+
+    if cfg.get("participates_in_alltrue", True):
+        with _state_lock:
+            snapshot = dict(context["sensor_status"])
+        log_publish(client, typ="server", id_="server", level="debug",
+                    msg="participates_in_alltrue", sensor_status=snapshot)
+        evaluate_fusion(client, context, payload.get("sensor_id"))
 
-        if topic == APP_NEOPIXEL:
-            forward_mood_to_neopixel(client, payload, context); return
-
-        if topic == REG_REQUEST:
-            publish_server_hello(client)
-            log_publish(client, typ="server", id_="server", level="debug", msg="hello re-published"); return
-
-        if topic == LOG_HISTORY_REQ:
-            handle_history_request(client, payload); return
-
-        if topic == PUSH_REGISTER:
-            token = None
-            try:
-                raw_s = msg.payload.decode() if msg.payload else ""
-                if raw_s.strip().startswith("{"):
-                    token = json.loads(raw_s).get("token")
-                else:
-                    token = raw_s.strip()
-            except Exception:
-                token = None
-            if token:
-                try:
-                    save_fcm_token(token)
-                    tail = token[-10:] if len(token) > 10 else token
-                    log_publish(client, typ="server", id_="server", level="info",
-                                msg="push token registered", token_tail=tail)
-                except Exception as e:
-                    print("❌ save_fcm_token error:", e)
-                    log_publish(client, typ="server", id_="server", level="error",
-                                msg="push token save failed", error=str(e))
-            else:
-                log_publish(client, typ="server", id_="server", level="warn",
-                            msg="push token missing/invalid")
+def _reset_all(client, context):
+    logger.info("🧹 reset sensor_status")
+    with _state_lock:
+        for k in context["sensor_status"]:
+            context["sensor_status"][k] = False
+        context["just_triggered"] = False
+        fusion.engine.reset()
+    ingress.forget()
+    scheduler.cancel("flash_lock")
+    scheduler.cancel("vibrator_stop")
+    scheduler.cancel("beacon_stop")
+    publish_vibrate_stop(client, context)
+    publish_beacon_stop(client, context)   # ✅ 리셋 시 경광등도 강제 OFF
+    log_publish(client, typ="server", id_="server", level="info", msg="sensor_status reset")
+
+def _reload_fusion_rules(client):
+    with _state_lock:
+        active = [k for k, v in userdata["sensor_status"].items() if v]
+        if not fusion.maybe_reload(active):
             return
+    log_publish(client, typ="server", id_="server", level="info",
+                msg="fusion rules reloaded", rules=fusion.engine.snapshot())
+
+def _reload_sensor_config(client):
+    """MQTT_config.json 변경 시: 상태/규칙/라우터 교체 → 추가 토픽 구독 → 삭제 토픽 해제"""
+    global config, MQTT_TOPICS, router
+    new_config = config_watcher.poll()
+    if new_config is None:
+        return
+    diff = diff_sensor_config(config, new_config)
+    participants = _participants(new_config)
+    with _state_lock:
+        status = userdata["sensor_status"]
+        for sid in [s for s in status if s not in participants]:
+            del status[sid]
+        for sid in participants:
+            status.setdefault(sid, False)
+        fusion.reload([k for k, v in status.items() if v], participants=participants)
+        # 삭제된 토픽도 유예 시간 동안은 옛 설정으로 라우팅 (이미 브로커를 떠난 메시지 유실 방지)
+        transitional = {**{t: config[t] for t in diff["removed"]}, **new_config}
+        router = build_router(transitional)
+        config, MQTT_TOPICS = new_config, list(new_config)
+
+    for t in diff["added"]:
+        client.subscribe(t, qos=1); logger.info("📶 구독: %s", t)
+    unsub = [t for t in diff["removed"] if t not in TOPIC_HANDLER_MAP]
+    if unsub:
+        client.unsubscribe(unsub); logger.info("📴 구독 해제: %s", unsub)
+    scheduler.call_later(CONFIG_UNSUB_GRACE_SEC, _finish_config_swap, key="config_router")
 
-        if topic == CONTROL_TOPIC and payload.get("command") == "reset_all":
-            print("🧹 reset sensor_status")
-            for k in context["sensor_status"]:
-                context["sensor_status"][k] = False
-            context["just_triggered"] = False
-            publish_vibrate_stop(client, context)
-            publish_beacon_stop(client, context)   # ✅ 리셋 시 경광등도 강제 OFF
-            log_publish(client, typ="server", id_="server", level="info", msg="sensor_status reset")
-            return
+    log_publish(client, typ="server", id_="server", level="info",
+                msg="sensor config reloaded", participants=participants, **diff)
 
-        cfg = config.get(topic)
-        if not cfg:
-            print("❗unregistered topic:", topic)
-            log_publish(client, typ="server", id_="server", level="warn", msg="unregistered topic", topic=topic)
-            return
+def _finish_config_swap():
+    global router
+    router = build_router(config)
 
-        if payload.get("sensor_id") != cfg["sensor_id"] or payload.get("event") != cfg["expected_event"]:
-            print("❌ unexpected sensor payload:", payload)
-            log_publish(client, typ="server", id_="server", level="debug",
-                        msg="unexpected sensor event",
-                        got=payload, expect={"sensor_id":cfg["sensor_id"], "event":cfg["expected_event"]})
-            return
+def _heartbeat(client):
+    log_publish(client, typ="server", id_="server", level="debug", msg="heartbeat",
+                dispatch=dispatcher.stats(), push=push_stats(), ingress=ingress.stats(),
+                series=series.stats(),
+                log_store=log_store.stats(), logs=log_pipeline.stats(),
+                scheduler=scheduler.stats(), publish=publish_meter.stats(),
+                logging=logging_stats())
+
+def _republish_hello(client):
+    publish_server_hello(client)
+    log_publish(client, typ="server", id_="server", level="debug", msg="hello re-published")
 
+def _register_push_token(client, token):
+    if token:
+        try:
+            save_fcm_token(token)
+            tail = token[-10:] if len(token) > 10 else token
+            log_publish(client, typ="server", id_="server", level="info",
+                        msg="push token registered", token_tail=tail)
+        except Exception as e:
+            logger.error("❌ save_fcm_token error: %s", e)
+            log_publish(client, typ="server", id_="server", level="error",
+                        msg="push token save failed", error=str(e))
+    else:
+        log_publish(client, typ="server", id_="server", level="warn",
+                    msg="push token missing/invalid")
+
+# ── Built-in topic routes (handler_registry.register_topic) ─────────────
+# interfaceui/logs 아래 전체 (기존 처리와 같이 <type>/<id> 뒤의 하위 레벨도 받아서 type/id 로 저장)
+# 더 구체적인 라우트(LOG_HISTORY_REQ 등)가 먼저 매칭됨
+@register_topic(f"{LOG_STREAM_PREFIX}/#")
+def _on_log_stream(client, context, msg, topic, payload):
+    parts = topic.split("/", 4)
+    if len(parts) < 4 or topic.startswith(f"{LOG_HISTORY_PREFIX}/"):
+        return      # type/id 없는 토픽, 서버가 보낸 히스토리 응답
+    typ, id_ = parts[2], parts[3]
+    rec = payload if isinstance(payload, dict) else {"msg": payload}
+    rec.setdefault("id", id_); rec.setdefault("type", typ)
+    rec.setdefault("level", "info")
+    rec.setdefault("ts", int(time.time()))
+    rec.setdefault("ts_ms", _now_ts_ms())
+    rec.setdefault("iso", _now_iso())
+    log_store.append(typ, id_, rec)
+    log_pipeline.count_in()
+
+@register_topic(APP_NEOPIXEL)
+def _on_app_mood(client, context, msg, topic, payload):
+    dispatcher.submit("mood", forward_mood_to_neopixel, client, payload, context,
+                      label="forward_mood")
+
+@register_topic(REG_REQUEST)
+def _on_registry_request(client, context, msg, topic, payload):
+    dispatcher.submit("registry", _republish_hello, client, label="hello")
+
+@register_topic(LOG_HISTORY_REQ)
+def _on_history_request(client, context, msg, topic, payload):
+    dispatcher.submit("history", handle_history_request, client, payload, label="history")
+
+@register_topic(SERIES_REQUEST)
+def _on_series_request(client, context, msg, topic, payload):
+    dispatcher.submit("series", handle_series_request, client, payload, label="series")
+
+@register_topic(PUSH_REGISTER)
+def _on_push_register(client, context, msg, topic, payload):
+    token = None
+    try:
+        raw_s = msg.payload.decode() if msg.payload else ""
+        if raw_s.strip().startswith("{"):
+            token = codec.loads(raw_s).get("token")
+        else:
+            token = raw_s.strip()
+    except Exception:
+        token = None
+    dispatcher.submit("push_register", _register_push_token, client, token,
+                      label="push_register")
+
+@register_topic(CONTROL_TOPIC)
+def _on_control(client, context, msg, topic, payload):
+    command = payload.get("command")
+    if command == "reset_all":
+        dispatcher.submit("control", _reset_all, client, context, label="reset_all")
+    elif command == "dispatch_stats":
         log_publish(client, typ="server", id_="server", level="info",
-                    msg="sensor event accepted",
-                    topic=topic, sensor_id=payload.get("sensor_id"),
-                    handler=cfg.get("handler"))
-
-        handler = HANDLER_NAME_MAP.get(cfg["handler"])
-        if not handler:
-            print("❗no handler:", cfg["handler"])
-            log_publish(client, typ="server", id_="server", level="error", msg="missing handler", handler=cfg["handler"])
+                    msg="dispatch stats", dispatch=dispatcher.stats())
+    elif command == "ingress_stats":
+        log_publish(client, typ="server", id_="server", level="info",
+                    msg="ingress stats", ingress=ingress.stats())
+    elif command == "fusion_status":
+        log_publish(client, typ="server", id_="server", level="info",
+                    msg="fusion status", rules=fusion.engine.snapshot())
+
+def _log_recv(client, topic, raw):
+    # raw 는 수신 bytes 그대로 → 실제로 기록할 때만 decode
+    preview = raw.decode(errors="ignore")[:200] if raw else ""
+    log_publish(client, typ="server", id_="server", level="debug", stream=False,
+                msg="recv", topic=topic, payload=preview)
+
+def _on_sensor_event(client, context, topic, payload, cfg, raw=b""):
+    # sensor_id 가 없는 설정(와일드카드 센서 패밀리)은 어떤 sensor_id 든 허용
+    expect_sid = cfg.get("sensor_id")
+    if (expect_sid and payload.get("sensor_id") != expect_sid) \
+       or payload.get("event") != cfg["expected_event"]:
+        _log_recv(client, topic, raw)
+        logger.warning("❌ unexpected sensor payload: %s", payload)
+        log_publish(client, typ="server", id_="server", level="debug",
+                    msg="unexpected sensor event",
+                    got=payload, expect={"sensor_id":expect_sid, "event":cfg["expected_event"]})
+        return
+
+    # 값은 상태와 무관하게 시계열에 기록 ("정상" 반복 보고도 추세 그래프엔 필요)
+    sid = payload.get("sensor_id") or topic
+    _record_value(sid, payload)
+
+    # 상태 변화 없는 반복 보고는 로그/핸들러 없이 카운터만
+    reason = ingress.check(sid, payload.get("status"))
+    if reason is not None:
+        M_INGRESS.labels(reason).inc()
+        return
+
+    _log_recv(client, topic, raw)
+    log_publish(client, typ="server", id_="server", level="info",
+                msg="sensor event accepted",
+                topic=topic, sensor_id=payload.get("sensor_id"),
+                handler=cfg.get("handler"))
+
+    handler = HANDLER_NAME_MAP.get(cfg["handler"])
+    if not handler:
+        logger.error("❗no handler: %s", cfg["handler"])
+        log_publish(client, typ="server", id_="server", level="error", msg="missing handler", handler=cfg["handler"])
+        return
+
+    # 같은 sensor_id 는 같은 워커에서 순서대로 실행
+    dispatcher.submit(payload.get("sensor_id") or topic, _run_sensor_handler,
+                      handler, cfg, payload, client, context, label=cfg["handler"])
+
+# ── Topic router (MQTT_config.json + 내장 라우트, 시작 시 1회 컴파일) ────
+_ROUTE_SENSOR  = 0
+_ROUTE_BUILTIN = 1
+
+def build_router(sensor_config):
+    r = TopicRouter()
+    for topic_filter, cfg in sensor_config.items():
+        r.add(topic_filter, (_ROUTE_SENSOR, cfg))
+    # 내장 라우트가 같은 필터의 센서 설정보다 우선
+    for topic_filter, fn in TOPIC_HANDLER_MAP.items():
+        r.add(topic_filter, (_ROUTE_BUILTIN, fn))
+    return r
+
+router = build_router(config)
+
+# ── Callbacks ────────────────────────────────────────────────────────────
+def on_message(client, context, msg):
+    t0 = time.perf_counter()
+    try:
+        topic = msg.topic
+        if topic.startswith(OWN_LOG_PREFIXES):
+            # 서버 전용 토픽 (자기 것은 No Local 로 오지 않음, v5 미지원 브로커/다른 클라이언트 대비) → 파싱 없이 버림
+            log_pipeline.count_echo()
+            _m_echo.inc()
             return
 
-        handler(payload, client, context)
+        raw = msg.payload or b""
+        if raw[:1] in (b"{", b"["):
+            payload = codec.loads(raw)            # bytes 그대로 파싱 (decode 생략)
+        else:
+            payload = {"text": raw.decode(errors="ignore")}
+
+        # 센서 토픽의 recv 기록은 입구 필터 통과 후 (_on_sensor_event)
+        route = router.match(topic)
+        if (route is None or route[0] == _ROUTE_BUILTIN) \
+           and not topic.startswith(f"{LOG_STREAM_PREFIX}/") and not topic.startswith(f"{LOG_HISTORY_PREFIX}/"):
+            _log_recv(client, topic, raw)
+
+        if route is None:
+            _m_unrouted.inc()
+            logger.warning("❗unregistered topic: %s", topic)
+            log_publish(client, typ="server", id_="server", level="warn", msg="unregistered topic", topic=topic)
+            return
 
-        if cfg.get("participates_in_alltrue", True):
-            log_publish(client, typ="server", id_="server", level="debug",
-                        msg="participates_in_alltrue",
-                        sensor_status=dict(context["sensor_status"]))
-            all_True_publisher(client, context)
+        kind, target = route
+        if kind == _ROUTE_BUILTIN:
+            _m_builtin.inc()
+            target(client, context, msg, topic, payload)
+        else:
+            _m_sensor.inc()
+            _on_sensor_event(client, context, topic, payload, target, raw)
 
     except Exception as e:
-        print("❌ on_message exception:", e)
+        _m_error.inc()
+        logger.exception("❌ on_message exception: %s", e)
         log_publish(client, typ="server", id_="server", level="error",
                     msg="exception in on_message", error=str(e))
+    finally:
+        M_ON_MESSAGE.observe(time.perf_counter() - t0)
 
 def on_connect(client, context, flags, rc, _=None):
-    print("✅ MQTT connected (rc=", rc, ")")
+    logger.info("✅ MQTT connected (rc=%s)", rc)
+    M_CONNECTS.inc()
     publish_server_status(client, True)
     publish_server_hello(client)
     log_publish(client, typ="server", id_="server", level="info",
                 msg="server connected", ip=userdata.get("server_ip",""))
 
     for t in MQTT_TOPICS:
-        client.subscribe(t, qos=1); print(f"📶 구독: {t}")
+        client.subscribe(t, qos=1); logger.info("📶 구독: %s", t)
 
-    client.subscribe(CONTROL_TOPIC,   qos=1); print(f"📶 구독: {CONTROL_TOPIC}")
-    client.subscribe(APP_NEOPIXEL,    qos=1); print(f"📶 구독: {APP_NEOPIXEL}")
-    client.subscribe(REG_REQUEST,     qos=1); print(f"📶 구독: {REG_REQUEST}")
-    client.subscribe(LOG_HISTORY_REQ, qos=1); print(f"📶 구독: {LOG_HISTORY_REQ}")
-    client.subscribe(PUSH_REGISTER,   qos=1); print(f"📶 구독: {PUSH_REGISTER}")
-    client.subscribe(f"{LOG_STREAM_PREFIX}/+/+", qos=0); print(f"📶 구독: {LOG_STREAM_PREFIX}/+/+")
+    client.subscribe(CONTROL_TOPIC,   qos=1); logger.info("📶 구독: %s", CONTROL_TOPIC)
+    client.subscribe(APP_NEOPIXEL,    qos=1); logger.info("📶 구독: %s", APP_NEOPIXEL)
+    client.subscribe(REG_REQUEST,     qos=1); logger.info("📶 구독: %s", REG_REQUEST)
+    client.subscribe(PUSH_REGISTER,   qos=1); logger.info("📶 구독: %s", PUSH_REGISTER)
+    client.subscribe(SERIES_REQUEST,  qos=1); logger.info("📶 구독: %s", SERIES_REQUEST)
+    # qos=1 은 LOG_HISTORY_REQ 용. 디바이스 로그는 qos 0 으로 publish → 전달 qos 도 0 그대로
+    client.subscribe(LOG_SUBSCRIBE, options=LOG_SUBSCRIBE_OPTS); logger.info("📶 구독: %s (no local)", LOG_SUBSCRIBE)
 
-    print("✅ MQTT 연결 완료")
+    logger.info("✅ MQTT 연결 완료")
     log_publish(client, typ="server", id_="server", level="debug",
                 msg="subscriptions ready", sensor_topics=len(MQTT_TOPICS))
 
-    orig_publish = client.publish
-    def _pub_wrap(topic, payload=None, qos=0, retain=False):
-        try:
-            t = str(topic)
-            if VERBOSE_PUBLISH_LOG \
-               and not t.startswith(LOG_STREAM_PREFIX) \
-               and not t.startswith(LOG_HISTORY_PREFIX) \
-               and t not in (STATUS_SERVER, HELLO_SERVER):
-                preview = payload.decode() if isinstance(payload, (bytes, bytearray)) else str(payload)
-                log_publish(client, typ="server", id_="server", level="debug",
-                            msg="publish", topic=t, qos=qos, retain=retain,
-                            payload=(preview[:200] if preview else ""))
-        except Exception:
-            pass
-        return orig_publish(topic, payload, qos, retain)
-    client.publish = _pub_wrap
+def start_metrics():
+    """큐/링 크기 게이지는 스크레이프 시점에만 계산"""
+    Gauge("decision_dispatch_queue_depth", "dispatcher 대기 작업 수").set_function(
+        lambda: dispatcher.stats()["queue_depth"])
+    Gauge("decision_log_store_pending", "SQLite flush 대기 로그 수").set_function(log_store.pending)
+    Gauge("decision_log_store_rows", "SQLite 로그 행 수").set_function(lambda: log_store.stats()["rows"])
+    Gauge("decision_log_stream_pending", "MQTT 송출 대기 서버 로그 수").set_function(log_pipeline.pending)
+    Gauge("decision_scheduler_pending", "예약된 지연/주기 작업 수").set_function(
+        lambda: scheduler.stats()["pending"])
+    Gauge("decision_series_bytes", "센서 시계열 링 메모리 (bytes)").set_function(
+        lambda: series.stats()["bytes"])
+    Gauge("decision_push_tokens", "등록된 FCM 토큰 수").set_function(
+        lambda: push_stats().get("tokens", 0))
+    return start_http_server(METRICS_PORT, METRICS_ADDR)
 
 def loop():
+    dispatcher.start()
+    start_metrics()
+    log_store.start()
+    scheduler.start()
     while True:
         try:
-            client = mqtt.Client(client_id="decision_server", userdata=userdata)
+            client = mqtt.Client(client_id="decision_server", userdata=userdata, protocol=MQTT_PROTOCOL)
             client.will_set(STATUS_SERVER, _status_payload(False), qos=1, retain=True)
-            client.on_connect = lambda c, u, f, rc: on_connect(c, u, f, rc)
+            client.on_connect = lambda c, u, f, rc, props=None: on_connect(c, u, f, rc, props)
             client.on_message = lambda c, u, m: on_message(c, u, m)
+            publish_meter.install(client)   # client 생성 시 1회 (on_connect 재호출과 무관)
 
-            print("📡 MQTT 서버 연결 시도…")
+            logger.info("📡 MQTT 서버 연결 시도…")
             client.connect(BROKER_IP, BROKER_PORT, keepalive=KEEPALIVE)
-            print("🚀 판단 서버 실행 중")
+            logger.info("🚀 판단 서버 실행 중")
 
-            last_hello   = time.time()
-            last_hb_log  = time.time()
+            # 주기 작업은 스케줄러 스레드 하나가 담당 (재연결 시 같은 key 로 새 client 에 재무장)
+            scheduler.call_every(HELLO_INTERVAL_SEC, publish_server_hello, client, key="hello")
+            scheduler.call_every(HEARTBEAT_INTERVAL_SEC, _heartbeat, client, key="heartbeat")
+            scheduler.call_every(FUSION_RELOAD_SEC, _reload_fusion_rules, client, key="fusion_reload")
+            scheduler.call_every(CONFIG_RELOAD_SEC, _reload_sensor_config, client, key="config_reload")
 
             while True:
-                client.loop(timeout=1.0)
-                now = time.time()
-                if now - last_hello >= 60:
-                    publish_server_hello(client); last_hello = now
-                if now - last_hb_log >= 60:
-                    log_publish(client, typ="server", id_="server", level="debug", msg="heartbeat")
-                    last_hb_log = now
+                client.loop(timeout=LOG_PUBLISH_INTERVAL)
+                log_pipeline.flush(client)
 
         except Exception as e:
-            print(f"❌ MQTT loop error: {e}")
+            M_LOOP_ERRORS.inc()
+            logger.error("❌ MQTT loop error: %s", e)
             time.sleep(5)
 
 if __name__ == "__main__":
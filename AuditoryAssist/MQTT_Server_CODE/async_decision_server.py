@@ -0,0 +1,127 @@
+# async_decision_server.py
+# 판단 서버 asyncio 실행 모드
+#   python async_decision_server.py
+# - paho 소켓 콜백(on_socket_open/close/register_write)으로 MQTT 소켓을 이벤트 루프에 직접 등록
+#   → client.loop() 블로킹 루프 / 네트워크 스레드 없음
+# - 토픽 규약, 라우터, 핸들러 레지스트리는 MQTT_decision_server 것을 그대로 사용
+#   (dispatcher 만 AsyncDispatcher 로 교체 → 기존 동기 핸들러는 수정 없이 실행)
+# - 타이머(hello/heartbeat/flash lock 등)는 scheduler.bind_loop 로 이벤트 루프 타이머,
+#   FCM 전송/로그 DB flush 는 코루틴 태스크로 구동
+import asyncio
+import paho.mqtt.client as mqtt
+
+import MQTT_decision_server as S
+from dispatcher import AsyncDispatcher
+from scheduler import scheduler
+from firebase.firebase_utils import run_push_async
+from logging_setup import get_logger
+
+logger = get_logger("async_server")
+
+# ── Settings ─────────────────────────────────────────────────────────────
+ASYNC_DISPATCH_LANES = 64     # key(센서) 를 고정 배정하는 코루틴 레인 수
+RECONNECT_DELAY_SEC  = 5
+
+# ── paho ↔ asyncio 어댑터 ────────────────────────────────────────────────
+class PahoAsyncAdapter:
+    """
+    paho 소켓 콜백을 이벤트 루프 reader/writer 로 연결
+    - 읽기 가능: client.loop_read()
+    - 보낼 데이터 있음: client.loop_write()
+    - keepalive/재전송: 1초마다 client.loop_misc()
+    콜백은 to_thread 작업(history 등)의 publish 에서도 불릴 수 있어 항상 call_soon_threadsafe 로 넘긴다.
+    """
+
+    def __init__(self, loop, client):
+        self.loop   = loop
+        self.client = client
+        self.closed = loop.create_future()
+        self._misc  = None
+        client.on_socket_open            = self._on_socket_open
+        client.on_socket_close           = self._on_socket_close
+        client.on_socket_register_write  = self._on_register_write
+        client.on_socket_unregister_write = self._on_unregister_write
+
+    def _on_socket_open(self, client, userdata, sock):
+        self.loop.call_soon_threadsafe(self._open, sock)
+
+    def _open(self, sock):
+        self.loop.add_reader(sock, self.client.loop_read)
+        self._misc = self.loop.create_task(self._misc_loop())
+
+    def _on_socket_close(self, client, userdata, sock):
+        self.loop.call_soon_threadsafe(self._close, sock)
+
+    def _close(self, sock):
+        self.loop.remove_reader(sock)
+        self.loop.remove_writer(sock)
+        if self._misc is not None:
+            self._misc.cancel()
+        if not self.closed.done():
+            self.closed.set_result(True)
+
+    def _on_register_write(self, client, userdata, sock):
+        self.loop.call_soon_threadsafe(self.loop.add_writer, sock, self.client.loop_write)
+
+    def _on_unregister_write(self, client, userdata, sock):
+        self.loop.call_soon_threadsafe(self.loop.remove_writer, sock)
+
+    async def _misc_loop(self):
+        while self.client.loop_misc() == mqtt.MQTT_ERR_SUCCESS:
+            await asyncio.sleep(1)
+        if not self.closed.done():
+            self.closed.set_result(True)
+
+# ── Coroutines ───────────────────────────────────────────────────────────
+async def _flush_logs(client):
+    while True:
+        await asyncio.sleep(S.LOG_PUBLISH_INTERVAL)
+        S.log_pipeline.flush(client)
+
+async def serve():
+    loop = asyncio.get_running_loop()
+
+    # 기존 서버 모듈의 dispatcher 를 코루틴 레인으로 교체 (on_message/라우트는 그대로)
+    S.dispatcher = AsyncDispatcher(lanes=ASYNC_DISPATCH_LANES, queue_size=S.DISPATCH_QUEUE_SIZE,
+                                   blocking_labels=("history", "push_register"))
+    S.dispatcher.start(loop)
+    scheduler.bind_loop(loop)
+    S.start_metrics()      # HTTP 스레드 1개 (스크레이프 처리만, 메시지 경로와 무관)
+    background = [loop.create_task(run_push_async()),
+                  loop.create_task(S.log_store.run_async())]
+
+    while True:
+        flusher = None
+        try:
+            client = mqtt.Client(client_id="decision_server", userdata=S.userdata, protocol=S.MQTT_PROTOCOL)
+            client.will_set(S.STATUS_SERVER, S._status_payload(False), qos=1, retain=True)
+            client.on_connect = lambda c, u, f, rc, props=None: S.on_connect(c, u, f, rc, props)
+            client.on_message = lambda c, u, m: S.on_message(c, u, m)
+            S.publish_meter.install(client)
+            conn = PahoAsyncAdapter(loop, client)
+
+            logger.info("📡 MQTT 서버 연결 시도… (asyncio)")
+            await asyncio.to_thread(client.connect, S.BROKER_IP, S.BROKER_PORT, S.KEEPALIVE)
+            logger.info("🚀 판단 서버 실행 중 (asyncio)")
+
+            scheduler.call_every(S.HELLO_INTERVAL_SEC, S.publish_server_hello, client, key="hello")
+            scheduler.call_every(S.HEARTBEAT_INTERVAL_SEC, S._heartbeat, client, key="heartbeat")
+            scheduler.call_every(S.FUSION_RELOAD_SEC, S._reload_fusion_rules, client, key="fusion_reload")
+            scheduler.call_every(S.CONFIG_RELOAD_SEC, S._reload_sensor_config, client, key="config_reload")
+            flusher = loop.create_task(_flush_logs(client))
+
+            await conn.closed
+            logger.warning("⚠️ MQTT 연결 끊김")
+        except Exception as e:
+            S.M_LOOP_ERRORS.inc()
+            logger.error("❌ MQTT async loop error: %s", e)
+        finally:
+            if flusher is not None:
+                flusher.cancel()
+        for t in background:
+            if t.done() and not t.cancelled() and t.exception() is not None:
+                logger.error("❌ background task 종료: %s", t.exception())
+        await asyncio.sleep(RECONNECT_DELAY_SEC)
+
+if __name__ == "__main__":
+    asyncio.run(serve())
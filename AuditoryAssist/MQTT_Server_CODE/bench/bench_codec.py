@@ -0,0 +1,125 @@
+# bench/bench_codec.py
+# JSON 코덱 마이크로 벤치마크 (실제 토픽에서 오가는 payload 기준)
+#   cd MQTT_Server_CODE && python bench/bench_codec.py --from traffic.jsonl [-n 20000]
+#   --from : loadgen.py record 로 기록한 JSONL (토픽별로 캡처된 payload 그대로 사용)
+#   생략하면 아래 합성 샘플 (캡처가 없을 때만)
+# 비교 경로
+#   baseline : 기존 코드 — bytes.decode() + json.loads / json.dumps(기본 설정) + publish 시 encode
+#   stdlib   : codec 폴백 — bytes 그대로 json.loads / compact JSONEncoder → bytes
+#   orjson   : codec 기본 — orjson.loads / orjson.dumps (설치돼 있을 때만)
+import argparse, json, os, sys, time, timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import codec
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ── 합성 샘플 payload (--from 없을 때) ───────────────────────────────────
+_NOW = {"ts": 1760000000, "ts_ms": 1760000000123, "iso": "2025-10-09T18:53:20+09:00"}
+
+SAMPLES = {
+    # Pico 센서 보고 (MQTT/Publisher/*/main.py)
+    "sensor_gas": {"sensor_id": "gas_sensor_pico", "event": "gas_detected",
+                   "status": "정상", "value": 412, "timestamp": "2025-10-09 18:53:20"},
+    "sensor_shz": {"sensor_id": "shz_sensor_pico", "event": "shz_detected",
+                   "value": "감지됨", "timestamp": "2025-10-09 18:53:20"},
+    # 서버 → 무드등 명령 (handlers.publish_hex_flash)
+    "cmd_hex_flash": {"command": "hex_flash", "color": "#FD6A00", "duration_ms": 5000,
+                      "alert": True, "issuer": "decision_server", "sensor_id": "mq7_sensor_pico"},
+    # 서버 로그 1건 (log_publish)
+    "log_accepted": {"id": "server", "type": "server", "level": "info",
+                     "msg": "sensor event accepted", **_NOW, "topic": "gas/sensor",
+                     "sensor_id": "gas_sensor_pico", "handler": "handle_gas"},
+    # heartbeat (중첩 통계, HandlerDispatcher.stats() 형태)
+    "log_heartbeat": {"id": "server", "type": "server", "level": "debug", "msg": "heartbeat", **_NOW,
+                      "dispatch": {"workers": 4, "queue_size": 256, "queue_depth": 1,
+                                   "queue_depth_per_worker": [0, 0, 1, 0], "submitted": 18234,
+                                   "errors": 0, "dropped": {}, "dropped_total": 0,
+                                   "latency": {"handle_gas": {"count": 812, "avg_ms": 0.41, "max_ms": 3.2},
+                                               "handle_mq7": {"count": 790, "avg_ms": 0.38, "max_ms": 2.9}}},
+                      "ingress": {"accepted": 120, "steady": 2400, "duplicate": 3, "rate": 0,
+                                  "collapsed": 2403, "sensors": 6, "collapsed_ratio": 0.952},
+                      "series": {"sensors": 2, "points": 2520, "refused": 0, "bytes": 244800}},
+}
+
+def _history(n=50):
+    items = [dict(SAMPLES["log_accepted"], ts=1760000000 + i) for i in range(n)]
+    return {"id": "server", "type": "server", "items": items}
+
+SAMPLES["history_50"] = _history()
+
+def load_captured(path, per_topic=50):
+    """
+    loadgen.py record 의 JSONL ({"t", "topic", "payload"}) → {topic: [payload, ...]}
+    JSON 객체/배열 payload 만 (텍스트 payload 는 코덱을 타지 않음), 토픽당 최대 per_topic 개
+    """
+    samples = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            payload = rec.get("payload")
+            if not isinstance(payload, (dict, list)):
+                continue
+            objs = samples.setdefault(rec["topic"], [])
+            if len(objs) < per_topic:
+                objs.append(payload)
+    return samples
+
+# ── 경로 ─────────────────────────────────────────────────────────────────
+_std_enc = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+PATHS = {
+    "baseline": (lambda b: json.loads(b.decode(errors="ignore")),
+                 lambda o: json.dumps(o).encode()),
+    "stdlib":   (json.loads, lambda o: _std_enc.encode(o).encode()),
+}
+if orjson is not None:
+    PATHS["orjson"] = (orjson.loads, orjson.dumps)
+
+def _per_call_us(fn, args, n):
+    """args 를 돌아가며 약 n 회 호출 → 1회 평균 µs"""
+    rounds = max(1, n // len(args))
+
+    def body():
+        for a in args:
+            fn(a)
+    t = min(timeit.repeat(body, number=rounds, repeat=3))
+    return t / (rounds * len(args)) * 1e6
+
+def run(n, samples, source):
+    print(f"active codec backend: {codec.BACKEND}  (source={source}, n={n}, best of 3, µs/call)")
+    width = max([14] + [len(name) for name in samples])
+    print(f"{'payload':<{width}} {'cnt':>4} {'bytes':>6} | " + " | ".join(f"{p:>8} dec {p:>8} enc" for p in PATHS))
+    totals = {p: [0.0, 0.0] for p in PATHS}
+    for name, objs in samples.items():
+        wires = [json.dumps(o, ensure_ascii=False).encode() for o in objs]
+        avg_bytes = sum(map(len, wires)) // len(wires)
+        cells = []
+        for p, (dec, enc) in PATHS.items():
+            d = _per_call_us(dec, wires, n)
+            e = _per_call_us(enc, objs, n)
+            totals[p][0] += d; totals[p][1] += e
+            cells.append(f"{d:12.2f} {e:12.2f}")
+        print(f"{name:<{width}} {len(objs):>4} {avg_bytes:>6} | " + " | ".join(cells))
+    base = sum(totals["baseline"])
+    for p, (d, e) in totals.items():
+        print(f"{p:<8} total {d + e:8.2f} µs  ({base / (d + e):.2f}x vs baseline)")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=20000, help="경로당 반복 횟수")
+    ap.add_argument("--from", dest="src", help="loadgen.py record 로 기록한 JSONL (없으면 합성 샘플)")
+    ap.add_argument("--per-topic", type=int, default=50, help="--from 사용 시 토픽당 최대 payload 수")
+    args = ap.parse_args()
+    if args.src:
+        samples = load_captured(args.src, args.per_topic)
+        if not samples:
+            sys.exit(f"❌ {args.src} 에 JSON payload 가 없습니다")
+        run(args.n, samples, args.src)
+    else:
+        run(args.n, {name: [obj] for name, obj in SAMPLES.items()}, "synthetic")
@@ -0,0 +1,317 @@
+# bench/loadgen.py
+# 판단 서버 부하 발생기 / 트래픽 기록·재생
+#   cd MQTT_Server_CODE
+#   python bench/loadgen.py record --host 192.168.0.24 --out traffic.jsonl --duration 60
+#   python bench/loadgen.py replay traffic.jsonl --speed 0            # 기록 재생 (0 = 최대 속도)
+#   python bench/loadgen.py synth --rate 200 --duration 10 --danger 0.05
+# 대상
+#   --target inproc (기본) : MQTT_decision_server 를 import 해 on_message 를 직접 호출 (브로커/네트워크 불필요)
+#   --target broker        : --host/--port 브로커로 publish (서버는 따로 실행 중이어야 함)
+# 결과
+#   ingest  : on_message 1건 처리 시간 (inproc 만)
+#   e2e     : 센서 메시지 publish → 같은 sensor_id(ALL-TRUE 는 직전 센서 메시지) 장치 명령 publish 까지
+import argparse, atexit, json, os, random, shutil, sys, tempfile, threading, time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+# 장치 명령 토픽 (e2e 측정 대상), 재생 시 건너뛰는 서버 출력 토픽
+DEVICE_PREFIXES = ("neopixel/", "vibrator/", "beacon/")
+SERVER_OUTPUTS  = DEVICE_PREFIXES + ("interfaceui/status/", "interfaceui/registry/hello/",
+                                     "interfaceui/logs/server/", "interfaceui/logs/history/",
+                                     "interfaceui/sensors/history/")
+
+def _pct(values, p):
+    if not values:
+        return None
+    s = sorted(values)
+    return round(s[min(len(s) - 1, int(len(s) * p / 100.0))] * 1000, 3)
+
+def _summary(values):
+    return {"count": len(values), "p50_ms": _pct(values, 50), "p95_ms": _pct(values, 95),
+            "p99_ms": _pct(values, 99), "max_ms": _pct(values, 100)}
+
+# ── 지연 측정 ────────────────────────────────────────────────────────────
+class LatencyProbe:
+    """센서 메시지 송신 시각을 sensor_id 별로 기억했다가 장치 명령이 나가면 차이를 기록"""
+
+    def __init__(self):
+        self._lock    = threading.Lock()
+        self._last_in = {}
+        self._status  = {}
+        self._last_any = None
+        self.e2e      = []
+        self.commands = 0
+
+    def sent(self, payload):
+        """같은 status 반복 보고는 명령을 만들지 않으므로 status 가 바뀐 시각을 기준으로 삼는다"""
+        if not isinstance(payload, dict):
+            return
+        sid, status = payload.get("sensor_id"), payload.get("status")
+        now = time.perf_counter()
+        with self._lock:
+            if status is not None and self._status.get(sid) == status and sid in self._last_in:
+                return
+            self._status[sid] = status
+            if sid:
+                self._last_in[sid] = now
+            self._last_any = now
+
+    def command(self, payload):
+        now = time.perf_counter()
+        sid = payload.get("sensor_id") if isinstance(payload, dict) else None
+        with self._lock:
+            self.commands += 1
+            t0 = self._last_in.pop(sid, None) if sid and sid != "all_true" else None
+            if t0 is None and sid == "all_true":
+                t0, self._last_any = self._last_any, None
+            if t0 is not None:
+                self.e2e.append(now - t0)
+
+# ── 대상: 프로세스 내부 ──────────────────────────────────────────────────
+class _FakeMsg:
+    __slots__ = ("topic", "payload", "qos", "retain")
+
+    def __init__(self, topic, payload):
+        self.topic, self.payload, self.qos, self.retain = topic, payload, 0, False
+
+class _FakeClient:
+    """publish 만 받는 paho Client 대역. 장치 명령은 probe 로 전달"""
+
+    def __init__(self, probe, codec):
+        self.probe     = probe
+        self.codec     = codec
+        self.published = 0
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        self.published += 1
+        if topic.startswith(DEVICE_PREFIXES):
+            try:
+                self.probe.command(self.codec.loads(payload))
+            except ValueError:
+                pass
+
+    def subscribe(self, *a, **kw): pass
+    def unsubscribe(self, *a, **kw): pass
+
+class InprocTarget:
+
+    def __init__(self, probe):
+        os.environ.setdefault("PUSH_BACKEND", "fake")     # FCM 실제 전송 안 함
+        # 로그 DB 는 임시 디렉터리에 (실행 위치에 server_logs.sqlite3 를 남기지 않음)
+        # atexit 역순 실행 → 서버 모듈이 DB 를 닫은 뒤 디렉터리 삭제
+        tmp = tempfile.mkdtemp(prefix="loadgen-")
+        atexit.register(shutil.rmtree, tmp, True)
+        os.environ.setdefault("DECISION_LOG_DB", os.path.join(tmp, "server_logs.sqlite3"))
+        import MQTT_decision_server as S
+        import codec
+        from scheduler import scheduler
+        self.S, self.codec = S, codec
+        self.client = _FakeClient(probe, codec)
+        self.ingest = []
+        S.dispatcher.start()
+        scheduler.start()
+
+    def send(self, topic, data):
+        msg = _FakeMsg(topic, data)
+        t0 = time.perf_counter()
+        self.S.on_message(self.client, self.S.userdata, msg)
+        self.ingest.append(time.perf_counter() - t0)
+
+    def drain(self, timeout=5.0):
+        end = time.monotonic() + timeout
+        while time.monotonic() < end and self.S.dispatcher.stats()["queue_depth"]:
+            time.sleep(0.01)
+        time.sleep(0.05)   # 마지막 작업 실행 중일 수 있음
+
+    def report(self):
+        S = self.S
+        return {"ingest": _summary(self.ingest), "ingress": S.ingress.stats(),
+                "dispatch_dropped": S.dispatcher.stats()["dropped_total"],
+                "published": self.client.published}
+
+# ── 대상: 브로커 ─────────────────────────────────────────────────────────
+class BrokerTarget:
+
+    def __init__(self, probe, host, port):
+        import paho.mqtt.client as mqtt
+        import codec
+        self.codec = codec
+        self.client = mqtt.Client(client_id=f"loadgen-{os.getpid()}")
+        ready = threading.Event()
+
+        def on_connect(c, u, flags, rc, props=None):
+            for p in DEVICE_PREFIXES:
+                c.subscribe(p + "#", qos=0)
+            ready.set()
+
+        def on_message(c, u, msg):
+            try:
+                probe.command(codec.loads(msg.payload))
+            except ValueError:
+                pass
+
+        self.client.on_connect = on_connect
+        self.client.on_message = on_message
+        self.client.connect(host, port, keepalive=30)
+        self.client.loop_start()
+        if not ready.wait(5):
+            raise SystemExit(f"broker {host}:{port} 연결 실패")
+
+    def send(self, topic, data):
+        self.client.publish(topic, data, qos=0)
+
+    def drain(self, timeout=5.0):
+        time.sleep(min(timeout, 2.0))   # 서버 처리/명령 수신 대기
+
+    def report(self):
+        self.client.loop_stop()
+        self.client.disconnect()
+        return {}
+
+# ── 입력: 합성 / 재생 ────────────────────────────────────────────────────
+def synth_stream(config_path, rate, duration, danger, seed):
+    """MQTT_config.json 의 센서 토픽에 센서 보고를 rate(건/초)로 고르게 섞어 생성"""
+    with open(config_path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    rng = random.Random(seed)
+    sensors = []
+    for topic, cfg in config.items():
+        if "#" in topic:
+            continue
+        sid = cfg.get("sensor_id") or f"synth_{len(sensors)}"
+        sensors.append((topic.replace("+", sid), sid, cfg["expected_event"]))
+    total = int(rate * duration)
+    for i in range(total):
+        topic, sid, event = sensors[i % len(sensors)]
+        payload = {"sensor_id": sid, "event": event,
+                   "status": "위험" if rng.random() < danger else "정상",
+                   "value": rng.randint(80, 900),
+                   "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")}
+        yield i / rate, topic, payload
+
+def replay_stream(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            if rec["topic"].startswith(SERVER_OUTPUTS):
+                continue
+            yield rec["t"], rec["topic"], rec["payload"]
+
+def drive(target, probe, codec, stream, speed):
+    """stream 의 (t, topic, payload) 를 t/speed 시각에 맞춰 보냄 (speed 0 = 대기 없이)"""
+    start = time.perf_counter()
+    sent = behind = 0
+    for t, topic, payload in stream:
+        if speed > 0:
+            delay = start + t / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -0.05:
+                behind += 1
+        if isinstance(payload, (dict, list)):
+            data = codec.dumps(payload)
+        else:
+            data = str(payload).encode()
+        probe.sent(payload)
+        target.send(topic, data)
+        sent += 1
+    return sent, time.perf_counter() - start, behind
+
+# ── 기록 ─────────────────────────────────────────────────────────────────
+def record(host, port, out, duration, topics):
+    import paho.mqtt.client as mqtt
+    lock = threading.Lock()
+    count = 0
+    start = time.monotonic()
+    f = open(out, "w", encoding="utf-8")
+
+    def on_connect(c, u, flags, rc, props=None):
+        for t in topics:
+            c.subscribe(t, qos=0)
+
+    def on_message(c, u, msg):
+        nonlocal count
+        text = msg.payload.decode("utf-8", errors="replace")
+        try:
+            payload = json.loads(text) if text[:1] in "{[" else text
+        except ValueError:
+            payload = text
+        line = json.dumps({"t": round(time.monotonic() - start, 4), "topic": msg.topic,
+                           "payload": payload}, ensure_ascii=False)
+        with lock:
+            f.write(line + "\n")
+            count += 1
+
+    client = mqtt.Client(client_id=f"loadgen-rec-{os.getpid()}")
+    client.on_connect = on_connect
+    client.on_message = on_message
+    client.connect(host, port, keepalive=30)
+    client.loop_start()
+    try:
+        time.sleep(duration)
+    except KeyboardInterrupt:
+        pass
+    client.loop_stop()
+    client.disconnect()
+    with lock:
+        f.close()
+    print(f"📼 {count} messages → {out}")
+
+# ── main ─────────────────────────────────────────────────────────────────
+def main():
+    ap = argparse.ArgumentParser(description="판단 서버 부하 발생기")
+    sub = ap.add_subparsers(dest="mode", required=True)
+
+    rec = sub.add_parser("record", help="브로커 트래픽을 JSONL 로 기록")
+    rec.add_argument("--out", default="traffic.jsonl")
+    rec.add_argument("--duration", type=float, default=60)
+    rec.add_argument("--topic", action="append", default=None, help="구독 필터 (기본 #)")
+
+    rep = sub.add_parser("replay", help="기록 파일 재생")
+    rep.add_argument("file")
+    rep.add_argument("--speed", type=float, default=1.0, help="재생 배속 (0 = 대기 없이)")
+
+    syn = sub.add_parser("synth", help="MQTT_config.json 기반 센서 폭주 생성")
+    syn.add_argument("--config", default="MQTT_config.json")
+    syn.add_argument("--rate", type=float, default=100, help="초당 메시지 수")
+    syn.add_argument("--duration", type=float, default=10)
+    syn.add_argument("--danger", type=float, default=0.05, help="위험 status 비율")
+    syn.add_argument("--seed", type=int, default=1)
+    syn.add_argument("--speed", type=float, default=1.0, help="0 = 대기 없이 최대 속도")
+
+    for p in (rec, rep, syn):
+        p.add_argument("--host", default="127.0.0.1")
+        p.add_argument("--port", type=int, default=1883)
+    for p in (rep, syn):
+        p.add_argument("--target", choices=("inproc", "broker"), default="inproc")
+        p.add_argument("--json", help="결과를 JSON 파일로도 저장")
+    args = ap.parse_args()
+
+    if args.mode == "record":
+        record(args.host, args.port, args.out, args.duration, args.topic or ["#"])
+        return
+
+    import codec
+    probe = LatencyProbe()
+    target = InprocTarget(probe) if args.target == "inproc" else BrokerTarget(probe, args.host, args.port)
+    if args.mode == "replay":
+        stream = replay_stream(args.file)
+    else:
+        stream = synth_stream(args.config, args.rate, args.duration, args.danger, args.seed)
+
+    sent, elapsed, behind = drive(target, probe, codec, stream, args.speed)
+    target.drain()
+    result = {"mode": args.mode, "target": args.target, "sent": sent,
+              "elapsed_sec": round(elapsed, 3), "rate_per_sec": round(sent / max(elapsed, 1e-9), 1),
+              "behind_schedule": behind, "commands": probe.commands,
+              "e2e": _summary(probe.e2e), **target.report()}
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# codec.py
+# MQTT payload JSON 코덱
+# - orjson 이 설치돼 있으면 사용, 없으면 표준 json (공백 없는 separators, 한글은 UTF-8 그대로)
+# - dumps() 는 항상 bytes → paho publish 에 그대로 넘김 (str → bytes 재인코딩 없음)
+# - loads() 는 bytes/str 모두 받음 → 수신 payload 를 decode 하지 않고 바로 파싱
+# - 내용이 고정된 payload(stop 명령 등)는 모듈 로드 시 dumps() 해 둔 bytes 를 재사용
+import json
+
+try:
+    import orjson
+except ImportError:      # 선택 의존성
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+if orjson is not None:
+    _OPTS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=_OPTS)
+
+    def dumps_str(obj) -> str:
+        return orjson.dumps(obj, option=_OPTS).decode()
+
+    loads = orjson.loads
+else:
+    _encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+    def dumps(obj) -> bytes:
+        return _encoder.encode(obj).encode()
+
+    def dumps_str(obj) -> str:
+        return _encoder.encode(obj)
+
+    loads = json.loads
+
+def join_array(items) -> bytes:
+    """이미 직렬화된 원소(bytes/str)들을 다시 파싱하지 않고 JSON 배열 하나로"""
+    return b"[" + b",".join(i if isinstance(i, bytes) else i.encode() for i in items) + b"]"
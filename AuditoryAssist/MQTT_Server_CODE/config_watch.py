@@ -0,0 +1,76 @@
+# config_watch.py
+# MQTT_config.json 검증 / 변경 감지 (mtime 폴링) / 이전 설정과의 diff
+import json, os
+from topic_router import TopicRouter
+from logging_setup import get_logger
+
+logger = get_logger("config")
+
+class ConfigError(ValueError):
+    pass
+
+def validate_sensor_config(config, handler_names):
+    """토픽 필터 문법, 필수 키, 핸들러 이름을 검사. 문제가 있으면 ConfigError (전체 목록)"""
+    if not isinstance(config, dict):
+        raise ConfigError("최상위는 {토픽: 설정} 객체여야 함")
+    problems = []
+    probe = TopicRouter()
+    for topic, cfg in config.items():
+        try:
+            probe.add(topic, None)
+        except ValueError as e:
+            problems.append(str(e))
+        if not isinstance(cfg, dict):
+            problems.append(f"{topic}: 설정이 객체가 아님")
+            continue
+        if not cfg.get("expected_event"):
+            problems.append(f"{topic}: expected_event 없음")
+        if cfg.get("handler") not in handler_names:
+            problems.append(f"{topic}: 등록되지 않은 handler '{cfg.get('handler')}'")
+    if problems:
+        raise ConfigError("; ".join(problems))
+
+def load_sensor_config(path, handler_names):
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    validate_sensor_config(config, handler_names)
+    return config
+
+def diff_sensor_config(old, new) -> dict:
+    return {
+        "added":   [t for t in new if t not in old],
+        "removed": [t for t in old if t not in new],
+        "changed": [t for t in new if t in old and new[t] != old[t]],
+    }
+
+class ConfigWatcher:
+    """
+    poll() 호출마다 mtime 을 확인해 바뀌었으면 다시 읽고 검증까지 통과한 새 설정을 돌려준다
+    - 검증 실패/쓰는 중인 파일(JSON 오류)은 None, 같은 mtime 에 대해 오류 로그는 1번만
+    """
+
+    def __init__(self, path, handler_names):
+        self.path          = path
+        self.handler_names = handler_names
+        self._mtime        = self._stat()
+        self._bad_mtime    = None
+
+    def _stat(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def poll(self):
+        mtime = self._stat()
+        if mtime is None or mtime == self._mtime:
+            return None
+        try:
+            config = load_sensor_config(self.path, self.handler_names)
+        except (OSError, ValueError) as e:
+            if mtime != self._bad_mtime:
+                self._bad_mtime = mtime
+                logger.error("❌ %s 재로드 실패 → 기존 설정 유지: %s", self.path, e)
+            return None
+        self._mtime = mtime
+        return config
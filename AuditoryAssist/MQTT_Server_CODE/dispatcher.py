@@ -0,0 +1,211 @@
+# dispatcher.py
+# paho 네트워크 스레드(on_message)에서는 파싱/큐 적재만 하고,
+# 실제 핸들러 실행은 고정 크기 워커 풀에서 처리한다.
+import asyncio, threading, queue, time
+from collections import defaultdict
+from metrics import Counter, Histogram
+from logging_setup import get_logger
+
+logger = get_logger("dispatcher")
+
+_JOB_SECONDS = Histogram("decision_handler_seconds", "dispatcher 작업(핸들러) 실행 시간", ["job"])
+_JOB_ERRORS  = Counter("decision_handler_errors_total", "예외로 끝난 dispatcher 작업 수", ["job"])
+_JOB_DROPPED = Counter("decision_dispatch_dropped_total", "큐 포화로 버린 작업 수", ["job"])
+
+class _DispatchStats:
+    """드롭/지연/에러 카운터 공통부 (스레드 풀 / asyncio 레인 공용)"""
+
+    def _init_stats(self):
+        self._lock      = threading.Lock()
+        self._submitted = 0
+        self._errors    = 0
+        self._dropped   = defaultdict(int)            # label -> 드롭 수
+        self._latency   = defaultdict(lambda: [0, 0.0, 0.0])  # label -> [count, total_s, max_s]
+
+    def _count_submit(self):
+        with self._lock:
+            self._submitted += 1
+
+    def _count_drop(self, key, label):
+        with self._lock:
+            self._dropped[label] += 1
+        _JOB_DROPPED.labels(label).inc()
+        logger.warning("⚠️ dispatcher 큐 포화 → 드롭: key=%s, job=%s", key, label)
+
+    def _count_done(self, label, dt, error=None):
+        with self._lock:
+            if error is not None:
+                self._errors += 1
+            lat = self._latency[label]
+            lat[0] += 1
+            lat[1] += dt
+            if dt > lat[2]:
+                lat[2] = dt
+        _JOB_SECONDS.labels(label).observe(dt)
+        if error is not None:
+            _JOB_ERRORS.labels(label).inc()
+            logger.error("❌ dispatcher 작업 예외 (%s): %s", label, error)
+
+    def _depths(self):
+        return [q.qsize() for q in self._queues]
+
+    def stats(self) -> dict:
+        """큐 깊이 / 핸들러별 지연 / 드롭 카운터 스냅샷"""
+        depths = self._depths()
+        with self._lock:
+            latency = {
+                label: {
+                    "count": c,
+                    "avg_ms": round(total * 1000.0 / c, 3) if c else 0.0,
+                    "max_ms": round(mx * 1000.0, 3),
+                }
+                for label, (c, total, mx) in self._latency.items()
+            }
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "queue_depth": sum(depths),
+                "queue_depth_per_worker": depths,
+                "submitted": self._submitted,
+                "errors": self._errors,
+                "dropped": dict(self._dropped),
+                "dropped_total": sum(self._dropped.values()),
+                "latency": latency,
+            }
+
+class HandlerDispatcher(_DispatchStats):
+    """
+    key(센서 ID 등) 기준으로 워커를 고정 배정하는 bounded 워커 풀
+    - 같은 key 작업은 항상 같은 워커 큐로 → 센서별 처리 순서 보장
+    - 워커 큐가 가득 차면 작업을 버리고 drop 카운터만 올린다 (네트워크 스레드 블로킹 금지)
+    """
+
+    def __init__(self, workers=4, queue_size=256, name="dispatch"):
+        self.workers    = max(1, int(workers))
+        self.queue_size = int(queue_size)
+        self.name       = name
+        self._queues    = [queue.Queue(maxsize=self.queue_size) for _ in range(self.workers)]
+        self._threads   = []
+        self._running   = False
+        self._init_stats()
+
+    # ── lifecycle ────────────────────────────────────────────────────────
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        for i, q in enumerate(self._queues):
+            th = threading.Thread(target=self._worker, args=(q,),
+                                  name=f"{self.name}-{i}", daemon=True)
+            th.start()
+            self._threads.append(th)
+        logger.info("🧵 dispatcher 시작: workers=%d, queue_size=%d", self.workers, self.queue_size)
+
+    def stop(self, timeout=2.0):
+        if not self._running:
+            return
+        self._running = False
+        for q in self._queues:
+            try:
+                q.put_nowait(None)
+            except queue.Full:
+                pass
+        for th in self._threads:
+            th.join(timeout=timeout)
+        self._threads = []
+
+    @property
+    def running(self):
+        return self._running
+
+    # ── submit ───────────────────────────────────────────────────────────
+    def _queue_for(self, key):
+        return self._queues[hash(key) % self.workers]
+
+    def submit(self, key, fn, *args, label=None) -> bool:
+        """작업 적재. 큐가 가득 차 있으면 False (드롭)"""
+        label = label or getattr(fn, "__name__", "task")
+        try:
+            self._queue_for(key).put_nowait((label, fn, args))
+        except queue.Full:
+            self._count_drop(key, label)
+            return False
+        self._count_submit()
+        return True
+
+    # ── worker ───────────────────────────────────────────────────────────
+    def _worker(self, q):
+        while True:
+            item = q.get()
+            if item is None:
+                break
+            label, fn, args = item
+            t0 = time.perf_counter()
+            err = None
+            try:
+                fn(*args)
+            except Exception as e:
+                err = e
+            self._count_done(label, time.perf_counter() - t0, err)
+
+class AsyncDispatcher(_DispatchStats):
+    """
+    HandlerDispatcher 와 같은 submit()/stats() 인터페이스의 asyncio 버전
+    - 스레드 대신 레인(코루틴 + asyncio.Queue) 단위로 key 를 고정 배정 → 센서별 순서 보장
+    - 코루틴 함수는 await, 일반 함수는 이벤트 루프에서 바로 실행 (기존 핸들러 그대로 사용)
+    - blocking_labels 에 속한 작업(SQLite 조회 등)만 스레드 풀로 넘김
+    """
+
+    def __init__(self, lanes=64, queue_size=256, blocking_labels=("history",)):
+        self.workers         = max(1, int(lanes))
+        self.queue_size      = int(queue_size)
+        self.blocking_labels = set(blocking_labels)
+        self._queues = []
+        self._tasks  = []
+        self._loop   = None
+        self._init_stats()
+
+    @property
+    def running(self):
+        return self._loop is not None
+
+    def start(self, loop=None):
+        if self._loop is not None:
+            return
+        self._loop = loop or asyncio.get_running_loop()
+        self._queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(self.workers)]
+        self._tasks  = [self._loop.create_task(self._lane(q)) for q in self._queues]
+        logger.info("🧵 async dispatcher 시작: lanes=%d, queue_size=%d", self.workers, self.queue_size)
+
+    def stop(self):
+        for t in self._tasks:
+            t.cancel()
+        self._tasks = []
+        self._loop  = None
+
+    def submit(self, key, fn, *args, label=None) -> bool:
+        label = label or getattr(fn, "__name__", "task")
+        q = self._queues[hash(key) % self.workers]
+        try:
+            q.put_nowait((label, fn, args))
+        except asyncio.QueueFull:
+            self._count_drop(key, label)
+            return False
+        self._count_submit()
+        return True
+
+    async def _lane(self, q):
+        while True:
+            label, fn, args = await q.get()
+            t0 = time.perf_counter()
+            err = None
+            try:
+                if asyncio.iscoroutinefunction(fn):
+                    await fn(*args)
+                elif label in self.blocking_labels:
+                    await asyncio.to_thread(fn, *args)
+                else:
+                    fn(*args)
+            except Exception as e:
+                err = e
+            self._count_done(label, time.perf_counter() - t0, err)
@@ -0,0 +1,29 @@
+# fanout.py
+# 같은 명령을 여러 디바이스에 보내는 fan-out 헬퍼
+# - payload 는 한 번만 직렬화 (codec, bytes 그대로 넘기면 직렬화 생략)
+# - 그룹 토픽 사용 시 디바이스 수와 관계없이 publish 1건
+import codec
+
+# 펌웨어가 이미 구독 중인 그룹 토픽만 등록
+#   Moodlamp  : neopixel/ALL
+#   Vibrator  : vibrator/broadcast
+#   (Warning_lamp 는 자기 토픽만 구독 → 그룹 토픽 없음)
+GROUP_TOPICS = {
+    "neopixel": "neopixel/ALL",
+    "vibrator": "vibrator/broadcast",
+}
+
+def fan_out(client, prefix, devices, payload, *, qos=1, retain=False, use_group=False):
+    """
+    prefix/<device> 전체에 같은 payload 를 publish 하고 실제로 보낸 토픽 리스트를 돌려준다
+    use_group=True 이고 prefix 에 그룹 토픽이 있으면 그룹 토픽 1건만 보냄
+    """
+    data = payload if isinstance(payload, (str, bytes)) else codec.dumps(payload)
+    group = GROUP_TOPICS.get(prefix) if use_group else None
+    if group:
+        topics = [group]
+    else:
+        topics = [f"{prefix}/{dev}" for dev in dict.fromkeys(devices)]   # 순서 유지 중복 제거
+    for topic in topics:
+        client.publish(topic, data, qos=qos, retain=retain)
+    return topics
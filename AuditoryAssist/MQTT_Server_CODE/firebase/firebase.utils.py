@@ -1,9 +1,23 @@
 # firebase/firebase_utils.py
+import asyncio
 import os
+import queue
+import threading
+import time
 import firebase_admin
 from firebase_admin import credentials, messaging
 from firebase_admin import exceptions as fae
 
+from firebase.token_store import TokenStore
+from metrics import Counter, Histogram
+from logging_setup import get_logger
+
+logger = get_logger("push")
+
+_PUSH_ALERTS  = Counter("decision_push_alerts_total", "send_fcm_messages 호출 결과", ["result"])
+_PUSH_TOKENS  = Counter("decision_push_tokens_total", "토큰 단위 전송 결과", ["result"])
+_PUSH_BATCH_S = Histogram("decision_push_batch_seconds", "FCM multicast 배치 1건 전송 시간 (재시도 포함)")
+
 # 경로 상수
 TOKENS_PATH = "/home/mqtt/MQTTpr/firebase/tokens.txt"
 KEY_PATH    = "/home/mqtt/MQTTpr/firebase/pushalret-firebase-adminsdk-fbsvc-46471ca856.json"
@@ -11,89 +25,380 @@ KEY_PATH    = "/home/mqtt/MQTTpr/firebase/pushalret-firebase-adminsdk-fbsvc-4647
 # 안드로이드 알림 채널(앱과 동일해야 함)
 ANDROID_CHANNEL_ID = "alerts"
 
+# 푸시 파이프라인 설정
+PUSH_COALESCE_SEC  = 3.0   # 같은 (title, body) 알림이 이 시간 안에 또 오면 합침
+PUSH_BATCH_MAX     = 500   # FCM multicast 1회 최대 토큰 수
+PUSH_QUEUE_SIZE    = 64
+PUSH_MAX_RETRIES   = 3
+PUSH_BACKOFF_SEC   = 0.5   # 재시도 간격: 0.5s → 1s → 2s
+PUSH_MAX_TOKEN_FAILURES = 10  # 무효 판정은 아니지만 연속 실패가 이만큼 쌓이면 토큰 정리
+PUSH_BACKEND       = os.environ.get("PUSH_BACKEND", "firebase")  # firebase | fake
+
+# 일시적 오류로 보고 재시도할 에러 코드
+_RETRYABLE_CODES = ("UNAVAILABLE", "INTERNAL", "DEADLINE_EXCEEDED", "RESOURCE_EXHAUSTED", "UNKNOWN")
+
+# 토큰 자체가 무효 → 재시도 없이 정리
+# 앱 삭제/토큰 만료는 UnregisteredError(NOT_FOUND), 다른 프로젝트 토큰은 SenderIdMismatchError
+_INVALID_TOKEN_ERRORS = (messaging.UnregisteredError, messaging.SenderIdMismatchError)
+_INVALID_TOKEN_CODES  = ("NOT_FOUND", "INVALID_ARGUMENT")   # 형식이 잘못된 토큰은 INVALID_ARGUMENT
+
 def initialize_firebase():
     if not firebase_admin._apps:
         if not os.path.exists(KEY_PATH):
             raise FileNotFoundError(f"❌ Firebase 키 파일 없음: {KEY_PATH}")
         cred = credentials.Certificate(KEY_PATH)
         firebase_admin.initialize_app(cred)
-        print("✅ Firebase Admin 초기화 완료")
+        logger.info("✅ Firebase Admin 초기화 완료")
+
+# ── 토큰 레지스트리 (경로별 1개, 최초 1회만 파일 로드) ─────────────────
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_token_store(file_path=TOKENS_PATH):
+    with _stores_lock:
+        store = _stores.get(file_path)
+        if store is None:
+            store = _stores[file_path] = TokenStore(file_path)
+        return store
+
+def close_token_stores():
+    """종료 시 WAL 을 스냅샷으로 합치고 닫기 (서버 atexit 에서 호출)"""
+    with _stores_lock:
+        stores = list(_stores.values())
+    for store in stores:
+        store.close()
 
 def load_fcm_tokens(file_path=TOKENS_PATH):
-    if not os.path.exists(file_path):
-        return []
-    with open(file_path, "r") as f:
-        return [line.strip() for line in f if line.strip()]
+    return get_token_store(file_path).tokens()
 
 def save_fcm_token(token, file_path=TOKENS_PATH):
-    tokens = load_fcm_tokens(file_path)
-    if token not in tokens:
-        with open(file_path, "a") as f:
-            f.write(token + "\n")
-        print(f"✅ FCM 토큰 저장됨: {token}")
+    if get_token_store(file_path).add(token):
+        logger.info("✅ FCM 토큰 저장됨: %s", token)
     else:
-        print(f"ℹ️ 이미 등록된 토큰: {token}")
+        logger.debug("ℹ️ 이미 등록된 토큰: %s", token)
 
 def remove_fcm_token(bad_token, file_path=TOKENS_PATH):
-    """유효하지 않은(만료/등록해제) 토큰을 파일에서 제거"""
-    if not os.path.exists(file_path):
-        return
-    tokens = load_fcm_tokens(file_path)
-    new_tokens = [t for t in tokens if t != bad_token]
-    if len(new_tokens) != len(tokens):
-        with open(file_path, "w") as f:
-            f.write("\n".join(new_tokens) + ("\n" if new_tokens else ""))
-        print(f"🧹 무효 토큰 제거: {bad_token}")
+    """유효하지 않은(만료/등록해제) 토큰을 레지스트리에서 제거"""
+    if get_token_store(file_path).remove(bad_token):
+        logger.info("🧹 무효 토큰 제거: %s", bad_token)
 
-def send_fcm_messages(title, body, token_file=TOKENS_PATH):
+def _is_invalid_token_error(e):
+    """만료/등록해제/형식 오류 토큰 판별 (예외 타입과 에러 코드로만, 메시지 문자열은 보지 않음)"""
+    if isinstance(e, _INVALID_TOKEN_ERRORS):
+        return True
+    return isinstance(e, fae.FirebaseError) and str(e.code).upper() in _INVALID_TOKEN_CODES
+
+def _is_retryable_error(e):
+    if isinstance(e, fae.FirebaseError):
+        code_s = getattr(e, "code", None)
+        return bool(code_s) and str(code_s).upper() in _RETRYABLE_CODES
+    return True  # 네트워크 예외 등 FirebaseError 가 아닌 건 일시 오류로 본다
+
+# ── 전송 백엔드 ──────────────────────────────────────────────────────────
+class FirebaseBackend:
     """
-    안드로이드 채널/우선순위/사운드 + data 포함 전송
-    - 백그라운드: 시스템 알림 표시
-    - 포그라운드: 앱의 onMessageReceived() 호출 → 로컬 알림 표시 가능
-    - 무효 토큰은 자동 정리
+    firebase_admin multicast API 로 한 번에 여러 토큰 전송
+    send_multicast(title, body, tokens) → [(ok, exception|None), ...] (tokens 순서)
     """
-    initialize_firebase()
-    tokens = load_fcm_tokens(token_file)
-    if not tokens:
-        print("⚠️ 전송할 토큰이 없습니다.")
-        return
-
-    android_cfg = messaging.AndroidConfig(
-        priority='high',
-        notification=messaging.AndroidNotification(
-            channel_id=ANDROID_CHANNEL_ID,
-            sound='default',
-        ),
-        ttl=3600,  # 1시간
-    )
-
-    common_data = {
-        "via": "mqtt_server",
-        "title": title,
-        "body": body,
-        # 상황에 따라 "type": "ai_fire|shz|mq5|mq7|all_true|water|doorbell" 추가 가능
-    }
-
-    for token in tokens:
-        msg = messaging.Message(
+
+    def send_multicast(self, title, body, tokens):
+        initialize_firebase()
+        android_cfg = messaging.AndroidConfig(
+            priority='high',
+            notification=messaging.AndroidNotification(
+                channel_id=ANDROID_CHANNEL_ID,
+                sound='default',
+            ),
+            ttl=3600,  # 1시간
+        )
+        common_data = {
+            "via": "mqtt_server",
+            "title": title,
+            "body": body,
+            # 상황에 따라 "type": "ai_fire|shz|mq5|mq7|all_true|water|doorbell" 추가 가능
+        }
+        msg = messaging.MulticastMessage(
             notification=messaging.Notification(title=title, body=body),
             android=android_cfg,
             data=common_data,
-            token=token,
+            tokens=list(tokens),
         )
-        try:
-            resp = messaging.send(msg)
-            print(f"📤 FCM 전송 성공: {token} → {resp}")
-        except fae.FirebaseError as e:
-            # 대표적인 만료/등록해제 케이스 제거
-            code_s = getattr(e, "code", None)
-            msg_s  = str(e)
-            if (code_s and str(code_s).upper() in ("UNREGISTERED", "INVALID_ARGUMENT")) \
-               or ("not registered" in msg_s.lower()) \
-               or ("unregistered" in msg_s.lower()):
-                print(f"❌ 무효/만료 토큰: {token} → 자동 제거")
-                remove_fcm_token(token, token_file)
+        resp = messaging.send_each_for_multicast(msg)
+        return [(r.success, r.exception) for r in resp.responses]
+
+class FakePushBackend:
+    """
+    로컬 테스트용 가짜 FCM 백엔드 (네트워크/키 파일 없이 동작)
+    - latency: 배치 1회당 지연(초)
+    - invalid_tokens: 항상 실제 FCM 과 같은 UnregisteredError (NOT_FOUND) 로 실패시킬 토큰
+    - fail_batches: 처음 N번의 배치 호출은 UNAVAILABLE 예외 (재시도 확인용)
+    """
+
+    def __init__(self, latency=0.05, invalid_tokens=(), fail_batches=0):
+        self.latency        = float(latency)
+        self.invalid_tokens = set(invalid_tokens)
+        self.fail_batches   = int(fail_batches)
+        self.calls          = []   # [(title, body, tokens), ...]
+
+    def send_multicast(self, title, body, tokens):
+        time.sleep(self.latency)
+        self.calls.append((title, body, list(tokens)))
+        if self.fail_batches > 0:
+            self.fail_batches -= 1
+            raise fae.UnavailableError("fake backend unavailable")
+        out = []
+        for t in tokens:
+            if t in self.invalid_tokens:
+                out.append((False, messaging.UnregisteredError("Requested entity was not found.")))
             else:
-                print(f"❌ FCM 전송 실패 ({token}): {e}")
-        except Exception as e:
-            print(f"❌ FCM 전송 실패 ({token}): {e}")
+                out.append((True, None))
+        return out
+
+# ── 푸시 디스패처 ────────────────────────────────────────────────────────
+class PushDispatcher:
+    """
+    MQTT 스레드와 분리된 FCM 전송 파이프라인
+    - 토큰은 TokenStore 에서 조회 (알림마다 tokens.txt 재읽기 없음)
+    - multicast 배치 전송 + 일시 오류 재시도/백오프
+    - 같은 알림이 PUSH_COALESCE_SEC 안에 반복되면 한 번만 전송
+    - 무효 토큰은 자동 정리
+    """
+
+    def __init__(self, backend=None, token_file=TOKENS_PATH,
+                 coalesce_sec=PUSH_COALESCE_SEC, batch_max=PUSH_BATCH_MAX,
+                 max_retries=PUSH_MAX_RETRIES, backoff_sec=PUSH_BACKOFF_SEC,
+                 queue_size=PUSH_QUEUE_SIZE):
+        self.backend      = backend or FirebaseBackend()
+        self.token_file   = token_file
+        self.coalesce_sec = float(coalesce_sec)
+        self.batch_max    = max(1, int(batch_max))
+        self.max_retries  = int(max_retries)
+        self.backoff_sec  = float(backoff_sec)
+        self._q           = queue.Queue(maxsize=queue_size)
+        self._lock        = threading.Lock()
+        self.store        = get_token_store(token_file)
+        self._last_sent   = {}   # (title, body) -> 마지막 적재 시각 (적재 시각 순, 창이 지나면 제거)
+        self._thread      = None
+        self._loop        = None   # asyncio 모드 (run_async) 일 때 이벤트 루프
+        self._aq          = None
+        self._stats = {
+            "alerts": 0, "coalesced": 0, "dropped": 0,
+            "batches": 0, "sent_ok": 0, "failed": 0, "retries": 0, "pruned": 0,
+            "last_batch_ms": 0.0, "max_batch_ms": 0.0, "total_batch_ms": 0.0,
+        }
+
+    # ── lifecycle ────────────────────────────────────────────────────────
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="fcm-push", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        if self._thread is None:
+            return
+        self._q.put(None)
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    # ── submit ───────────────────────────────────────────────────────────
+    def submit(self, title, body) -> bool:
+        key = (title, body)
+        now = time.monotonic()
+        with self._lock:
+            self._expire_coalesce(now)
+            if key in self._last_sent:
+                self._stats["coalesced"] += 1
+                _PUSH_ALERTS.labels("coalesced").inc()
+                logger.info("🔁 FCM 알림 합침 (최근 %.0fs 내 동일): %s", self.coalesce_sec, title)
+                return False
+            self._last_sent[key] = now
+            self._stats["alerts"] += 1
+            _PUSH_ALERTS.labels("queued").inc()
+            # 경로 결정과 적재를 _lock 안에서 → run_async 가 _q 를 옮기는 동안 끼어들지 않음
+            loop = self._loop
+            if loop is None:
+                try:
+                    self._q.put_nowait(key)
+                except queue.Full:
+                    self._drop_locked(key)
+                    return False
+                return True
+        loop.call_soon_threadsafe(self._put_async, key)
+        return True
+
+    def _expire_coalesce(self, now):
+        """합침 창이 지난 (title, body) 제거 (_lock 안에서). dict 는 적재 시각 순 → 앞에서부터만 확인"""
+        last_sent = self._last_sent
+        while last_sent:
+            key = next(iter(last_sent))
+            if now - last_sent[key] < self.coalesce_sec:
+                break
+            del last_sent[key]
+
+    def _drop_locked(self, key):
+        """큐 포화로 버린 알림 (_lock 안에서). 합침 키도 지워야 다음 동일 알림이 전송됨"""
+        self._last_sent.pop(key, None)
+        self._stats["dropped"] += 1
+        _PUSH_ALERTS.labels("dropped").inc()
+        logger.warning("⚠️ FCM 큐 포화 → 알림 드롭: %s", key[0])
+
+    def _put_async(self, key):
+        try:
+            self._aq.put_nowait(key)
+        except asyncio.QueueFull:
+            with self._lock:
+                self._drop_locked(key)
+
+    # ── worker ───────────────────────────────────────────────────────────
+    def _run(self):
+        while True:
+            item = self._q.get()
+            if item is None:
+                break
+            title, body = item
+            try:
+                self.deliver(title, body)
+            except Exception as e:
+                logger.error("❌ FCM 파이프라인 예외: %s", e)
+
+    async def run_async(self):
+        """
+        asyncio 모드: fcm-push 스레드 대신 이벤트 루프 코루틴으로 큐를 소비
+        (firebase_admin 전송은 동기 API 라 배치 전송 자체만 to_thread)
+        """
+        with self._lock:
+            # 루프가 묶이기 전에 submit 된 알림은 _q 에 쌓여 있음 → 이벤트 루프 큐로 옮김
+            self._aq = asyncio.Queue(maxsize=self._q.maxsize)
+            while True:
+                try:
+                    self._aq.put_nowait(self._q.get_nowait())
+                except queue.Empty:
+                    break
+            self._loop = asyncio.get_running_loop()
+        try:
+            while True:
+                title, body = await self._aq.get()
+                try:
+                    await asyncio.to_thread(self.deliver, title, body)
+                except Exception as e:
+                    logger.error("❌ FCM 파이프라인 예외: %s", e)
+        finally:
+            self._loop = None
+
+    def deliver(self, title, body):
+        """현재 토큰 전체에 배치 단위로 전송 (워커 스레드에서 호출)"""
+        tokens = self.store.tokens()
+        if not tokens:
+            logger.warning("⚠️ 전송할 토큰이 없습니다.")
+            return
+        for i in range(0, len(tokens), self.batch_max):
+            self._send_batch(title, body, tokens[i:i + self.batch_max])
+
+    def _send_batch(self, title, body, batch):
+        t0 = time.perf_counter()
+        pending = list(batch)
+        ok = failed = pruned = 0
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.backoff_sec * (2 ** (attempt - 1)))
+                with self._lock:
+                    self._stats["retries"] += 1
+            try:
+                results = self.backend.send_multicast(title, body, pending)
+            except Exception as e:
+                if attempt < self.max_retries and _is_retryable_error(e):
+                    logger.warning("⚠️ FCM 배치 전송 실패, 재시도 %d/%d: %s", attempt + 1, self.max_retries, e)
+                    continue
+                logger.error("❌ FCM 배치 전송 실패 (%d개): %s", len(pending), e)
+                failed += len(pending)
+                break
+
+            retry = []
+            for token, (success, err) in zip(pending, results):
+                if success:
+                    ok += 1
+                    self.store.mark_success(token)
+                elif err is not None and _is_invalid_token_error(err):
+                    logger.warning("❌ 무효/만료 토큰: %s → 자동 제거", token)
+                    remove_fcm_token(token, self.token_file)
+                    pruned += 1
+                elif attempt < self.max_retries and _is_retryable_error(err):
+                    retry.append(token)
+                else:
+                    logger.error("❌ FCM 전송 실패 (%s): %s", token, err)
+                    failed += 1
+                    if self.store.mark_failure(token) >= PUSH_MAX_TOKEN_FAILURES:
+                        logger.info("🧹 연속 실패 %d회 토큰 정리: %s", PUSH_MAX_TOKEN_FAILURES, token)
+                        remove_fcm_token(token, self.token_file)
+                        pruned += 1
+            pending = retry
+            if not pending:
+                break
+
+        dt_ms = (time.perf_counter() - t0) * 1000.0
+        _PUSH_BATCH_S.observe(dt_ms / 1000.0)
+        _PUSH_TOKENS.labels("ok").inc(ok)
+        _PUSH_TOKENS.labels("failed").inc(failed)
+        _PUSH_TOKENS.labels("pruned").inc(pruned)
+        with self._lock:
+            st = self._stats
+            st["batches"] += 1
+            st["sent_ok"] += ok
+            st["failed"]  += failed
+            st["pruned"]  += pruned
+            st["last_batch_ms"]   = dt_ms
+            st["total_batch_ms"] += dt_ms
+            if dt_ms > st["max_batch_ms"]:
+                st["max_batch_ms"] = dt_ms
+        logger.info("📤 FCM 배치 전송: %d개 → 성공 %d, 실패 %d, 제거 %d (%.1fms)",
+                    len(batch), ok, failed, pruned, dt_ms)
+
+    def stats(self) -> dict:
+        with self._lock:
+            st = dict(self._stats)
+        st["tokens"] = len(self.store)
+        st["queue_depth"] = (self._aq if self._loop is not None else self._q).qsize()
+        st["avg_batch_ms"] = round(st.pop("total_batch_ms") / st["batches"], 3) if st["batches"] else 0.0
+        st["last_batch_ms"] = round(st["last_batch_ms"], 3)
+        st["max_batch_ms"] = round(st["max_batch_ms"], 3)
+        return st
+
+# ── 모듈 기본 파이프라인 ─────────────────────────────────────────────────
+_push = None
+_push_lock = threading.Lock()
+
+def _make_backend():
+    if PUSH_BACKEND == "fake":
+        logger.info("🧪 FakePushBackend 사용 (PUSH_BACKEND=fake)")
+        return FakePushBackend()
+    return FirebaseBackend()
+
+def get_push_dispatcher(token_file=TOKENS_PATH):
+    global _push
+    with _push_lock:
+        if _push is None:
+            _push = PushDispatcher(backend=_make_backend(), token_file=token_file)
+            _push.start()
+        return _push
+
+async def run_push_async(token_file=TOKENS_PATH):
+    """asyncio 서버용: 기본 파이프라인을 스레드 없이 현재 이벤트 루프에서 구동"""
+    global _push
+    with _push_lock:
+        if _push is None:
+            _push = PushDispatcher(backend=_make_backend(), token_file=token_file)
+    await _push.run_async()
+
+def push_stats():
+    return _push.stats() if _push is not None else {}
+
+def send_fcm_messages(title, body, token_file=TOKENS_PATH):
+    """
+    안드로이드 채널/우선순위/사운드 + data 포함 전송 (비동기)
+    - 호출 스레드는 큐에 적재만 하고 바로 리턴, 실제 전송은 fcm-push 스레드
+    - 백그라운드: 시스템 알림 표시
+    - 포그라운드: 앱의 onMessageReceived() 호출 → 로컬 알림 표시 가능
+    - 무효 토큰은 자동 정리
+    """
+    return get_push_dispatcher(token_file).submit(title, body)
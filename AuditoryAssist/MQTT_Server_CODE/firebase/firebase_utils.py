@@ -0,0 +1 @@
+firebase.utils.py
\ No newline at end of file
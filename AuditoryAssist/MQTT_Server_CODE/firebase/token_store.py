@@ -0,0 +1,140 @@
+# firebase/token_store.py
+import os
+import threading
+import time
+
+class TokenStore:
+    """
+    FCM 토큰 레지스트리 (메모리 인덱스 + WAL 영속화)
+    - 멤버십 확인/추가/삭제는 dict 조회라 O(1), 파일 스캔 없음
+    - 변경은 <path>.wal 에 한 줄씩 append ("+token" / "-token")
+    - WAL 이 compact_every 줄을 넘으면 스냅샷(<path>)을 임시 파일에 쓰고 os.replace 로 교체
+    - 토큰별 메타데이터(added, last_success, failures)는 메모리에만 유지
+    스냅샷 파일 형식은 기존 tokens.txt 와 같다 (한 줄에 토큰 하나).
+    """
+
+    def __init__(self, path, compact_every=200):
+        self.path          = path
+        self.wal_path      = path + ".wal"
+        self.compact_every = int(compact_every)
+        self._tokens       = {}   # token -> meta (삽입 순서 유지)
+        self._lock         = threading.Lock()
+        self._wal          = None
+        self._wal_ops      = 0
+        self._load()
+
+    # ── 로딩 ─────────────────────────────────────────────────────────────
+    def _load(self):
+        now = time.time()
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                for line in f:
+                    t = line.strip()
+                    if t:
+                        self._tokens.setdefault(t, self._new_meta(now))
+        if os.path.exists(self.wal_path):
+            with open(self.wal_path, "r") as f:
+                for line in f:
+                    line = line.strip()
+                    if len(line) < 2:
+                        continue
+                    op, t = line[0], line[1:]
+                    if op == "+":
+                        self._tokens.setdefault(t, self._new_meta(now))
+                    elif op == "-":
+                        self._tokens.pop(t, None)
+                    self._wal_ops += 1
+        if self._wal_ops:
+            self.compact()
+
+    @staticmethod
+    def _new_meta(now):
+        return {"added": now, "last_success": None, "failures": 0}
+
+    # ── 조회 ─────────────────────────────────────────────────────────────
+    def __contains__(self, token):
+        return token in self._tokens
+
+    def __len__(self):
+        return len(self._tokens)
+
+    def tokens(self):
+        with self._lock:
+            return list(self._tokens)
+
+    def meta(self, token):
+        with self._lock:
+            m = self._tokens.get(token)
+            return dict(m) if m else None
+
+    # ── 변경 ─────────────────────────────────────────────────────────────
+    def add(self, token) -> bool:
+        """새 토큰이면 True"""
+        with self._lock:
+            if token in self._tokens:
+                return False
+            self._tokens[token] = self._new_meta(time.time())
+            self._append_wal("+", token)
+            return True
+
+    def remove(self, token) -> bool:
+        """실제로 지웠으면 True"""
+        with self._lock:
+            if self._tokens.pop(token, None) is None:
+                return False
+            self._append_wal("-", token)
+            return True
+
+    def mark_success(self, token):
+        with self._lock:
+            m = self._tokens.get(token)
+            if m:
+                m["last_success"] = time.time()
+                m["failures"] = 0
+
+    def mark_failure(self, token) -> int:
+        """연속 실패 횟수 리턴 (없는 토큰이면 0)"""
+        with self._lock:
+            m = self._tokens.get(token)
+            if not m:
+                return 0
+            m["failures"] += 1
+            return m["failures"]
+
+    # ── 영속화 ───────────────────────────────────────────────────────────
+    def _append_wal(self, op, token):
+        # self._lock 보유 상태에서 호출
+        if self._wal is None:
+            self._wal = open(self.wal_path, "a")
+        self._wal.write(op + token + "\n")
+        self._wal.flush()
+        self._wal_ops += 1
+        if self._wal_ops >= self.compact_every:
+            self._compact_locked()
+
+    def compact(self):
+        with self._lock:
+            self._compact_locked()
+
+    def _compact_locked(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write("".join(t + "\n" for t in self._tokens))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        # 스냅샷이 확정된 뒤에 WAL 비우기
+        if self._wal is not None:
+            self._wal.close()
+            self._wal = None
+        if os.path.exists(self.wal_path):
+            os.remove(self.wal_path)
+        self._wal_ops = 0
+
+    def close(self):
+        with self._lock:
+            if self._wal_ops:
+                self._compact_locked()
+            if self._wal is not None:
+                self._wal.close()
+                self._wal = None
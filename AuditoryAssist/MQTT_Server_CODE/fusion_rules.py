@@ -0,0 +1,179 @@
+# fusion_rules.py
+# 센서 이벤트 융합 규칙 엔진 (ALL-TRUE 일반화)
+# fusion_rules.json 예시:
+# {
+#   "rules": [
+#     {"name": "all_true", "type": "all", "sensors": "*"},
+#     {"name": "fire_2_in_30s", "type": "k_of_n", "k": 2, "window_sec": 30,
+#      "sensors": ["shz_sensor_pico", "AI_D_fire"]},
+#     {"name": "gas_score", "type": "weighted", "threshold": 1.5, "window_sec": 60,
+#      "weights": {"gas_sensor_pico": 1.0, "mq7_sensor_pico": 0.8}}
+#   ]
+# }
+# "sensors": "*" 는 MQTT_config.json 의 participates_in_alltrue 센서 전체
+import json, os, threading, time
+from collections import deque
+from logging_setup import get_logger
+
+logger = get_logger("fusion")
+
+class Rule:
+    """
+    가중치 합(score) >= threshold 이면 발화
+    - all    : 모든 센서 가중치 1, threshold = 센서 수
+    - k_of_n : 가중치 1, threshold = k
+    - weighted
+    window_sec 가 있으면 그 시간 안에 True 가 된 센서만 인정 (없으면 reset 전까지 유지)
+    """
+
+    def __init__(self, name, weights, threshold, window_sec=None, enabled=True):
+        self.name       = name
+        self.weights    = dict(weights)
+        self.threshold  = float(threshold)
+        self.window_sec = float(window_sec) if window_sec else None
+        self.enabled    = enabled
+        self.reset()
+
+    def reset(self):
+        self.active = {}        # sensor_id -> True 가 된 시각
+        self.score  = 0.0
+        self.events = deque()   # (ts, sensor_id), window 만료 처리용
+
+    def _expire(self, now):
+        if self.window_sec is None:
+            return
+        limit = now - self.window_sec
+        ev = self.events
+        while ev and ev[0][0] < limit:
+            ts, sid = ev.popleft()
+            if self.active.get(sid) == ts:
+                del self.active[sid]
+                self.score -= self.weights[sid]
+
+    def observe(self, sensor_id, on, now) -> bool:
+        """센서 상태 변경 1건 반영 후 발화 여부"""
+        self._expire(now)
+        if on:
+            if sensor_id not in self.active:
+                self.score += self.weights[sensor_id]
+            self.active[sensor_id] = now
+            if self.window_sec is not None:
+                self.events.append((now, sensor_id))
+        elif sensor_id in self.active:
+            del self.active[sensor_id]
+            self.score -= self.weights[sensor_id]
+        return on and self.score >= self.threshold - 1e-9
+
+    def snapshot(self):
+        return {"name": self.name, "score": round(self.score, 3),
+                "threshold": self.threshold, "active": sorted(self.active)}
+
+class FusionEngine:
+    """센서 → 규칙 인덱스로 이벤트마다 관련 규칙만 갱신 (전체 플래그 재검사 없음)"""
+
+    def __init__(self, rules):
+        self.rules = [r for r in rules if r.enabled]
+        self._index = {}
+        for r in self.rules:
+            for sid in r.weights:
+                self._index.setdefault(sid, []).append(r)
+
+    def observe(self, sensor_id, on, now=None):
+        """발화한 규칙 리스트"""
+        now = time.time() if now is None else now
+        return [r for r in self._index.get(sensor_id, ()) if r.observe(sensor_id, on, now)]
+
+    def seed(self, active_sensor_ids, now=None):
+        """리로드 직후 현재 True 인 센서를 발화 판정 없이 상태에만 반영"""
+        now = time.time() if now is None else now
+        for sid in active_sensor_ids:
+            for r in self._index.get(sid, ()):
+                r._expire(now)
+                if sid not in r.active:
+                    r.score += r.weights[sid]
+                r.active[sid] = now
+                if r.window_sec is not None:
+                    r.events.append((now, sid))
+
+    def reset(self):
+        for r in self.rules:
+            r.reset()
+
+    def snapshot(self):
+        return [r.snapshot() for r in self.rules]
+
+def _build_rule(spec, participants):
+    kind    = spec.get("type", "all")
+    name    = spec.get("name") or kind
+    window  = spec.get("window_sec")
+    enabled = spec.get("enabled", True)
+
+    if kind == "weighted":
+        weights = {str(k): float(v) for k, v in (spec.get("weights") or {}).items()}
+        if not weights:
+            raise ValueError(f"rule '{name}': weights 비어 있음")
+        return Rule(name, weights, spec["threshold"], window, enabled)
+
+    sensors = spec.get("sensors", "*")
+    sensors = list(participants) if sensors == "*" else [str(s) for s in sensors]
+    if not sensors:
+        raise ValueError(f"rule '{name}': sensors 비어 있음")
+    weights = {s: 1.0 for s in sensors}
+    if kind == "all":
+        return Rule(name, weights, len(sensors), window, enabled)
+    if kind == "k_of_n":
+        k = int(spec["k"])
+        if not 1 <= k <= len(sensors):
+            raise ValueError(f"rule '{name}': k={k} 범위 밖 (센서 {len(sensors)}개)")
+        return Rule(name, weights, k, window, enabled)
+    raise ValueError(f"rule '{name}': 알 수 없는 type '{kind}'")
+
+def build_engine(spec, participants):
+    return FusionEngine([_build_rule(r, participants) for r in spec.get("rules", [])])
+
+class FusionRules:
+    """
+    fusion_rules.json 을 로드하고 mtime 이 바뀌면 다시 읽어 엔진을 통째로 교체
+    - 파일이 없으면 기존 동작과 같은 ALL-TRUE 규칙 하나만 사용
+    - 새 파일이 잘못되었으면 기존 엔진 유지
+    """
+
+    DEFAULT_SPEC = {"rules": [{"name": "all_true", "type": "all", "sensors": "*"}]}
+
+    def __init__(self, path, participants):
+        self.path         = path
+        self.participants = list(participants)
+        self._mtime       = None
+        self._lock        = threading.Lock()
+        self.engine       = build_engine(self._read_spec(), self.participants)
+
+    def _read_spec(self):
+        if not os.path.exists(self.path):
+            self._mtime = None
+            return self.DEFAULT_SPEC
+        self._mtime = os.stat(self.path).st_mtime
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def maybe_reload(self, active_sensor_ids=()) -> bool:
+        try:
+            mtime = os.stat(self.path).st_mtime if os.path.exists(self.path) else None
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        return self.reload(active_sensor_ids)
+
+    def reload(self, active_sensor_ids=(), participants=None) -> bool:
+        with self._lock:
+            if participants is not None:
+                self.participants = list(participants)
+            try:
+                engine = build_engine(self._read_spec(), self.participants)
+            except Exception as e:
+                logger.error("❌ fusion rules 로드 실패 → 기존 규칙 유지: %s", e)
+                return False
+            engine.seed(active_sensor_ids)
+            self.engine = engine
+        logger.info("🔁 fusion rules 로드: %s", [r.name for r in engine.rules])
+        return True
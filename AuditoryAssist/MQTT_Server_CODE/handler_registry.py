@@ -1,3 +1,5 @@
+import threading
+
 HANDLER_NAME_MAP = {}
 
 def register_handler(name):
@@ -5,3 +7,16 @@ def register_handler(name):
         HANDLER_NAME_MAP[name] = func
         return func
     return wrapper
+
+# 내장 토픽 라우트 (제어/로그/레지스트리 등): MQTT 토픽 필터 → 함수
+TOPIC_HANDLER_MAP = {}
+
+def register_topic(topic_filter):
+    def wrapper(func):
+        TOPIC_HANDLER_MAP[topic_filter] = func
+        return func
+    return wrapper
+
+# 핸들러 context 의 공유 상태(sensor_status / just_triggered) 보호용
+# 워커·스케줄러 스레드가 함께 씀 → 상태 읽기/쓰기 구간만 잡고 publish/push 같은 I/O 는 밖에서
+state_lock = threading.RLock()
@@ -1,63 +1,88 @@
-from handler_registry import register_handler
-import json
-import threading
+from handler_registry import register_handler, state_lock
 from firebase.firebase_utils import send_fcm_messages, save_fcm_token
+from scheduler import scheduler
+from fanout import fan_out
+from logging_setup import get_logger
 
-print("✅ handlers.py 로드됨 - 핸들러 등록 완료")
+logger = get_logger("handlers")
+logger.info("✅ handlers.py 로드됨 - 핸들러 등록 완료")
+
+# --- 센서 상태 기록 (lock 은 dict 갱신 동안만, 이후 publish/push 는 lock 밖) ---
+def set_sensor_status(context, sid, on):
+    with state_lock:
+        context["sensor_status"][sid] = on
 
 # --- flash 중복 방지 (ALL-TRUE 직후 단색 점등 억제) ---
+# just_triggered 는 워커 스레드(핸들러)와 스케줄러 스레드(해제)가 함께 씀 → state_lock 안에서만
 def skip_if_recent_red(context):
-    if context.get("just_triggered", False):
-        print("🔕 최근 red_blink 발생 → flash 생략")
-        return True
-    return False
+    with state_lock:
+        recent = context.get("just_triggered", False)
+    if recent:
+        logger.info("🔕 최근 red_blink 발생 → flash 생략")
+    return recent
 
-def set_yellow_lock(context, delay=5):
-    context["just_triggered"] = True
-    def reset():
+def _release_flash_lock(context):
+    with state_lock:
         context["just_triggered"] = False
-        print("🔄 flash 중복 방지 플래그 초기화됨")
-    threading.Timer(delay, reset).start()
+    logger.info("🔄 flash 중복 방지 플래그 초기화됨")
+
+def set_yellow_lock(context, delay=5):
+    with state_lock:
+        context["just_triggered"] = True
+    # 같은 key 로 재예약 → 이전 해제 예약은 취소되어 새 잠금을 일찍 풀지 않음
+    scheduler.call_later(delay, _release_flash_lock, context, key="flash_lock")
+
+def try_flash_lock(context, delay=5):
+    """잠금이 없으면 걸고 True, 이미 걸려 있으면 False (확인과 설정을 한 번에 → 동시에 두 센서가 통과하지 않음)"""
+    with state_lock:
+        if context.get("just_triggered", False):
+            locked = False
+        else:
+            context["just_triggered"] = locked = True
+    if not locked:
+        logger.info("🔕 최근 red_blink 발생 → flash 생략")
+        return False
+    scheduler.call_later(delay, _release_flash_lock, context, key="flash_lock")
+    return True
 
 def publish_yellow_flash(client, context, sensor_id=None):
     # (호환용) 필요 시 노란색 점등이 필요한 경우만 사용
-    if skip_if_recent_red(context):
+    if not try_flash_lock(context, delay=5):
         return
-    set_yellow_lock(context, delay=5)
-    for device_id in set(context["devices"]):
-        payload = {"command": "yellow_flash", "alert": True}
-        if sensor_id:
-            payload["sensor_id"] = sensor_id
-        client.publish(f"neopixel/{device_id}", json.dumps(payload), retain=False)
-        print(f"📤 yellow_flash 전송 → neopixel/{device_id} : {payload}")
+    payload = {"command": "yellow_flash", "alert": True}
+    if sensor_id:
+        payload["sensor_id"] = sensor_id
+    topics = fan_out(client, "neopixel", context["devices"], payload, qos=0,
+                     use_group=context.get("use_group_topics", False))
+    logger.info("📤 yellow_flash 전송 → %s : %s", topics, payload)
 
 def publish_hex_flash(client, context, hex_color, sensor_id=None, duration_sec=5):
     """임의 HEX 색상으로 duration_sec 동안 점등 후 원래 무드색 복귀"""
-    if skip_if_recent_red(context):
+    if not try_flash_lock(context, delay=duration_sec):
         return
-    set_yellow_lock(context, delay=duration_sec)
-    for device_id in set(context["devices"]):
-        payload = {
-            "command": "hex_flash",
-            "color": hex_color,                       # 예: "#FD6A00"
-            "duration_ms": int(duration_sec * 1000),
-            "alert": True,
-            "issuer": "decision_server",
-        }
-        if sensor_id:
-            payload["sensor_id"] = sensor_id
-        client.publish(f"neopixel/{device_id}", json.dumps(payload), retain=False)
-        print(f"📤 hex_flash 전송 → neopixel/{device_id} : {payload}")
+    payload = {
+        "command": "hex_flash",
+        "color": hex_color,                       # 예: "#FD6A00"
+        "duration_ms": int(duration_sec * 1000),
+        "alert": True,
+        "issuer": "decision_server",
+    }
+    if sensor_id:
+        payload["sensor_id"] = sensor_id
+    topics = fan_out(client, "neopixel", context["devices"], payload, qos=0,
+                     use_group=context.get("use_group_topics", False))
+    logger.info("📤 hex_flash 전송 → %s : %s", topics, payload)
 
 def alert_message(title, body):
+    # 큐 적재만 하고 바로 리턴 (전송은 firebase_utils 의 fcm-push 스레드)
     send_fcm_messages(title, body)
 
 # --- 화재 관련 센서 ---
 @register_handler("handle_shz")  # 불꽃 감지
 def handle_shz(payload, client, context):
     sid = payload["sensor_id"]
-    context["sensor_status"][sid] = True
-    print(f"🔥 불꽃 센서 감지: {sid}")
+    set_sensor_status(context, sid, True)
+    logger.info("🔥 불꽃 센서 감지: %s", sid)
     # ✅ 개별 감지 기본색을 주황(#FD6A00)으로 변경 (5초)
     publish_hex_flash(client, context, "#FD6A00", sensor_id=sid, duration_sec=5)
     alert_message("불꽃 감지", "불꽃 감지 센서에서 불꽃이 감지 되었습니다.")
@@ -68,11 +93,11 @@ def handle_mq7(payload, client, context):
     status = payload.get("status", "")   # "정상" / ...
     value  = payload.get("value")
     if status == "정상":
-        context["sensor_status"][sid] = False
-        print(f"✅ MQ7 정상 보고: sensor={sid}, value={value}")
+        set_sensor_status(context, sid, False)
+        logger.debug("✅ MQ7 정상 보고: sensor=%s, value=%s", sid, value)
         return
-    context["sensor_status"][sid] = True
-    print(f"☠️ MQ7 위험 감지: sensor={sid}, status={status}, value={value}")
+    set_sensor_status(context, sid, True)
+    logger.info("☠️ MQ7 위험 감지: sensor=%s, status=%s, value=%s", sid, status, value)
     # ✅ 주황(#FD6A00) 5초
     publish_hex_flash(client, context, "#FD6A00", sensor_id=sid, duration_sec=5)
     alert_message("일산화탄소 감지", "일산화탄소 센서에서 일산화탄소가 감지 되었습니다.")
@@ -83,11 +108,11 @@ def handle_gas(payload, client, context):
     status = payload.get("status", "")
     value  = payload.get("value")
     if status == "정상":
-        context["sensor_status"][sid] = False
-        print(f"✅ GAS 정상 보고: sensor={sid}, value={value}")
+        set_sensor_status(context, sid, False)
+        logger.debug("✅ GAS 정상 보고: sensor=%s, value=%s", sid, value)
         return
-    context["sensor_status"][sid] = True
-    print(f"🧪 GAS 위험 감지: sensor={sid}, status={status}, value={value}")
+    set_sensor_status(context, sid, True)
+    logger.info("🧪 GAS 위험 감지: sensor=%s, status=%s, value=%s", sid, status, value)
     # ✅ 가스는 보라색 #8300FD (5초)
     publish_hex_flash(client, context, "#8300FD", sensor_id=sid, duration_sec=5)
     alert_message("가스 감지", "가스 센서에서 가스가 감지 되었습니다.")
@@ -95,8 +120,8 @@ def handle_gas(payload, client, context):
 @register_handler("handle_fire")  # AI 불
 def handle_fire(payload, client, context):
     sid = payload["sensor_id"]
-    context["sensor_status"][sid] = True
-    print(f"🔥 AI 화재 감지: {sid}")
+    set_sensor_status(context, sid, True)
+    logger.info("🔥 AI 화재 감지: %s", sid)
     # ✅ 개별 감지 기본색 주황(#FD6A00) 5초
     publish_hex_flash(client, context, "#FD6A00", sensor_id=sid, duration_sec=5)
     alert_message("AI 불 감지", "실시간 카메라에서 불이 감지 되었습니다.")
@@ -107,14 +132,14 @@ def publish_to_all_neopixels(client, context, command, extra=None):
     payload = {"command": command}
     if isinstance(extra, dict):
         payload.update(extra)
-    for device_id in set(context.get("devices", [])):
-        client.publish(f"neopixel/{device_id}", json.dumps(payload), retain=False)
-        print(f"📤 {command} 전송 → neopixel/{device_id}")
+    topics = fan_out(client, "neopixel", context.get("devices", []), payload, qos=0,
+                     use_group=context.get("use_group_topics", False))
+    logger.info("📤 %s 전송 → %s", command, topics)
 
 @register_handler("handle_water_level")
 def handle_water_level(payload, client, context):
     sensor_id = payload.get("sensor_id", "water_level_1")
-    print(f"💧 수위 센서 감지: {sensor_id}")
+    logger.info("💧 수위 센서 감지: %s", sensor_id)
     # 3초 → 5초
     publish_hex_flash(client, context, "#0045FD", sensor_id=sensor_id, duration_sec=5)
     alert_message("수위 감지", "수위 센서에서 수위가 감지 되었으니 물 넘치는 것을 확인을 해주세요.")
@@ -122,7 +147,7 @@ def handle_water_level(payload, client, context):
 @register_handler("handle_doorbell")
 def handle_doorbell(payload, client, context):
     sensor_id = payload.get("sensor_id", "doorbell_1")
-    print(f"🔔 초인종(버튼) 감지: {sensor_id}")
+    logger.info("🔔 초인종(버튼) 감지: %s", sensor_id)
     # 3초 → 5초
     publish_hex_flash(client, context, "#00FD05", sensor_id=sensor_id, duration_sec=5)
     alert_message("초인종 버튼 감지", "초인종 버튼이 감지가 되었으니 밖의 문을 확인해주세요.")
@@ -134,4 +159,4 @@ def register_token(payload, client, context):
     if token:
         save_fcm_token(token)
     else:
-        print(f"⚠️ FCM 토큰 없음 → payload: {payload}")
+        logger.warning("⚠️ FCM 토큰 없음 → payload: %s", payload)
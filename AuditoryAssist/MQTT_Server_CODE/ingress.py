@@ -0,0 +1,77 @@
+# ingress.py
+# 센서 이벤트 입구 필터 (핸들러 dispatch 전에 버릴 메시지 판정)
+# - steady    : 이미 "정상" 인 센서의 "정상" 주기 보고 (상태 변화 없음)
+# - duplicate : 같은 sensor_id/status 가 dedup_window 안에 반복
+# - rate      : 센서별 토큰 버킷 초과
+import threading, time
+
+class _SensorState:
+    __slots__ = ("status", "accepted_at", "tokens", "refill_at")
+
+    def __init__(self, burst, now):
+        self.status      = None
+        self.accepted_at = 0.0
+        self.tokens      = float(burst)
+        self.refill_at   = now
+
+class IngressFilter:
+    """
+    check() 가 None 이면 통과, 아니면 버린 이유 문자열
+    status 가 없는 이벤트(초인종 등)는 중복 판정 없이 rate limit 만 적용
+    forget() : 상태 플래그가 리셋되면(ALL-TRUE 후/reset_all) 마지막 상태를 잊어 다음 보고를 다시 받음
+    """
+
+    def __init__(self, dedup_window_sec=30.0, steady_refresh_sec=300.0,
+                 rate_per_sec=1.0, burst=5, steady_statuses=("정상",)):
+        self.dedup_window_sec   = float(dedup_window_sec)
+        self.steady_refresh_sec = float(steady_refresh_sec)
+        self.rate_per_sec       = float(rate_per_sec)
+        self.burst              = float(burst)
+        self.steady_statuses    = frozenset(steady_statuses)
+        self._lock    = threading.Lock()
+        self._sensors = {}
+        self._counts  = {"accepted": 0, "steady": 0, "duplicate": 0, "rate": 0}
+
+    def check(self, sensor_id, status=None, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            st = self._sensors.get(sensor_id)
+            if st is None:
+                st = self._sensors[sensor_id] = _SensorState(self.burst, now)
+
+            if status is not None and status == st.status:
+                steady = status in self.steady_statuses
+                window = self.steady_refresh_sec if steady else self.dedup_window_sec
+                if now - st.accepted_at < window:
+                    reason = "steady" if steady else "duplicate"
+                    self._counts[reason] += 1
+                    return reason
+
+            st.tokens = min(self.burst, st.tokens + (now - st.refill_at) * self.rate_per_sec)
+            st.refill_at = now
+            if st.tokens < 1.0:
+                self._counts["rate"] += 1
+                return "rate"
+            st.tokens -= 1.0
+
+            st.status      = status
+            st.accepted_at = now
+            self._counts["accepted"] += 1
+            return None
+
+    def forget(self, sensor_ids=None):
+        """마지막 상태 기억 삭제 (토큰 버킷은 유지)"""
+        with self._lock:
+            targets = self._sensors.values() if sensor_ids is None else \
+                [self._sensors[s] for s in sensor_ids if s in self._sensors]
+            for st in targets:
+                st.status = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+            sensors = len(self._sensors)
+        collapsed = counts["steady"] + counts["duplicate"] + counts["rate"]
+        total = collapsed + counts["accepted"]
+        return {**counts, "collapsed": collapsed, "sensors": sensors,
+                "collapsed_ratio": round(collapsed / total, 3) if total else 0.0}
@@ -0,0 +1,95 @@
+# log_pipeline.py
+# 서버 로그 MQTT 송출 파이프라인
+# - 로컬 저장은 log_publish 호출 시 1회 (LogStore)
+# - MQTT 송출은 큐에 모아 두었다가 flush() 에서 한꺼번에 publish
+# - 자기 자신의 로그는 브로커가 되돌려 보내지 않도록 No Local 로 구독, 그래도 들어온 것(echo)은 파싱 전에 버린다
+import threading, time
+import codec
+
+class LogPipeline:
+    """
+    batch_max == 1 : 기록 1건 = MQTT 메시지 1건
+    batch_max  > 1 : 같은 토픽의 기록을 JSON 배열 한 프레임으로 묶어 송출
+                     (flush 사이에 그 토픽 기록이 1건뿐이면 배열로 감싸지 않고 객체 그대로)
+    """
+
+    def __init__(self, batch_max=1, max_pending=1000):
+        self.batch_max   = max(1, int(batch_max))
+        self.max_pending = int(max_pending)
+        self._lock    = threading.Lock()
+        self._pending = []      # [(topic, data), ...]  data = 직렬화된 bytes
+        self._counts  = {"local": 0, "in": 0, "echo_dropped": 0,
+                         "out_records": 0, "out_frames": 0, "dropped": 0}
+        self._last_counts = dict(self._counts)
+        self._last_t      = time.monotonic()
+
+    # ── 입력 ─────────────────────────────────────────────────────────────
+    def enqueue(self, topic, rec, stream=True, data=None):
+        """
+        서버에서 만든 기록 1건 (stream=False 면 로컬 저장만, 송출 안 함)
+        data: 이미 직렬화한 rec (없으면 여기서 직렬화)
+        """
+        with self._lock:
+            self._counts["local"] += 1
+            if not stream:
+                return
+        if data is None:
+            data = codec.dumps(rec)
+        with self._lock:
+            self._pending.append((topic, data))
+            if len(self._pending) > self.max_pending:
+                del self._pending[0]
+                self._counts["dropped"] += 1
+
+    def count_in(self):
+        with self._lock:
+            self._counts["in"] += 1
+
+    def count_echo(self):
+        with self._lock:
+            self._counts["echo_dropped"] += 1
+
+    # ── 송출 ─────────────────────────────────────────────────────────────
+    def flush(self, client):
+        with self._lock:
+            items, self._pending = self._pending, []
+        if not items:
+            return 0
+        frames = 0
+        if self.batch_max == 1:
+            for topic, data in items:
+                client.publish(topic, data, qos=0, retain=False)
+                frames += 1
+        else:
+            by_topic = {}
+            for topic, data in items:
+                by_topic.setdefault(topic, []).append(data)
+            for topic, datas in by_topic.items():
+                if len(datas) == 1:
+                    client.publish(topic, datas[0], qos=0, retain=False)
+                    frames += 1
+                    continue
+                for i in range(0, len(datas), self.batch_max):
+                    client.publish(topic, codec.join_array(datas[i:i + self.batch_max]), qos=0, retain=False)
+                    frames += 1
+        with self._lock:
+            self._counts["out_records"] += len(items)
+            self._counts["out_frames"]  += frames
+        return frames
+
+    # ── 통계 ─────────────────────────────────────────────────────────────
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def stats(self) -> dict:
+        """누적 카운터 + 직전 stats() 호출 이후 초당 비율"""
+        now = time.monotonic()
+        with self._lock:
+            counts = dict(self._counts)
+            pending = len(self._pending)
+            prev, dt = self._last_counts, max(1e-6, now - self._last_t)
+            self._last_counts, self._last_t = dict(counts), now
+        rates = {f"{k}_per_sec": round((counts[k] - prev[k]) / dt, 3)
+                 for k in ("local", "in", "echo_dropped", "out_records", "out_frames")}
+        return {**counts, **rates, "pending": pending}
@@ -0,0 +1,169 @@
+# log_store.py
+# 서버/디바이스 로그를 SQLite 에 (type, id, ts) 인덱스로 저장하고
+# 히스토리 요청((ts, rowid) 커서 페이지네이션)을 인덱스 탐색으로 처리한다.
+import asyncio, sqlite3, threading, time
+import codec
+from logging_setup import get_logger
+
+logger = get_logger("log_store")
+
+class LogStore:
+    """
+    내구성 있는 로그 저장소
+    - append(): 메모리 pending 리스트에 적재만 (MQTT 스레드 블로킹 최소화)
+    - 백그라운드 스레드가 flush_interval 마다 executemany 로 일괄 INSERT
+    - query(): (typ, id, ts) 인덱스 역순 탐색 + LIMIT → O(log n + limit)
+      ts 는 초 단위라 같은 초에 여러 건 → 다음 페이지 커서는 (ts, rowid) 쌍
+    - 보존 정책: 서버 수신 시각(recv_ts) 기준 max_age_sec 보다 오래된 행, key 별 max_rows_per_key 초과분 삭제
+      (디바이스가 보낸 ts 는 시계가 틀릴 수 있어 보존 판단에 쓰지 않음)
+    - pending 은 max_pending 을 넘으면 가장 오래된 것부터 버림 (메모리 상한)
+    """
+
+    def __init__(self, path, max_age_sec=7 * 24 * 3600, max_rows_per_key=20000,
+                 flush_interval=1.0, prune_interval=300.0, max_pending=10000):
+        self.path             = path
+        self.max_age_sec      = max_age_sec
+        self.max_rows_per_key = max_rows_per_key
+        self.flush_interval   = flush_interval
+        self.prune_interval   = prune_interval
+        self.max_pending      = max_pending
+        self._lock     = threading.Lock()       # pending 보호
+        self._db_lock  = threading.Lock()       # 커넥션 보호
+        self._pending  = []
+        self._dropped  = 0
+        self._stop     = threading.Event()
+        self._thread   = None
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS logs ("
+            " typ TEXT NOT NULL, id TEXT NOT NULL, ts INTEGER NOT NULL, rec TEXT NOT NULL,"
+            " recv_ts INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS logs_key_ts ON logs(typ, id, ts)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS logs_recv_ts ON logs(recv_ts)")
+        self._db.commit()
+
+    # ── lifecycle ────────────────────────────────────────────────────────
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="log-store", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        self.flush()
+        with self._db_lock:
+            self._db.close()
+
+    def _run(self):
+        last_prune = time.time()
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+                if time.time() - last_prune >= self.prune_interval:
+                    self.prune()
+                    last_prune = time.time()
+            except Exception as e:
+                logger.error("❌ log_store flush error: %s", e)
+
+    async def run_async(self):
+        """asyncio 모드: log-store 스레드 대신 코루틴이 주기적으로 flush/prune (DB 작업만 to_thread)"""
+        last_prune = time.time()
+        while not self._stop.is_set():
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await asyncio.to_thread(self.flush)
+                if time.time() - last_prune >= self.prune_interval:
+                    await asyncio.to_thread(self.prune)
+                    last_prune = time.time()
+            except Exception as e:
+                logger.error("❌ log_store flush error: %s", e)
+
+    # ── write ────────────────────────────────────────────────────────────
+    def append(self, typ, id_, rec, data=None):
+        """data: 이미 직렬화한 rec (MQTT 송출용으로 만든 bytes 재사용)"""
+        if data is None:
+            data = codec.dumps(rec)
+        text = data.decode() if isinstance(data, bytes) else data
+        row = (typ, id_, int(rec.get("ts", 0) or 0), text, int(time.time()))
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) > self.max_pending:
+                del self._pending[0]
+                self._dropped += 1
+
+    def flush(self):
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if not rows:
+            return 0
+        with self._db_lock:
+            self._db.executemany("INSERT INTO logs(typ, id, ts, rec, recv_ts) VALUES (?,?,?,?,?)", rows)
+            self._db.commit()
+        return len(rows)
+
+    def prune(self):
+        cutoff = int(time.time() - self.max_age_sec)
+        with self._db_lock:
+            self._db.execute("DELETE FROM logs WHERE recv_ts < ?", (cutoff,))
+            keys = self._db.execute(
+                "SELECT typ, id FROM logs GROUP BY typ, id HAVING COUNT(*) > ?",
+                (self.max_rows_per_key,)
+            ).fetchall()
+            for typ, id_ in keys:
+                # 최신 N 개 판단과 삭제 경계를 같은 (ts, rowid) 순서로 → ts 가 뒤섞여 들어와도 최신 N 개 유지
+                self._db.execute(
+                    "DELETE FROM logs WHERE typ=? AND id=? AND (ts, rowid) <= ("
+                    " SELECT ts, rowid FROM logs WHERE typ=? AND id=?"
+                    " ORDER BY ts DESC, rowid DESC LIMIT 1 OFFSET ?)",
+                    (typ, id_, typ, id_, self.max_rows_per_key)
+                )
+            self._db.commit()
+
+    # ── read ─────────────────────────────────────────────────────────────
+    def query(self, typ, id_, limit, before_ts=None, before_id=None, raw=False):
+        """query_page 의 기록 목록만"""
+        return self.query_page(typ, id_, limit, before_ts, before_id, raw)[0]
+
+    def query_page(self, typ, id_, limit, before_ts=None, before_id=None, raw=False):
+        """
+        커서 (before_ts, before_id) 보다 이전 기록 중 최신 limit 개를 시간 오름차순으로
+        → (items, next)  next = 이 페이지에서 가장 오래된 행의 {"before_ts", "before_id"}
+                                (limit 보다 적게 나오면 더 없음 → None)
+        before_id 없이 before_ts 만 주면 예전 방식 (ts < before_ts)
+        raw=True 면 저장된 JSON 문자열 그대로 (응답에 다시 이어 붙일 때 파싱 생략)
+        """
+        self.flush()   # 방금 들어온 기록도 보이도록
+        sql = "SELECT ts, rowid, rec FROM logs WHERE typ=? AND id=?"
+        args = [typ, id_]
+        if before_ts is not None and before_id is not None:
+            sql += " AND (ts, rowid) < (?, ?)"
+            args += [int(before_ts), int(before_id)]
+        elif before_ts:
+            sql += " AND ts < ?"
+            args.append(int(before_ts))
+        sql += " ORDER BY ts DESC, rowid DESC LIMIT ?"
+        args.append(int(limit))
+        with self._db_lock:
+            rows = self._db.execute(sql, args).fetchall()
+        nxt = {"before_ts": rows[-1][0], "before_id": rows[-1][1]} if rows and len(rows) >= int(limit) else None
+        if raw:
+            return [r[2] for r in reversed(rows)], nxt
+        return [codec.loads(r[2]) for r in reversed(rows)], nxt
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending, dropped = len(self._pending), self._dropped
+        with self._db_lock:
+            rows = self._db.execute("SELECT COUNT(*) FROM logs").fetchone()[0]
+        return {"rows": rows, "pending": pending, "dropped": dropped}
@@ -0,0 +1,120 @@
+# logging_setup.py
+# 판단 서버 공용 로깅 파이프라인
+# - 모든 모듈은 get_logger(__name__) 로 얻은 로거에 %-스타일 lazy 포맷으로 기록
+#   (레벨 미달이면 문자열을 만들지 않음)
+# - 콘솔 출력은 QueueHandler 로 레코드 적재만, 포맷/출력은 리스너 스레드 1개가 담당 (큐가 차면 버림)
+# - 서버 로그(log_publish) 레코드는 sink(SQLite 저장 + MQTT 송출 큐 적재)로 호출 스레드에서 바로 전달
+#   → 콘솔 큐가 넘쳐도 히스토리/로그 스트림 기록은 잃지 않음
+#
+# 환경변수
+#   LOG_LEVEL  : 콘솔 출력 레벨 (기본 INFO, DEBUG 면 srvlog debug 기록까지 출력)
+#   LOG_FORMAT : text(기본) | json (journald/수집기용 1줄 JSON)
+import copy, json, logging, logging.handlers, os, queue, threading
+
+ROOT_LOGGER    = "decision"
+LOG_QUEUE_SIZE = 10000
+
+_listener = None
+_dropped  = 0
+_lock     = threading.Lock()
+
+def get_logger(name) -> logging.Logger:
+    """decision.<name> 로거 (모듈 이름 그대로 넘기면 됨)"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+# ── 포맷터 ───────────────────────────────────────────────────────────────
+class StructuredFormatter(logging.Formatter):
+    """
+    text : 2026-01-01 12:00:00,000 INFO  decision.server: 메시지 key=value ...
+    json : {"ts": ..., "level": ..., "logger": ..., "msg": ..., ...fields}
+    fields 는 logger.info(..., extra={"fields": {...}}) 로 전달
+    """
+
+    def __init__(self, fmt="text"):
+        super().__init__("%(asctime)s %(levelname)-5s %(name)s: %(message)s")
+        self.json_mode = fmt == "json"
+
+    def format(self, record):
+        fields = getattr(record, "fields", None)
+        if self.json_mode:
+            doc = {"ts": round(record.created, 3), "level": record.levelname.lower(),
+                   "logger": record.name, "msg": record.getMessage()}
+            if fields:
+                doc.update(fields)
+            if record.exc_text:
+                doc["exc"] = record.exc_text
+            return json.dumps(doc, ensure_ascii=False, default=str)
+        line = super().format(record)
+        if fields:
+            line += " " + json.dumps(fields, ensure_ascii=False, default=str)
+        return line
+
+_exc_formatter = logging.Formatter()
+
+# ── 큐 핸들러 ────────────────────────────────────────────────────────────
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    기본 QueueHandler 는 호출 스레드에서 한 줄 전체를 포맷함
+    → 메시지(msg % args)와 예외 텍스트만 여기서 확정하고, 시간/필드/JSON 포맷은 리스너에서
+      (args 에 넘긴 dict/list 가 나중에 바뀌어도 기록 시점 값이 출력됨)
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        global _dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with _lock:
+                _dropped += 1
+
+# ── 설정 ─────────────────────────────────────────────────────────────────
+def setup_logging(level=None, fmt=None):
+    """프로세스당 1회. 이후 호출은 무시"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return _listener
+        level = level or os.environ.get("LOG_LEVEL", "INFO")
+        fmt   = fmt or os.environ.get("LOG_FORMAT", "text")
+
+        console = logging.StreamHandler()
+        console.setLevel(level.upper() if isinstance(level, str) else level)
+        console.setFormatter(StructuredFormatter(fmt))
+
+        q = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(min(console.level, logging.INFO))
+        root.addHandler(_LazyQueueHandler(q))
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(q, console, respect_handler_level=True)
+        _listener.start()
+        return _listener
+
+def add_sink(handler):
+    """
+    호출 스레드에서 바로 실행될 핸들러 추가 (예: 서버 로그 저장/송출 sink)
+    콘솔 큐를 거치지 않으므로 큐 포화 드롭 대상이 아님 → emit 은 메모리 적재만 할 것
+    """
+    setup_logging()
+    logging.getLogger(ROOT_LOGGER).addHandler(handler)
+
+def shutdown_logging():
+    """큐에 남은 레코드를 모두 처리하고 리스너 종료 (atexit 용)"""
+    global _listener
+    with _lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+def logging_stats() -> dict:
+    return {"dropped": _dropped}
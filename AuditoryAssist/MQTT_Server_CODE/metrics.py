@@ -0,0 +1,243 @@
+# metrics.py
+# 가벼운 Prometheus 텍스트 포맷 메트릭 레지스트리 (외부 의존성 없음)
+#   curl http://127.0.0.1:9108/metrics
+# - Counter / Gauge / Histogram, 라벨은 labels(...) 로 자식 메트릭을 받아 재사용
+# - 핫패스 비용: 라벨 자식을 미리 잡아 두면 inc/observe 1회 = lock 1회 + 덧셈 (수백 ns)
+# - Gauge.set_function(fn) 은 스크레이프 시점에만 fn() 호출 (큐 깊이/링 크기 등)
+import bisect, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging_setup import get_logger
+
+logger = get_logger("metrics")
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _fmt_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    body = ",".join('%s="%s"' % (k, str(v).replace("\\", "\\\\").replace('"', '\\"'))
+                    for k, v in pairs)
+    return "{" + body + "}"
+
+def _fmt_value(v):
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+# ── 자식(라벨 값 1세트) ──────────────────────────────────────────────────
+class _CounterChild:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, n=1.0):
+        with self._lock:
+            self.value += n
+
+class _GaugeChild:
+    __slots__ = ("_lock", "value", "fn")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+        self.fn    = None
+
+    def set(self, v):
+        self.value = float(v)
+
+    def inc(self, n=1.0):
+        with self._lock:
+            self.value += n
+
+    def dec(self, n=1.0):
+        with self._lock:
+            self.value -= n
+
+    def set_function(self, fn):
+        self.fn = fn
+
+    def get(self):
+        if self.fn is not None:
+            try:
+                return float(self.fn())
+            except Exception:
+                return float("nan")
+        return self.value
+
+class _HistogramChild:
+    __slots__ = ("_lock", "bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self._lock  = threading.Lock()
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)    # 마지막 칸 = +Inf
+        self.sum    = 0.0
+        self.count  = 0
+
+    def observe(self, v):
+        i = bisect.bisect_left(self.bounds, v)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum   += v
+            self.count += 1
+
+# ── 메트릭 패밀리 ────────────────────────────────────────────────────────
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, help_, labelnames=(), registry=None):
+        self.name       = name
+        self.help       = help_
+        self.labelnames = tuple(labelnames)
+        self._children  = {}
+        self._lock      = threading.Lock()
+        if not self.labelnames:
+            self._default = self._children[()] = self._new_child()
+        (registry or REGISTRY).register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name}: 라벨 {self.labelnames} 필요, 받은 값 {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _items(self):
+        with self._lock:
+            return list(self._children.items())
+
+    def render(self, out):
+        out.append(f"# HELP {self.name} {self.help}")
+        out.append(f"# TYPE {self.name} {self.kind}")
+        self._render_samples(out)
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, n=1.0):
+        self._default.inc(n)
+
+    def _render_samples(self, out):
+        for key, c in self._items():
+            out.append(f"{self.name}{_fmt_labels(self.labelnames, key)} {_fmt_value(c.value)}")
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, v):
+        self._default.set(v)
+
+    def inc(self, n=1.0):
+        self._default.inc(n)
+
+    def dec(self, n=1.0):
+        self._default.dec(n)
+
+    def set_function(self, fn):
+        self._default.set_function(fn)
+
+    def _render_samples(self, out):
+        for key, g in self._items():
+            out.append(f"{self.name}{_fmt_labels(self.labelnames, key)} {_fmt_value(g.get())}")
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.bounds = tuple(sorted(float(b) for b in buckets))
+        super().__init__(name, help_, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, v):
+        self._default.observe(v)
+
+    def _render_samples(self, out):
+        for key, h in self._items():
+            with h._lock:
+                counts, total, n = list(h.counts), h.sum, h.count
+            acc = 0
+            for bound, c in zip(self.bounds + (float("inf"),), counts):
+                acc += c
+                lbl = _fmt_labels(self.labelnames, key, ("le", _fmt_value(bound)))
+                out.append(f"{self.name}_bucket{lbl} {acc}")
+            lbl = _fmt_labels(self.labelnames, key)
+            out.append(f"{self.name}_sum{lbl} {_fmt_value(total)}")
+            out.append(f"{self.name}_count{lbl} {n}")
+
+# ── 레지스트리 ───────────────────────────────────────────────────────────
+class Registry:
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock    = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"메트릭 이름 중복: {metric.name}")
+            self._metrics[metric.name] = metric
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        out = []
+        for m in metrics:
+            m.render(out)
+        return "\n".join(out) + "\n"
+
+REGISTRY = Registry()
+
+# ── HTTP 노출 ────────────────────────────────────────────────────────────
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):   # 스크레이프마다 stderr 출력 안 함
+        pass
+
+def start_http_server(port, addr="127.0.0.1", registry=REGISTRY):
+    """/metrics 를 데몬 스레드에서 서비스. 포트 사용 중 등 실패 시 None"""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    try:
+        server = ThreadingHTTPServer((addr, port), handler)
+    except OSError as e:
+        logger.warning("⚠️ metrics 서버 시작 실패 (%s:%s): %s", addr, port, e)
+        return None
+    server.daemon_threads = True
+    th = threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True)
+    th.start()
+    logger.info("📈 metrics: http://%s:%s/metrics", addr, port)
+    return server
@@ -0,0 +1,91 @@
+# publish_meter.py
+# client.publish 계측 레이어
+# - client 당 한 번만 설치 (재연결/중복 호출해도 래퍼가 겹겹이 쌓이지 않음)
+# - verbose=False : 토픽별 건수/바이트만 세는 래퍼 (문자열 변환/필터 검사 없음)
+# - verbose=True  : 위 + sample_every 건마다 1건씩 payload 샘플을 on_sample 로 전달
+import threading
+
+def _payload_len(payload) -> int:
+    """전송되는 바이트 수 (paho 와 같은 규칙: str 은 UTF-8, int/float 는 str() 후 UTF-8)"""
+    if payload is None:
+        return 0
+    if isinstance(payload, (bytes, bytearray)):
+        return len(payload)
+    if isinstance(payload, str):
+        return len(payload.encode())
+    return len(str(payload).encode())
+
+class PublishMeter:
+
+    def __init__(self, verbose=False, sample_every=10, exclude_prefixes=(),
+                 exclude_topics=(), on_sample=None):
+        self.verbose          = bool(verbose)
+        self.sample_every     = max(1, int(sample_every))
+        self.exclude_prefixes = tuple(exclude_prefixes)
+        self.exclude_topics   = frozenset(exclude_topics)
+        self.on_sample        = on_sample
+        self._lock   = threading.Lock()
+        self._topics = {}     # topic -> [count, bytes]
+        self._seq    = 0
+
+    # ── 설치 ─────────────────────────────────────────────────────────────
+    def install(self, client) -> bool:
+        """client.publish 를 계측 래퍼로 교체. 이미 설치된 client 면 False"""
+        if getattr(client, "_publish_meter", None) is self:
+            return False
+        orig = client.publish
+        if self.verbose and self.on_sample is not None:
+            publish = self._make_sampling(client, orig)
+        else:
+            publish = self._make_counting(orig)
+        client.publish = publish
+        client._publish_meter = self
+        return True
+
+    def _make_counting(self, orig):
+        lock, topics = self._lock, self._topics
+
+        def publish(topic, payload=None, qos=0, retain=False, properties=None):
+            n = _payload_len(payload)
+            with lock:
+                st = topics.get(topic)
+                if st is None:
+                    topics[topic] = [1, n]
+                else:
+                    st[0] += 1
+                    st[1] += n
+            return orig(topic, payload, qos, retain, properties)
+        return publish
+
+    def _make_sampling(self, client, orig):
+        counting = self._make_counting(orig)
+        lock = self._lock
+        every, prefixes, skip = self.sample_every, self.exclude_prefixes, self.exclude_topics
+
+        def publish(topic, payload=None, qos=0, retain=False, properties=None):
+            info = counting(topic, payload, qos, retain, properties)
+            if topic in skip or topic.startswith(prefixes):
+                return info
+            with lock:   # 여러 dispatcher 워커 스레드에서 동시에 publish
+                self._seq += 1
+                sample = self._seq % every == 0
+            if sample:
+                try:
+                    self.on_sample(client, topic, payload, qos, retain)
+                except Exception:
+                    pass
+            return info
+        return publish
+
+    # ── 통계 ─────────────────────────────────────────────────────────────
+    def stats(self, top=10) -> dict:
+        """전체 건수/바이트 + 건수 상위 top 개 토픽"""
+        with self._lock:
+            items = [(t, c, b) for t, (c, b) in self._topics.items()]
+        items.sort(key=lambda x: x[1], reverse=True)
+        return {
+            "messages": sum(c for _, c, _ in items),
+            "bytes": sum(b for _, _, b in items),
+            "topics": len(items),
+            "top": [{"topic": t, "count": c, "bytes": b} for t, c, b in items[:top]],
+        }
@@ -0,0 +1,168 @@
+# scheduler.py
+# 지연/주기 작업을 스레드 하나 + heap 으로 처리하는 스케줄러
+# (이벤트마다 threading.Timer 스레드를 만들지 않음)
+import heapq, itertools, threading, time
+from logging_setup import get_logger
+
+logger = get_logger("scheduler")
+
+class _Entry:
+    __slots__ = ("fn", "args", "interval", "key", "cancelled")
+
+    def __init__(self, fn, args, interval, key):
+        self.fn        = fn
+        self.args      = args
+        self.interval  = interval
+        self.key       = key
+        self.cancelled = False
+
+class Scheduler:
+    """
+    - call_later(delay, fn, *args, key=...) : delay 초 뒤 1회 실행
+    - call_every(interval, fn, *args, key=...) : interval 초마다 반복
+    - 같은 key 로 다시 예약하면 이전 예약은 취소 (재무장) → 오래된 타이머가 새 상태를 덮어쓰지 않음
+    - 작업은 스케줄러 스레드에서 실행되므로 짧게 유지할 것
+    - bind_loop(loop) 후에는 스레드 없이 asyncio 이벤트 루프 타이머로 실행 (asyncio 모드)
+    """
+
+    def __init__(self, name="scheduler"):
+        self.name      = name
+        self._heap     = []
+        self._keys     = {}
+        self._seq      = itertools.count()
+        self._cv       = threading.Condition()
+        self._thread   = None
+        self._stopped  = False
+        self._executed = 0
+        self._errors   = 0
+        self._loop     = None     # asyncio 모드일 때 이벤트 루프
+        self._live     = set()    # asyncio 모드에서 살아 있는 예약
+
+    # ── lifecycle ────────────────────────────────────────────────────────
+    def start(self):
+        with self._cv:
+            if self._thread is not None:
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def bind_loop(self, loop):
+        """asyncio 모드: 이후 예약은 loop.call_later 로 이벤트 루프에서 실행"""
+        with self._cv:
+            self._loop = loop
+
+    def stop(self, timeout=2.0):
+        with self._cv:
+            self._stopped = True
+            self._cv.notify()
+            th, self._thread = self._thread, None
+        if th is not None:
+            th.join(timeout=timeout)
+
+    # ── 예약 ─────────────────────────────────────────────────────────────
+    def call_later(self, delay, fn, *args, key=None):
+        return self._schedule(delay, fn, args, None, key)
+
+    def call_every(self, interval, fn, *args, key=None, first_delay=None):
+        delay = interval if first_delay is None else first_delay
+        return self._schedule(delay, fn, args, float(interval), key)
+
+    def cancel(self, key):
+        with self._cv:
+            e = self._keys.pop(key, None)
+            if e is not None:
+                e.cancelled = True
+                self._live.discard(e)
+                return True
+            return False
+
+    def _replace_key(self, key, e):
+        if key is not None:
+            old = self._keys.get(key)
+            if old is not None:
+                old.cancelled = True
+                self._live.discard(old)
+            self._keys[key] = e
+
+    def _schedule(self, delay, fn, args, interval, key):
+        if self._loop is not None:
+            return self._schedule_async(delay, fn, args, interval, key)
+        if self._thread is None:
+            self.start()
+        e = _Entry(fn, args, interval, key)
+        with self._cv:
+            self._replace_key(key, e)
+            heapq.heappush(self._heap, (time.monotonic() + float(delay), next(self._seq), e))
+            self._cv.notify()
+        return e
+
+    # ── 실행 루프 ────────────────────────────────────────────────────────
+    def _run(self):
+        while True:
+            with self._cv:
+                while True:
+                    if self._stopped:
+                        return
+                    if not self._heap:
+                        self._cv.wait()
+                        continue
+                    when, _, e = self._heap[0]
+                    if e.cancelled:
+                        heapq.heappop(self._heap)
+                        continue
+                    wait = when - time.monotonic()
+                    if wait <= 0:
+                        heapq.heappop(self._heap)
+                        break
+                    self._cv.wait(wait)
+                if e.interval is not None:
+                    nxt = when + e.interval
+                    if nxt < time.monotonic():   # 밀렸으면 따라잡기 연속 실행 대신 다음 주기로
+                        nxt = time.monotonic() + e.interval
+                    heapq.heappush(self._heap, (nxt, next(self._seq), e))
+                elif e.key is not None and self._keys.get(e.key) is e:
+                    del self._keys[e.key]
+            self._execute(e)
+
+    def _execute(self, e):
+        try:
+            e.fn(*e.args)
+        except Exception as ex:
+            self._errors += 1
+            logger.error("❌ scheduler 작업 예외 (%s): %s", getattr(e.fn, "__name__", e.fn), ex)
+        self._executed += 1
+
+    # ── asyncio 모드 ─────────────────────────────────────────────────────
+    def _schedule_async(self, delay, fn, args, interval, key):
+        e = _Entry(fn, args, interval, key)
+        with self._cv:
+            self._replace_key(key, e)
+            self._live.add(e)
+        # 다른 스레드(to_thread 작업 등)에서 예약해도 안전하도록 루프 스레드에서 무장
+        self._loop.call_soon_threadsafe(self._arm, e, float(delay))
+        return e
+
+    def _arm(self, e, delay):
+        if not e.cancelled:
+            self._loop.call_later(delay, self._fire, e)
+
+    def _fire(self, e):
+        if e.cancelled:
+            return
+        with self._cv:
+            if e.interval is not None:
+                self._loop.call_later(e.interval, self._fire, e)
+            else:
+                self._live.discard(e)
+                if e.key is not None and self._keys.get(e.key) is e:
+                    del self._keys[e.key]
+        self._execute(e)
+
+    def stats(self) -> dict:
+        with self._cv:
+            pending = sum(1 for _, _, e in self._heap if not e.cancelled) + len(self._live)
+        return {"pending": pending, "executed": self._executed, "errors": self._errors}
+
+# 프로세스 공용 스케줄러 (handlers.py / 서버 모두 이것 하나만 사용)
+scheduler = Scheduler()
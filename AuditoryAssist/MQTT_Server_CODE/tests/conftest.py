@@ -0,0 +1,39 @@
+# tests/conftest.py
+# 서버 모듈은 평면 import (MQTT_Server_CODE 를 sys.path 에) — bench/ 스크립트와 같은 방식
+import os, sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SERVER_DIR = os.path.dirname(HERE)
+sys.path.insert(0, SERVER_DIR)
+
+os.environ.setdefault("PUSH_BACKEND", "fake")
+
+class FakeClient:
+    """publish 기록만 하는 paho Client 대용"""
+
+    def __init__(self):
+        self.published = []
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        self.published.append((topic, payload))
+
+@pytest.fixture
+def fake_client():
+    return FakeClient()
+
+@pytest.fixture(scope="session")
+def server(tmp_path_factory):
+    """
+    MQTT_decision_server import (설정 파일은 서버 디렉터리 기준 상대 경로,
+    로그 DB 는 DECISION_LOG_DB 로 임시 디렉터리에 → 작업 트리에 파일을 남기지 않음)
+    """
+    os.environ["DECISION_LOG_DB"] = str(tmp_path_factory.mktemp("server") / "server_logs.sqlite3")
+    cwd = os.getcwd()
+    os.chdir(SERVER_DIR)
+    try:
+        import MQTT_decision_server as S
+    finally:
+        os.chdir(cwd)
+    return S
@@ -0,0 +1,76 @@
+# tests/test_dispatcher.py
+import threading, time
+
+from dispatcher import HandlerDispatcher
+
+def _keys_on_different_workers(d):
+    """서로 다른 워커 큐로 가는 key 2개"""
+    a = "sensor_a"
+    for i in range(100):
+        b = f"sensor_b{i}"
+        if d._queue_for(b) is not d._queue_for(a):
+            return a, b
+    raise AssertionError("다른 워커로 가는 key 없음")
+
+def test_same_key_runs_in_submit_order():
+    d = HandlerDispatcher(workers=4, queue_size=256)
+    d.start()
+    try:
+        seen, done = [], threading.Event()
+
+        def job(i):
+            seen.append(i)
+            time.sleep(0.001 * (i % 3))      # 처리 시간이 달라도 순서는 유지
+            if i == 49:
+                done.set()
+
+        for i in range(50):
+            assert d.submit("mq7_1", job, i)
+        assert done.wait(5)
+        assert seen == list(range(50))
+    finally:
+        d.stop()
+
+def test_blocked_key_does_not_block_other_key():
+    d = HandlerDispatcher(workers=4, queue_size=16)
+    d.start()
+    try:
+        a, b = _keys_on_different_workers(d)
+        release, b_done = threading.Event(), threading.Event()
+        d.submit(a, release.wait, 5)
+        d.submit(b, b_done.set)
+        assert b_done.wait(1), "다른 센서 작업이 막힌 작업 뒤에 대기함"
+        assert not release.is_set()
+        release.set()
+    finally:
+        d.stop()
+
+def test_slow_handler_io_does_not_hold_state_lock(server, fake_client):
+    """핸들러 안의 느린 I/O(publish/push) 중에도 다른 센서 핸들러·상태 잠금은 진행"""
+    context = {"sensor_status": {"a": False, "b": False}, "just_triggered": False}
+    cfg = {"participates_in_alltrue": False}
+    in_io, release = threading.Event(), threading.Event()
+
+    def slow_handler(payload, client, ctx):
+        in_io.set()
+        release.wait(5)                      # 브로커/FCM 지연 흉내
+
+    def fast_handler(payload, client, ctx):
+        ctx["sensor_status"][payload["sensor_id"]] = True
+
+    th = threading.Thread(target=server._run_sensor_handler,
+                          args=(slow_handler, cfg, {"sensor_id": "a"}, fake_client, context))
+    th.start()
+    try:
+        assert in_io.wait(2)
+        other = threading.Thread(target=server._run_sensor_handler,
+                                 args=(fast_handler, cfg, {"sensor_id": "b"}, fake_client, context))
+        other.start()
+        other.join(1)
+        assert not other.is_alive(), "느린 핸들러가 _state_lock 을 잡고 있음"
+        assert context["sensor_status"]["b"] is True
+        assert server._state_lock.acquire(timeout=1)
+        server._state_lock.release()
+    finally:
+        release.set()
+        th.join(2)
@@ -0,0 +1,43 @@
+# tests/test_flash_lock.py
+import threading
+
+import handlers
+from handler_registry import state_lock
+from scheduler import scheduler
+
+def _context():
+    return {"devices": ["Neopixel_1"], "sensor_status": {}, "just_triggered": False}
+
+def test_concurrent_flashes_publish_once(fake_client):
+    context = _context()
+    start = threading.Barrier(8)
+
+    def flash():
+        start.wait()
+        handlers.publish_hex_flash(fake_client, context, "#FD6A00", sensor_id="x", duration_sec=60)
+
+    threads = [threading.Thread(target=flash) for _ in range(8)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join(2)
+    scheduler.cancel("flash_lock")
+    assert len(fake_client.published) == 1
+    assert context["just_triggered"] is True
+
+def test_flag_writes_wait_for_state_lock(fake_client):
+    context = _context()
+    done = threading.Event()
+
+    def release():
+        handlers._release_flash_lock(context)
+        done.set()
+
+    context["just_triggered"] = True
+    with state_lock:
+        th = threading.Thread(target=release)
+        th.start()
+        assert not done.wait(0.2)       # 상태 구간을 잡고 있는 동안 해제가 끼어들지 않음
+        assert context["just_triggered"] is True
+    assert done.wait(2)
+    assert context["just_triggered"] is False
@@ -0,0 +1,50 @@
+# tests/test_log_echo.py
+import json
+
+from paho.mqtt.client import topic_matches_sub
+
+from log_pipeline import LogPipeline
+
+class _RecordingClient:
+    """subscribe/publish 를 기록하는 paho Client 대용"""
+
+    def __init__(self):
+        self.subs = []        # [(filter, no_local), ...]
+        self.published = []
+
+    def subscribe(self, topic, qos=0, options=None, properties=None):
+        self.subs.append((topic, bool(options is not None and options.noLocal)))
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        self.published.append((topic, payload))
+
+def test_server_publish_never_delivered_back(server):
+    c = _RecordingClient()
+    server.on_connect(c, server.userdata, {}, 0)
+    assert (server.LOG_SUBSCRIBE, True) in c.subs
+
+    server.log_publish(c, typ="server", id_="server", level="info", msg="echo check")
+    server.handle_history_request(c, {"id": "server", "type": "server", "limit": 5})
+    server.log_pipeline.flush(c)
+
+    topics = {t for t, _ in c.published} | {server.SERVER_LOG_TOPIC}
+    assert f"{server.LOG_HISTORY_PREFIX}/server/server" in topics
+    for topic in topics:
+        # 서버가 publish 하는 토픽에 걸리는 구독은 모두 No Local → 브로커가 되돌려 보내지 않음
+        back = [f for f, no_local in c.subs if topic_matches_sub(f, topic) and not no_local]
+        assert back == [], (topic, back)
+
+def test_batched_frames_per_topic():
+    p = LogPipeline(batch_max=2)
+    c = _RecordingClient()
+    for i in range(3):
+        p.enqueue("interfaceui/logs/server/server", {"n": i})
+    p.enqueue("interfaceui/logs/server/other", {"n": 9})
+    assert p.flush(c) == 3
+    frames = {}
+    for topic, payload in c.published:
+        frames.setdefault(topic, []).append(json.loads(payload))
+    assert frames["interfaceui/logs/server/server"] == [[{"n": 0}, {"n": 1}], [{"n": 2}]]
+    assert frames["interfaceui/logs/server/other"] == [{"n": 9}]    # 1건이면 객체 그대로
+    st = p.stats()
+    assert (st["out_records"], st["out_frames"]) == (4, 3)
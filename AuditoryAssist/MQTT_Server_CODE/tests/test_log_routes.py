@@ -0,0 +1,39 @@
+# tests/test_log_routes.py
+import json
+
+class _Msg:
+    def __init__(self, topic, payload):
+        self.topic = topic
+        self.payload = json.dumps(payload).encode()
+
+def test_log_route_keeps_wildcard_semantics(server):
+    route = server.router.match
+    assert route("interfaceui/logs/subscriber/Neo1")[1] is server._on_log_stream
+    assert route("interfaceui/logs/publisher/pico_1/sub/deep")[1] is server._on_log_stream
+    assert route("interfaceui/logs/camera/AI_D")[1] is server._on_log_stream
+    # 더 구체적인 내장 라우트가 우선
+    assert route(server.LOG_HISTORY_REQ)[1] is server._on_history_request
+
+def test_deeper_log_topic_stored_under_type_and_id(server, fake_client):
+    server.on_message(fake_client, server.userdata,
+                      _Msg("interfaceui/logs/publisher/pico_9/extra", {"msg": "deep"}))
+    items = server.log_store.query("publisher", "pico_9", 10)
+    assert [it["msg"] for it in items] == ["deep"]
+
+def test_history_response_not_stored_as_device_log(server, fake_client):
+    server.on_message(fake_client, server.userdata,
+                      _Msg(f"{server.LOG_HISTORY_PREFIX}/subscriber/Neo1", {"items": []}))
+    assert server.log_store.query("history", "subscriber", 10) == []
+
+def test_any_device_log_type_stored(server, fake_client):
+    server.on_message(fake_client, server.userdata,
+                      _Msg("interfaceui/logs/camera/AI_D", {"msg": "cam"}))
+    assert [it["msg"] for it in server.log_store.query("camera", "AI_D", 10)] == ["cam"]
+
+def test_own_logs_dropped_before_parsing(server, fake_client):
+    before = server.log_pipeline.stats()["echo_dropped"]
+    for topic in (server.SERVER_LOG_TOPIC, f"{server.LOG_HISTORY_PREFIX}/server/server"):
+        msg = _Msg(topic, {})
+        msg.payload = b"{not json"          # 파싱하면 예외 → 파싱 전에 버려야 함
+        server.on_message(fake_client, server.userdata, msg)
+    assert server.log_pipeline.stats()["echo_dropped"] == before + 2
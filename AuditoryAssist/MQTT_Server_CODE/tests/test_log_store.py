@@ -0,0 +1,55 @@
+# tests/test_log_store.py
+import time
+
+from log_store import LogStore
+
+def _store(tmp_path, **kw):
+    return LogStore(str(tmp_path / "logs.sqlite3"), **kw)
+
+def test_cursor_pages_through_same_second_records(tmp_path):
+    store = _store(tmp_path)
+    for i in range(10):
+        store.append("subscriber", "Neo1", {"ts": 1700000000 + i // 4, "n": i})
+
+    got, cursor = [], {}
+    while True:
+        items, cursor = store.query_page("subscriber", "Neo1", 3, **cursor)
+        got = [it["n"] for it in items] + got
+        if cursor is None:
+            break
+    assert got == list(range(10))      # 같은 초(ts) 경계에서도 빠짐/중복 없음
+    store.close()
+
+def test_before_ts_only_keeps_old_behaviour(tmp_path):
+    store = _store(tmp_path)
+    for i in range(4):
+        store.append("subscriber", "Neo1", {"ts": 100 + i, "n": i})
+    assert [it["n"] for it in store.query("subscriber", "Neo1", 10, before_ts=102)] == [0, 1]
+    store.close()
+
+def test_retention_uses_server_receive_time(tmp_path):
+    store = _store(tmp_path, max_age_sec=3600)
+    store.append("publisher", "pico_1", {"ts": 1, "msg": "device clock at epoch"})
+    store.append("publisher", "pico_1", {"ts": int(time.time()) + 10 ** 6, "msg": "device clock ahead"})
+    store.flush()
+    store.prune()
+    assert len(store.query("publisher", "pico_1", 10)) == 2   # 방금 받았으므로 유지
+
+    with store._db_lock:
+        store._db.execute("UPDATE logs SET recv_ts = recv_ts - 7200")
+        store._db.commit()
+    store.prune()
+    assert store.query("publisher", "pico_1", 10) == []        # ts 와 무관하게 수신 시각으로 삭제
+    store.close()
+
+def test_per_key_prune_keeps_newest_by_ts(tmp_path):
+    store = _store(tmp_path, max_rows_per_key=3)
+    # 디바이스 ts 가 도착 순서와 다름 (rowid 순 ≠ ts 순)
+    for n, ts in enumerate([105, 101, 104, 100, 103, 102]):
+        store.append("publisher", "pico_1", {"ts": ts, "n": n})
+    store.append("publisher", "pico_2", {"ts": 1, "n": 99})
+    store.flush()
+    store.prune()
+    assert [it["ts"] for it in store.query("publisher", "pico_1", 10)] == [103, 104, 105]
+    assert len(store.query("publisher", "pico_2", 10)) == 1
+    store.close()
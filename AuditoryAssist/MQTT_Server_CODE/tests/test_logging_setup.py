@@ -0,0 +1,39 @@
+# tests/test_logging_setup.py
+import logging, queue, sys
+
+from logging_setup import ROOT_LOGGER, StructuredFormatter, _LazyQueueHandler, logging_stats
+
+def _queue_handler():
+    return next(h for h in logging.getLogger(ROOT_LOGGER).handlers if isinstance(h, _LazyQueueHandler))
+
+def test_server_log_kept_when_console_queue_full(server, fake_client, monkeypatch):
+    full = queue.Queue(maxsize=1)
+    full.put_nowait(None)
+    monkeypatch.setattr(_queue_handler(), "queue", full)
+    dropped = logging_stats()["dropped"]
+
+    server.log_publish(fake_client, typ="server", id_="server", level="info", msg="queue full check")
+
+    assert logging_stats()["dropped"] == dropped + 1        # 콘솔 출력만 버려짐
+    items = server.log_store.query("server", "server", 50)
+    assert "queue full check" in [it["msg"] for it in items]
+    server.log_pipeline.flush(fake_client)
+    assert any(b"queue full check" in p for t, p in fake_client.published if t == server.SERVER_LOG_TOPIC)
+
+def test_prepare_snapshots_mutable_args():
+    h = _LazyQueueHandler(queue.Queue())
+    targets = ["Neo1"]
+    rec = h.prepare(logging.LogRecord("decision.t", logging.INFO, __file__, 1, "targets=%s", (targets,), None))
+    targets.append("Neo2")
+    assert rec.getMessage() == "targets=['Neo1']"
+    assert "targets=['Neo1']" in StructuredFormatter("json").format(rec)
+
+def test_prepare_keeps_exception_text():
+    h = _LazyQueueHandler(queue.Queue())
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        rec = h.prepare(logging.LogRecord("decision.t", logging.ERROR, __file__, 1, "failed", (), sys.exc_info()))
+    assert rec.exc_info is None
+    assert "ValueError: boom" in StructuredFormatter("text").format(rec)
+    assert "ValueError: boom" in StructuredFormatter("json").format(rec)
@@ -0,0 +1,50 @@
+# tests/test_publish_meter.py
+import threading
+
+from publish_meter import PublishMeter
+
+class _Client:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, topic, payload=None, qos=0, retain=False, properties=None):
+        self.published.append((topic, payload))
+        return len(self.published)
+
+def test_counts_wire_bytes_for_every_payload_type():
+    meter, c = PublishMeter(), _Client()
+    meter.install(c)
+    c.publish("t/bytes", b"abc")
+    c.publish("t/str", "가스")           # UTF-8 6 bytes
+    c.publish("t/int", 1234)
+    c.publish("t/float", 0.5)
+    c.publish("t/none")
+    by_topic = {t["topic"]: t["bytes"] for t in meter.stats()["top"]}
+    assert by_topic == {"t/bytes": 3, "t/str": 6, "t/int": 4, "t/float": 3, "t/none": 0}
+    assert len(c.published) == 5
+
+def test_install_once_per_client():
+    meter, c = PublishMeter(), _Client()
+    assert meter.install(c)
+    wrapped = c.publish
+    assert not meter.install(c)
+    assert c.publish is wrapped
+
+def test_sampling_sequence_is_thread_safe():
+    samples = []
+    meter = PublishMeter(verbose=True, sample_every=10,
+                         on_sample=lambda client, topic, payload, qos, retain: samples.append(topic))
+    c = _Client()
+    meter.install(c)
+
+    def worker():
+        for _ in range(1000):
+            c.publish("neopixel/Neo1", b"{}")
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert meter._seq == 8000
+    assert len(samples) == 800
@@ -0,0 +1,96 @@
+# tests/test_push.py
+import asyncio
+import time
+
+from firebase_admin import messaging, exceptions as fae
+
+from firebase.firebase_utils import FakePushBackend, PushDispatcher, _is_invalid_token_error
+
+def _dispatcher(tmp_path, backend, **kw):
+    return PushDispatcher(backend=backend, token_file=str(tmp_path / "tokens.txt"),
+                          backoff_sec=0.0, **kw)
+
+def test_invalid_token_detected_by_type_and_code():
+    assert _is_invalid_token_error(messaging.UnregisteredError("Requested entity was not found."))
+    assert _is_invalid_token_error(fae.NotFoundError("Requested entity was not found."))
+    assert _is_invalid_token_error(messaging.SenderIdMismatchError("mismatch"))
+    assert not _is_invalid_token_error(fae.UnavailableError("unregistered"))
+    assert not _is_invalid_token_error(RuntimeError("token unregistered"))
+
+def test_same_alert_coalesced_within_window(tmp_path):
+    d = _dispatcher(tmp_path, FakePushBackend(latency=0), coalesce_sec=0.2)
+    assert d.submit("불꽃 감지", "body")
+    assert not d.submit("불꽃 감지", "body")
+    assert d.submit("가스 감지", "body")          # 다른 알림은 합치지 않음
+    st = d.stats()
+    assert (st["alerts"], st["coalesced"], st["queue_depth"]) == (2, 1, 2)
+
+    time.sleep(0.25)
+    assert d.submit("불꽃 감지", "body")          # 창이 지나면 다시 전송
+    assert list(d._last_sent) == [("불꽃 감지", "body")]   # 지난 항목은 제거됨
+
+def test_last_sent_does_not_grow_with_distinct_alerts(tmp_path):
+    d = _dispatcher(tmp_path, FakePushBackend(latency=0), coalesce_sec=0.05, queue_size=1000)
+    for i in range(100):
+        d.submit("수위 감지", f"body {i}")
+    time.sleep(0.06)
+    d.submit("수위 감지", "last")
+    assert len(d._last_sent) == 1
+
+def test_unregistered_token_pruned(tmp_path):
+    backend = FakePushBackend(latency=0, invalid_tokens={"bad"})
+    d = _dispatcher(tmp_path, backend)
+    for t in ("good1", "bad", "good2"):
+        d.store.add(t)
+
+    d.deliver("불꽃 감지", "body")
+    assert backend.calls == [("불꽃 감지", "body", ["good1", "bad", "good2"])]
+    assert d.store.tokens() == ["good1", "good2"]
+    st = d.stats()
+    assert (st["sent_ok"], st["pruned"], st["failed"], st["retries"]) == (2, 1, 0, 0)
+
+def test_unavailable_batch_retried_then_sent(tmp_path):
+    backend = FakePushBackend(latency=0, fail_batches=1)
+    d = _dispatcher(tmp_path, backend)
+    d.store.add("good")
+    d.deliver("가스 감지", "body")
+    st = d.stats()
+    assert len(backend.calls) == 2
+    assert (st["sent_ok"], st["retries"], st["pruned"]) == (1, 1, 0)
+
+def test_dropped_alert_does_not_block_next_identical(tmp_path):
+    d = _dispatcher(tmp_path, FakePushBackend(latency=0), queue_size=1)
+    assert d.submit("가스 감지", "body")
+    assert not d.submit("불꽃 감지", "body")       # 큐 포화 → 드롭
+    assert ("불꽃 감지", "body") not in d._last_sent
+    d._q.get_nowait()
+    assert d.submit("불꽃 감지", "body")           # 합침으로 막히지 않고 적재
+    st = d.stats()
+    assert (st["dropped"], st["coalesced"]) == (1, 0)
+
+def test_async_drop_clears_coalesce_key(tmp_path):
+    d = _dispatcher(tmp_path, FakePushBackend(latency=0), queue_size=1)
+    d._aq = asyncio.Queue(maxsize=1)
+    d._aq.put_nowait(("가스 감지", "body"))
+    d._last_sent[("불꽃 감지", "body")] = time.monotonic()
+    d._put_async(("불꽃 감지", "body"))
+    assert ("불꽃 감지", "body") not in d._last_sent
+    assert d.stats()["dropped"] == 1
+
+def test_submit_before_run_async_is_delivered(tmp_path):
+    backend = FakePushBackend(latency=0)
+    d = _dispatcher(tmp_path, backend)
+    d.store.add("good")
+    assert d.submit("불꽃 감지", "body")           # 루프가 묶이기 전
+
+    async def main():
+        task = asyncio.ensure_future(d.run_async())
+        for _ in range(100):
+            if backend.calls:
+                break
+            await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(main())
+    assert backend.calls == [("불꽃 감지", "body", ["good"])]
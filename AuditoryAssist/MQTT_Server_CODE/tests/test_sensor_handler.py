@@ -0,0 +1,27 @@
+# tests/test_sensor_handler.py
+
+def _spy_observe(server, monkeypatch):
+    calls = []
+    real = server.fusion.engine.observe
+
+    def observe(sensor_id, on, now=None):
+        calls.append((sensor_id, on))
+        return real(sensor_id, on, now)
+
+    monkeypatch.setattr(server.fusion.engine, "observe", observe)
+    return calls
+
+def test_non_participating_sensor_skips_fusion(server, fake_client, monkeypatch):
+    calls = _spy_observe(server, monkeypatch)
+    context = {"sensor_status": {}, "just_triggered": False}
+    server._run_sensor_handler(lambda p, c, ctx: None, {"participates_in_alltrue": False},
+                               {"sensor_id": "water_level_1"}, fake_client, context)
+    assert calls == []
+
+def test_missing_status_counts_as_off(server, fake_client, monkeypatch):
+    calls = _spy_observe(server, monkeypatch)
+    context = {"sensor_status": {}, "just_triggered": False}
+    # 핸들러가 sensor_status 를 남기지 않음 → 감지로 보지 않음
+    server._run_sensor_handler(lambda p, c, ctx: None, {},
+                               {"sensor_id": "shz_sensor_pico"}, fake_client, context)
+    assert calls == [("shz_sensor_pico", False)]
@@ -0,0 +1,22 @@
+# tests/test_series_request.py
+import json
+
+def _resp(fake_client, server, sid):
+    topic, payload = fake_client.published[-1]
+    assert topic == f"{server.SERIES_PREFIX}/{sid}"
+    return json.loads(payload)
+
+def test_non_numeric_range_replies_with_error(server, fake_client):
+    server.series.add("MQ7_test", 12.5)
+    for bad in ({"since": "yesterday"}, {"until": [1, 2]}, {"since": {"ts": 1}}, {"limit": "many"}):
+        server.handle_series_request(fake_client, {"sensor_id": "MQ7_test", "res": "1s", **bad})
+        resp = _resp(fake_client, server, "MQ7_test")
+        assert resp["error"] and resp["points"] == [], bad
+
+def test_numeric_strings_are_coerced(server, fake_client):
+    server.series.add("MQ5_test", 3.0)
+    server.handle_series_request(fake_client, {"sensor_id": "MQ5_test", "res": "1s",
+                                               "since": "0", "until": str(2 ** 40), "limit": "5"})
+    resp = _resp(fake_client, server, "MQ5_test")
+    assert "error" not in resp
+    assert len(resp["points"]) == 1 and resp["points"][0][4] == 1
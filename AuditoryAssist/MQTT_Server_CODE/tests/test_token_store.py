@@ -0,0 +1,76 @@
+# tests/test_token_store.py
+import os
+
+from firebase.token_store import TokenStore
+
+def _path(tmp_path):
+    return str(tmp_path / "tokens.txt")
+
+def test_wal_replayed_after_crash(tmp_path):
+    path = _path(tmp_path)
+    s = TokenStore(path, compact_every=1000)
+    for t in ("a", "b", "c", "d"):
+        s.add(t)
+    s.remove("b")
+    s.add("b2")
+    expected = s.tokens()
+    # close() 없이 버림 → 스냅샷 없이 WAL 만 남은 상태
+    assert not os.path.exists(path)
+    assert os.path.exists(path + ".wal")
+
+    s2 = TokenStore(path, compact_every=1000)
+    assert s2.tokens() == expected == ["a", "c", "d", "b2"]
+    # 로딩 시 WAL 을 스냅샷으로 합침
+    assert not os.path.exists(path + ".wal")
+    with open(path) as f:
+        assert f.read().split() == expected
+
+def test_compaction_by_count_keeps_token_set(tmp_path):
+    path = _path(tmp_path)
+    s = TokenStore(path, compact_every=5)
+    for i in range(6):
+        s.add(f"t{i}")
+    s.remove("t1")
+    s.remove("t3")
+    # 5번째 변경에서 스냅샷 교체, 이후 2줄만 WAL 에 남음
+    assert s._wal_ops == 3
+    with open(path) as f:
+        assert f.read().split() == ["t0", "t1", "t2", "t3", "t4"]
+    assert not os.path.exists(path + ".tmp")   # os.replace 로 교체됨
+
+    assert TokenStore(path).tokens() == s.tokens() == ["t0", "t2", "t4", "t5"]
+
+def test_close_compacts_wal(tmp_path):
+    path = _path(tmp_path)
+    s = TokenStore(path)
+    s.add("a")
+    s.add("b")
+    s.remove("a")
+    s.close()
+    assert not os.path.exists(path + ".wal")
+    with open(path) as f:
+        assert f.read().split() == ["b"]
+    assert TokenStore(path).tokens() == ["b"]
+
+def test_replace_keeps_old_snapshot_until_swap(tmp_path, monkeypatch):
+    path = _path(tmp_path)
+    s = TokenStore(path)
+    s.add("a")
+    s.close()
+
+    s = TokenStore(path)
+    s.add("b")
+
+    def fail_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail_replace)
+    try:
+        s.close()
+    except OSError:
+        pass
+    monkeypatch.undo()
+    # 교체 실패 → 이전 스냅샷과 WAL 이 그대로 → 재시작 시 복구
+    with open(path) as f:
+        assert f.read().split() == ["a"]
+    assert TokenStore(path).tokens() == ["a", "b"]
@@ -0,0 +1,128 @@
+# timeseries.py
+# 센서 아날로그 값(MQ7/MQ5 value 등) 시계열 버퍼
+# - 센서마다 해상도별(1s / 1m / 1h) 고정 크기 링, 각 칸 = (bucket 시작, min, max, sum, count)
+# - 전부 array('d') 라 센서당 메모리가 생성 시점에 고정 (dict/JSON 보관 없음)
+#     기본: 1s x 900(15분) + 1m x 1440(24시간) + 1h x 720(30일) = 3060칸 x 5 x 8B ≈ 120KB
+import threading, time
+from array import array
+
+# 이름, bucket 초, 칸 수
+DEFAULT_RESOLUTIONS = (("1s", 1, 900), ("1m", 60, 1440), ("1h", 3600, 720))
+
+class _RollupRing:
+    __slots__ = ("step", "cap", "start", "vmin", "vmax", "vsum", "count", "head", "size")
+
+    def __init__(self, step, cap):
+        self.step  = step
+        self.cap   = cap
+        self.start = array("d", bytes(8 * cap))
+        self.vmin  = array("d", bytes(8 * cap))
+        self.vmax  = array("d", bytes(8 * cap))
+        self.vsum  = array("d", bytes(8 * cap))
+        self.count = array("d", bytes(8 * cap))
+        self.head  = -1        # 가장 최근 칸 위치
+        self.size  = 0
+
+    def add(self, ts, v):
+        b = (ts // self.step) * self.step
+        h = self.head
+        if h >= 0 and self.start[h] == b:
+            if v < self.vmin[h]: self.vmin[h] = v
+            if v > self.vmax[h]: self.vmax[h] = v
+            self.vsum[h]  += v
+            self.count[h] += 1
+            return
+        if h >= 0 and b < self.start[h]:
+            return              # 현재 칸보다 오래된 값(순서 뒤바뀜)은 버림
+        h = (h + 1) % self.cap
+        self.head = h
+        if self.size < self.cap:
+            self.size += 1
+        self.start[h] = b
+        self.vmin[h]  = v
+        self.vmax[h]  = v
+        self.vsum[h]  = v
+        self.count[h] = 1
+
+    def query(self, since=None, until=None, limit=None):
+        """[ [bucket_ts, min, max, avg, count], ... ] 시간 오름차순, limit 이면 최신 limit 개"""
+        out = []
+        i = self.head
+        for _ in range(self.size):
+            b = self.start[i]
+            if until is not None and b > until:
+                i = (i - 1) % self.cap
+                continue
+            if since is not None and b + self.step <= since:
+                break
+            n = self.count[i]
+            out.append([int(b), self.vmin[i], self.vmax[i], round(self.vsum[i] / n, 3), int(n)])
+            if limit is not None and len(out) >= limit:
+                break
+            i = (i - 1) % self.cap
+        out.reverse()
+        return out
+
+class SensorSeries:
+
+    def __init__(self, resolutions=DEFAULT_RESOLUTIONS):
+        self.rings = {name: _RollupRing(step, cap) for name, step, cap in resolutions}
+        self.last  = None     # (ts, value)
+
+    def add(self, ts, v):
+        for ring in self.rings.values():
+            ring.add(ts, v)
+        self.last = (ts, v)
+
+    def nbytes(self):
+        return sum(5 * r.cap * 8 for r in self.rings.values())
+
+class TimeSeriesStore:
+    """
+    add(sensor_id, value) : on_message 경로에서 호출 (lock 1회 + 해상도 수만큼 갱신)
+    query(...)            : 해상도/구간 지정 조회
+    max_sensors 를 넘는 새 센서는 받지 않고 카운트만 (전체 메모리 상한)
+    """
+
+    def __init__(self, resolutions=DEFAULT_RESOLUTIONS, max_sensors=64):
+        self.resolutions = tuple(resolutions)
+        self.max_sensors = int(max_sensors)
+        self._lock    = threading.Lock()
+        self._series  = {}
+        self._points  = 0
+        self._refused = 0
+
+    def add(self, sensor_id, value, ts=None):
+        ts = time.time() if ts is None else ts
+        v = float(value)
+        with self._lock:
+            s = self._series.get(sensor_id)
+            if s is None:
+                if len(self._series) >= self.max_sensors:
+                    self._refused += 1
+                    return False
+                s = self._series[sensor_id] = SensorSeries(self.resolutions)
+            s.add(ts, v)
+            self._points += 1
+        return True
+
+    def query(self, sensor_id, res="1m", since=None, until=None, limit=None):
+        with self._lock:
+            s = self._series.get(sensor_id)
+            if s is None:
+                return None
+            ring = s.rings.get(res)
+            if ring is None:
+                raise ValueError(f"알 수 없는 해상도 '{res}' (가능: {list(s.rings)})")
+            return {"points": ring.query(since, until, limit), "last": s.last}
+
+    def sensors(self):
+        with self._lock:
+            return sorted(self._series)
+
+    def stats(self) -> dict:
+        with self._lock:
+            n = len(self._series)
+            nbytes = sum(s.nbytes() for s in self._series.values())
+            return {"sensors": n, "points": self._points, "refused": self._refused,
+                    "bytes": nbytes}
@@ -0,0 +1,85 @@
+# topic_router.py
+# MQTT 토픽 필터(+ / # 와일드카드)를 트라이로 미리 컴파일해 두고
+# 수신 토픽 → 대상(target) 을 찾는다.
+
+class _Node:
+    __slots__ = ("children", "plus", "hash_target", "target")
+
+    def __init__(self):
+        self.children    = {}     # 리터럴 레벨 → _Node
+        self.plus        = None   # '+' 레벨 → _Node
+        self.hash_target = None   # '#' 로 끝나는 필터의 대상
+        self.target      = None   # 이 노드에서 끝나는 필터의 대상
+
+class TopicRouter:
+    """
+    - 와일드카드 없는 필터는 dict 로 바로 조회 (O(1))
+    - 와일드카드 필터는 트라이를 레벨 단위로 탐색 (토픽 깊이에만 비례)
+    - 여러 필터가 겹치면 구체적인 쪽 우선: 리터럴 > '+' > '#'
+    """
+
+    def __init__(self):
+        self._exact = {}
+        self._root  = _Node()
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def add(self, topic_filter, target):
+        levels = topic_filter.split("/")
+        for i, lv in enumerate(levels):
+            if lv == "#" and i != len(levels) - 1:
+                raise ValueError(f"'#' 는 마지막 레벨에만 올 수 있음: {topic_filter}")
+            if lv not in ("+", "#") and ("+" in lv or "#" in lv):
+                raise ValueError(f"와일드카드는 레벨 전체여야 함: {topic_filter}")
+
+        if "+" not in levels and "#" not in levels:
+            if topic_filter not in self._exact:
+                self._count += 1
+            self._exact[topic_filter] = target
+            return
+
+        node = self._root
+        for lv in levels:
+            if lv == "#":
+                if node.hash_target is None:
+                    self._count += 1
+                node.hash_target = target
+                return
+            if lv == "+":
+                if node.plus is None:
+                    node.plus = _Node()
+                node = node.plus
+            else:
+                node = node.children.setdefault(lv, _Node())
+        if node.target is None:
+            self._count += 1
+        node.target = target
+
+    def match(self, topic):
+        """가장 구체적인 대상 하나 (없으면 None)"""
+        target = self._exact.get(topic)
+        if target is not None:
+            return target
+        if topic.startswith("$"):
+            return None   # $SYS 등은 와일드카드로 매칭하지 않음 (MQTT 규약)
+        return self._walk(self._root, topic.split("/"), 0)
+
+    def _walk(self, node, levels, i):
+        if i == len(levels):
+            if node.target is not None:
+                return node.target
+            # 'a/#' 는 'a' 자체에도 매칭
+            return node.hash_target
+        lv = levels[i]
+        child = node.children.get(lv)
+        if child is not None:
+            t = self._walk(child, levels, i + 1)
+            if t is not None:
+                return t
+        if node.plus is not None:
+            t = self._walk(node.plus, levels, i + 1)
+            if t is not None:
+                return t
+        return node.hash_target